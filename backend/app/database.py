@@ -1,24 +1,203 @@
 """
 Database connection and session management
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from typing import AsyncGenerator, Dict, Generator
+import threading
+import time
 
 from app.config import settings
+from app.metrics import DB_QUERY_DURATION
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
-    echo=settings.debug
+# Async drivers used for each sync database URL scheme
+ASYNC_DRIVERS = {
+    "postgresql://": "postgresql+asyncpg://",
+    "postgresql+psycopg2://": "postgresql+asyncpg://",
+    "sqlite://": "sqlite+aiosqlite://",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """Convert a sync database URL to its async driver equivalent"""
+    for prefix, async_prefix in ASYNC_DRIVERS.items():
+        if database_url.startswith(prefix):
+            return async_prefix + database_url[len(prefix):]
+    return database_url
+
+
+class PoolMetrics:
+    """Connection pool usage counters for one engine"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.engine = None
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+    
+    def observe_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_time_total += seconds
+            self.wait_time_max = max(self.wait_time_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+    
+    def increment(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def snapshot(self) -> dict:
+        pool = self.engine.pool if self.engine is not None else None
+        in_use = pool.checkedout() if hasattr(pool, "checkedout") else None
+        with self._lock:
+            return {
+                "pool_class": type(pool).__name__ if pool is not None else None,
+                "size": pool.size() if hasattr(pool, "size") else None,
+                "in_use": in_use,
+                "idle": pool.checkedin() if hasattr(pool, "checkedin") else None,
+                "overflow": max(0, pool.overflow()) if hasattr(pool, "overflow") else None,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_time_avg_ms": round(self.wait_time_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_time_max_ms": round(self.wait_time_max * 1000, 3),
+            }
+
+
+pool_metrics: Dict[str, PoolMetrics] = {
+    "sync": PoolMetrics("sync"),
+    "async": PoolMetrics("async"),
+}
+
+
+class _TimedCheckoutMixin:
+    """Measure how long a checkout waits for a free connection"""
+    
+    metrics: PoolMetrics
+    
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.observe_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.observe_wait(time.perf_counter() - start)
+        return connection
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    metrics = pool_metrics["sync"]
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    metrics = pool_metrics["async"]
+
+
+def get_engine_options(is_async: bool = False) -> dict:
+    """Build engine options from the pool settings"""
+    options = {"echo": settings.debug}
+    
+    if settings.db_pgbouncer_mode:
+        # PgBouncer owns pooling; transaction pooling cannot keep prepared statements
+        options["poolclass"] = NullPool
+        if is_async:
+            options["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+        return options
+    
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping == "always",
+    )
+    return options
+
+
+def instrument_engine(engine: Engine, metrics: PoolMetrics) -> None:
+    """Attach pool event listeners feeding the usage counters"""
+    metrics.engine = engine
+    
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.increment("connects")
+    
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.increment("checkouts")
+    
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        metrics.increment("checkins")
+    
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.increment("invalidations")
+
+
+QUERY_OPERATIONS = {"select", "insert", "update", "delete"}
+
+
+def instrument_queries(engine: Engine, name: str) -> None:
+    """Attach cursor event listeners feeding the query duration histogram"""
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        operation = statement.lstrip()[:6].lower()
+        DB_QUERY_DURATION.labels(
+            engine=name,
+            operation=operation if operation in QUERY_OPERATIONS else "other"
+        ).observe(time.perf_counter() - started)
+    
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # Failed statements never reach after_cursor_execute
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+
+
+def get_pool_status() -> dict:
+    """Get connection pool usage for every engine"""
+    return {name: metrics.snapshot() for name, metrics in pool_metrics.items()}
+
+
+# Create SQLAlchemy engine (scripts, writes and background jobs)
+engine = create_engine(settings.database_url, **get_engine_options())
+
+# Create async engine (read endpoints served from the event loop)
+async_engine = create_async_engine(
+    settings.async_database_url or get_async_database_url(settings.database_url),
+    **get_engine_options(is_async=True)
 )
 
-# Create session factory
+instrument_engine(engine, pool_metrics["sync"])
+instrument_engine(async_engine.sync_engine, pool_metrics["async"])
+instrument_queries(engine, "sync")
+instrument_queries(async_engine.sync_engine, "async")
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Base class for models
 Base = declarative_base()
@@ -36,6 +215,15 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency that provides an async database session.
+    Queries do not block the event loop; closed after request.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db() -> None:
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
@@ -4,7 +4,7 @@ FastAPI backend for fraud detection with AI-powered explanations
 """
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
 from loguru import logger
@@ -12,10 +12,19 @@ import sys
 import os
 
 from app.config import settings
-from app.database import init_db, engine, Base
-from app.routers import auth_router, transactions_router
+from app.database import init_db, engine, Base, get_pool_status
+from app.routers import auth_router, transactions_router, scoring_router
 from app.services.fraud_detection import fraud_detection_service
 from app.services.llm_explainer import llm_explainer_service
+from app.services.analysis_tracker import analysis_tracker
+from app.services.event_hub import event_hub
+from app.services.explanation_queue import explanation_queue
+from app.services.realtime_scorer import realtime_scorer
+from app.services.rescoring import rescoring_job
+from app.middleware.audit import audit_writer
+from app.middleware.metrics import MetricsMiddleware
+from app.utils.responses import FastJSONResponse
+from app.metrics import observe_scoring_step, render_metrics
 
 
 # Configure logging
@@ -56,6 +65,15 @@ async def lifespan(app: FastAPI):
     else:
         logger.warning("⚠️ Fraud detection model not loaded - will use rule-based scoring")
     
+    # Real-time scoring state (compiled model, known account pairs)
+    try:
+        from app.database import SessionLocal
+        pairs = realtime_scorer.warm_up(SessionLocal)
+        logger.info(f"✅ Real-time scorer ready - {pairs} known account pairs")
+    except Exception as e:
+        logger.warning(f"⚠️ Real-time scorer warm-up failed - pairs will be loaded by the next refresh: {e}")
+    realtime_scorer.start_refresh(SessionLocal)
+    
     # Check Ollama/LLM status
     llm_status = await llm_explainer_service.check_ollama_status()
     if llm_status["status"] == "connected":
@@ -63,12 +81,38 @@ async def lifespan(app: FastAPI):
     else:
         logger.warning(f"⚠️ Ollama not available - Using fallback explanations")
     
+    # Start batched audit trail writer
+    if settings.audit_async_enabled:
+        audit_writer.start()
+    
+    # Ollama capacity served by risk, low-risk upgrades when idle
+    if settings.explanation_queue_enabled:
+        await explanation_queue.start()
+    
+    # Score transactions left pending (bulk ingestion, failed analyses)
+    if settings.rescoring_enabled:
+        rescoring_job.start()
+    
+    # Relay live analysis events between workers
+    if settings.event_bridge_enabled:
+        # Analyses in progress on the other workers
+        event_hub.add_remote_handler(analysis_tracker.apply_event)
+        try:
+            await event_hub.start_bridge(settings.database_url, settings.event_channel)
+        except Exception as e:
+            logger.warning(f"⚠️ Event bridge unavailable - live feed limited to this worker: {e}")
+    
     logger.info(f"✅ {settings.app_name} v{settings.app_version} started successfully")
     
     yield
     
     # Shutdown
     logger.info("👋 Shutting down BPCE Fraud Detection Platform...")
+    await event_hub.stop_bridge()
+    rescoring_job.stop()
+    realtime_scorer.stop_refresh()
+    await explanation_queue.stop()
+    audit_writer.stop()
 
 
 # Create FastAPI application
@@ -102,6 +146,7 @@ Incluez le token dans le header `Authorization: Bearer <token>` pour les requêt
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    default_response_class=FastJSONResponse,
     lifespan=lifespan
 )
 
@@ -115,6 +160,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Metrics middleware (request latency per route)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+    fraud_detection_service.add_observer(observe_scoring_step)
+
 
 # Exception handlers
 @app.exception_handler(RequestValidationError)
@@ -154,6 +204,7 @@ async def general_exception_handler(request: Request, exc: Exception):
 # Include routers
 app.include_router(auth_router)
 app.include_router(transactions_router)
+app.include_router(scoring_router)
 
 
 # Health check endpoints
@@ -214,10 +265,30 @@ async def get_model_status():
     
     return {
         "fraud_detection": model_status,
+        "realtime_scoring": realtime_scorer.get_status(),
+        "rescoring": rescoring_job.get_status(),
+        "explanation_queue": explanation_queue.get_status(),
         "llm_explainer": llm_status
     }
 
 
+@app.get("/api/db/pool", tags=["Database"])
+async def get_database_pool_status():
+    """
+    Get connection pool usage (in-use, overflow, checkout wait times)
+    """
+    return get_pool_status()
+
+
+@app.get("/metrics", tags=["Monitoring"])
+async def metrics():
+    """
+    Prometheus metrics (latency histograms, counters, pool and queue gauges)
+    """
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
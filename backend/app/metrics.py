@@ -0,0 +1,223 @@
+"""
+Prometheus metrics for the Fraud Detection Platform
+
+Collectors are in-process and lock-free on the hot path. When
+PROMETHEUS_MULTIPROC_DIR is set (several uvicorn/gunicorn workers), values
+are written to per-process files and aggregated at scrape time.
+"""
+import os
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+
+# Fast operations (steps, queries, inference) are sub-millisecond to a few ms
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# LLM calls take seconds
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+
+# HTTP
+HTTP_REQUEST_DURATION = Histogram(
+    "fraud_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"]
+)
+
+# Scoring
+SCORING_STEP_DURATION = Histogram(
+    "fraud_scoring_step_duration_seconds",
+    "Duration of each analyze_transaction step (excluding demo delays)",
+    ["step"],
+    buckets=FAST_BUCKETS
+)
+ML_INFERENCE_DURATION = Histogram(
+    "fraud_ml_inference_duration_seconds",
+    "IsolationForest feature scaling, predict and score_samples time",
+    buckets=FAST_BUCKETS
+)
+ANALYSIS_RESULTS = Counter(
+    "fraud_analysis_results_total",
+    "Analyzed transactions by risk level and suspicious flag",
+    ["risk_level", "suspicious"]
+)
+REALTIME_SCORING_DURATION = Histogram(
+    "fraud_realtime_scoring_duration_seconds",
+    "POST /score scoring time, full or rules only (ML over budget)",
+    ["mode"],
+    buckets=FAST_BUCKETS
+)
+
+# Streaming ingestion
+INGESTION_EVENT_LATENCY = Histogram(
+    "fraud_ingestion_event_latency_seconds",
+    "Time from the transaction event time to its committed score",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+)
+INGESTION_MESSAGES = Counter(
+    "fraud_ingestion_messages_total",
+    "Ingested stream messages by outcome (scored, invalid, failed)",
+    ["outcome"]
+)
+RESCORED_TRANSACTIONS = Counter(
+    "fraud_rescored_transactions_total",
+    "Pending transactions scored by the background rescoring job"
+)
+RESCORING_BATCH_DURATION = Histogram(
+    "fraud_rescoring_batch_duration_seconds",
+    "Claim, score and update of one rescoring batch",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+EXPLANATION_QUEUE_WAIT = Histogram(
+    "fraud_explanation_queue_wait_seconds",
+    "Time from enqueue to the start of the LLM generation, by tier (urgent, upgrade)",
+    ["tier"],
+    buckets=(0.01, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+)
+
+# LLM (Ollama)
+LLM_REQUEST_DURATION = Histogram(
+    "fraud_llm_request_duration_seconds",
+    "Wall-clock time of Ollama generate calls",
+    buckets=LLM_BUCKETS
+)
+LLM_QUEUE_DURATION = Histogram(
+    "fraud_llm_queue_duration_seconds",
+    "Time spent outside Ollama processing (queueing and network)",
+    buckets=LLM_BUCKETS
+)
+LLM_GENERATION_DURATION = Histogram(
+    "fraud_llm_generation_duration_seconds",
+    "Token generation time reported by Ollama (eval_duration)",
+    buckets=LLM_BUCKETS
+)
+LLM_PROMPT_EVAL_DURATION = Histogram(
+    "fraud_llm_prompt_eval_duration_seconds",
+    "Prompt evaluation time reported by Ollama (prompt_eval_duration)",
+    buckets=LLM_BUCKETS
+)
+LLM_TOKENS = Histogram(
+    "fraud_llm_tokens",
+    "Tokens per Ollama generation by kind (prompt evaluated, output generated)",
+    ["kind"],
+    buckets=(8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+)
+LLM_CIRCUIT_TRANSITIONS = Counter(
+    "fraud_llm_circuit_transitions_total",
+    "Circuit breaker state changes by breaker and new state",
+    ["breaker", "state"]
+)
+LLM_EXPLANATIONS = Counter(
+    "fraud_llm_explanations_total",
+    "Generated explanations by source (llm or fallback) and fallback reason",
+    ["source", "reason"]
+)
+
+# Database
+DB_QUERY_DURATION = Histogram(
+    "fraud_db_query_duration_seconds",
+    "SQL statement execution time",
+    ["engine", "operation"],
+    buckets=FAST_BUCKETS
+)
+
+# Audit trail
+AUDIT_WRITE_DURATION = Histogram(
+    "fraud_audit_write_duration_seconds",
+    "Audit trail write time (batched or synchronous)",
+    ["mode"],
+    buckets=FAST_BUCKETS
+)
+
+
+def observe_scoring_step(event: dict) -> None:
+    """Scoring observer feeding the per-step histogram"""
+    SCORING_STEP_DURATION.labels(step=event["step"]).observe(event["duration_ms"] / 1000)
+
+
+def _gauge(name: str, documentation: str, labels: list, values: list, value) -> GaugeMetricFamily:
+    metric = GaugeMetricFamily(name, documentation, labels=labels)
+    metric.add_metric(values, value)
+    return metric
+
+
+def _counter(name: str, documentation: str, labels: list, values: list, value) -> CounterMetricFamily:
+    metric = CounterMetricFamily(name, documentation, labels=labels)
+    metric.add_metric(values, value)
+    return metric
+
+
+def is_multiprocess() -> bool:
+    """True when metrics are shared between several worker processes"""
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+class RuntimeStatsCollector:
+    """
+    Exposes the counters kept by the runtime components
+
+    Pool, password hasher, audit writer and event hub statistics live in
+    memory of the worker answering the scrape; in multiprocess mode they are
+    labelled with its pid.
+    """
+
+    def collect(self):
+        # Imported here: these modules import app.metrics themselves
+        from app.database import get_pool_status
+        from app.middleware.audit import audit_writer
+        from app.services.event_hub import event_hub
+        from app.utils.security import password_hasher
+
+        labels = ["pid"] if is_multiprocess() else []
+        values = [str(os.getpid())] if is_multiprocess() else []
+
+        in_use = GaugeMetricFamily("fraud_db_pool_in_use", "Checked out connections", labels=labels + ["engine"])
+        overflow = GaugeMetricFamily("fraud_db_pool_overflow", "Connections beyond pool_size", labels=labels + ["engine"])
+        timeouts = CounterMetricFamily("fraud_db_pool_timeouts", "Checkout timeouts", labels=labels + ["engine"])
+        for name, pool in get_pool_status().items():
+            if pool["in_use"] is not None:
+                in_use.add_metric(values + [name], pool["in_use"])
+            if pool["overflow"] is not None:
+                overflow.add_metric(values + [name], pool["overflow"])
+            timeouts.add_metric(values + [name], pool["timeouts"])
+        yield in_use
+        yield overflow
+        yield timeouts
+
+        hasher = password_hasher.get_status()
+        yield _gauge("fraud_password_hash_pending", "Pending bcrypt operations", labels, values, hasher["pending"])
+        yield _counter("fraud_password_hash_rejected", "Logins rejected while the hasher pool was saturated", labels, values, hasher["rejected"])
+
+        audit = audit_writer.get_status()
+        yield _gauge("fraud_audit_queue_depth", "Audit entries waiting to be written", labels, values, audit["queued"])
+        yield _counter("fraud_audit_written", "Audit entries written", labels, values, audit["written"])
+        yield _counter("fraud_audit_failed", "Audit entries that could not be written", labels, values, audit["failed"])
+        yield _counter("fraud_audit_overflow", "Audit entries written synchronously because the queue was full", labels, values, audit["overflow"])
+
+        hub = event_hub.get_status()
+        yield _gauge("fraud_event_subscribers", "Live analysis feed subscribers", labels, values, hub["subscribers"])
+        yield _counter("fraud_events_dropped", "Events dropped for slow subscribers", labels, values, hub["dropped"])
+
+
+# Runtime stats are kept apart from the (possibly multiprocess) metric registry
+runtime_registry = CollectorRegistry(auto_describe=False)
+runtime_registry.register(RuntimeStatsCollector())
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Render every metric in the Prometheus text format"""
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry) + generate_latest(runtime_registry), CONTENT_TYPE_LATEST
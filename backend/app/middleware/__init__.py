@@ -1,6 +1,7 @@
 """
 Middleware package
 """
-from app.middleware.audit import AuditLogger, get_client_ip, get_user_agent
+from app.middleware.audit import AuditLogger, AuditWriter, audit_writer, get_client_ip, get_user_agent
+from app.middleware.metrics import MetricsMiddleware
 
-__all__ = ["AuditLogger", "get_client_ip", "get_user_agent"]
+__all__ = ["AuditLogger", "AuditWriter", "audit_writer", "get_client_ip", "get_user_agent", "MetricsMiddleware"]
@@ -1,12 +1,22 @@
 """
 Audit logging middleware
 """
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import Request
-from uuid import UUID
-from typing import Optional, Any
+from uuid import UUID, uuid4
+from datetime import datetime, timezone
+from typing import Optional, Any, Callable, List
+from loguru import logger
 import json
+import queue
+import threading
+import time
 
+from app.config import settings
+from app.database import SessionLocal
+from app.metrics import AUDIT_WRITE_DURATION
 from app.models.audit_log import AuditLog
 
 
@@ -50,12 +60,168 @@ def convert_to_serializable(obj: Any) -> Any:
     return obj
 
 
+class AuditWriter:
+    """
+    Background writer for the audit trail
+    
+    Entries are buffered in a bounded in-memory queue and persisted by a
+    dedicated thread in batches, with one multi-row INSERT per batch.
+    Remaining entries are flushed when the writer is stopped.
+    """
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_queue_size: Optional[int] = None
+    ):
+        self.session_factory = session_factory
+        self.batch_size = settings.audit_batch_size if batch_size is None else batch_size
+        # 0: each entry is written as soon as it arrives
+        self.flush_interval = settings.audit_flush_interval if flush_interval is None else flush_interval
+        if self.batch_size < 1:
+            raise ValueError("batch_size doit etre superieur ou egal a 1")
+        # maxsize 0: unbounded buffer
+        self._queue: queue.Queue = queue.Queue(
+            maxsize=settings.audit_queue_size if max_queue_size is None else max_queue_size
+        )
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Counters are updated by the writer thread and by request threads
+        self._counter_lock = threading.Lock()
+        self.written_count = 0
+        self.failed_count = 0
+        self.overflow_count = 0
+    
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self) -> None:
+        """Start the background writer thread"""
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+        logger.info("[AUDIT] Ecriture asynchrone du journal d'audit demarree")
+    
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the writer and flush every buffered entry"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout)
+        thread, self._thread = self._thread, None
+        if thread.is_alive():
+            # Still writing: flushing here would drain the queue concurrently
+            logger.warning(
+                f"[AUDIT] Ecrivain toujours actif apres {timeout}s - "
+                f"{self._queue.qsize()} entree(s) encore en file"
+            )
+            return
+        # Entries submitted while the thread was draining
+        self.flush()
+        logger.info(
+            f"[AUDIT] Ecriture asynchrone arretee - {self.written_count} entree(s) ecrite(s), "
+            f"{self.failed_count} en echec"
+        )
+    
+    def submit(self, entry: dict) -> bool:
+        """
+        Queue an entry for batched persistence
+        
+        Returns False when the writer is not running or its buffer is full,
+        in which case the caller must persist the entry itself.
+        """
+        if not self.is_running:
+            return False
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            self._increment("overflow_count", 1)
+            return False
+    
+    def flush(self) -> None:
+        """Write every queued entry immediately"""
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._write_batch(batch)
+    
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self._write_batch(batch)
+        self.flush()
+    
+    def _collect_batch(self) -> List[dict]:
+        """Entries received within flush_interval of the first one"""
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size and not self._stop_event.is_set():
+            # Short waits so that stop() is never delayed by a long interval
+            timeout = 0.1
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                timeout = min(remaining, timeout)
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                continue
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return batch
+    
+    def _write_batch(self, rows: List[dict]) -> None:
+        db = self.session_factory()
+        try:
+            with AUDIT_WRITE_DURATION.labels(mode="batch").time():
+                db.execute(insert(AuditLog), rows)
+                db.commit()
+            self._increment("written_count", len(rows))
+        except Exception as e:
+            db.rollback()
+            self._increment("failed_count", len(rows))
+            # Keep a trace of the lost entries in the application log
+            logger.error(
+                f"[AUDIT] Echec d'ecriture de {len(rows)} entree(s): {e} - "
+                f"{json.dumps(rows, default=str)}"
+            )
+        finally:
+            db.close()
+    
+    def _increment(self, counter: str, count: int) -> None:
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + count)
+    
+    def get_status(self) -> dict:
+        with self._counter_lock:
+            return {
+                "running": self.is_running,
+                "queued": self._queue.qsize(),
+                "written": self.written_count,
+                "failed": self.failed_count,
+                "overflow": self.overflow_count,
+            }
+
+
 class AuditLogger:
     """Centralized audit logging"""
     
     @staticmethod
-    def log_action(
-        db: Session,
+    def build_entry(
         user_id: Optional[UUID],
         action: str,
         resource_type: str = None,
@@ -63,24 +229,96 @@ class AuditLogger:
         details: dict = None,
         ip_address: str = None,
         user_agent: str = None
-    ) -> AuditLog:
-        """Log an action to the audit trail"""
+    ) -> dict:
+        """Build the column values of an audit log entry"""
         # Convert details to JSON-serializable format
         safe_details = convert_to_serializable(details) if details else None
         
-        log = AuditLog(
+        return {
+            "id": uuid4(),
+            "user_id": user_id,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "details": safe_details,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "created_at": datetime.now(timezone.utc),
+        }
+    
+    @staticmethod
+    def log_action(
+        db: Session,
+        user_id: Optional[UUID],
+        action: str,
+        resource_type: str = None,
+        resource_id: UUID = None,
+        details: dict = None,
+        ip_address: str = None,
+        user_agent: str = None,
+        sync: bool = False
+    ) -> AuditLog:
+        """
+        Log an action to the audit trail
+        
+        The entry is handed to the background audit writer. With sync=True
+        (regulatory-critical actions), or when the writer is unavailable or
+        saturated, it is committed on the request session before returning.
+        """
+        entry = AuditLogger.build_entry(
+            user_id=user_id,
+            action=action,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            details=details,
+            ip_address=ip_address,
+            user_agent=user_agent
+        )
+        
+        if not sync and audit_writer.submit(entry):
+            return AuditLog(**entry)
+        
+        log = AuditLog(**entry)
+        with AUDIT_WRITE_DURATION.labels(mode="sync").time():
+            db.add(log)
+            db.commit()
+        
+        return log
+    
+    @staticmethod
+    async def log_action_async(
+        db: AsyncSession,
+        user_id: Optional[UUID],
+        action: str,
+        resource_type: str = None,
+        resource_id: UUID = None,
+        details: dict = None,
+        ip_address: str = None,
+        user_agent: str = None,
+        sync: bool = False
+    ) -> AuditLog:
+        """
+        Log an action to the audit trail from an async session
+        
+        Same behaviour as log_action, the fallback commit is awaited.
+        """
+        entry = AuditLogger.build_entry(
             user_id=user_id,
             action=action,
             resource_type=resource_type,
             resource_id=resource_id,
-            details=safe_details,
+            details=details,
             ip_address=ip_address,
             user_agent=user_agent
         )
         
-        db.add(log)
-        db.commit()
-        db.refresh(log)
+        if not sync and audit_writer.submit(entry):
+            return AuditLog(**entry)
+        
+        log = AuditLog(**entry)
+        with AUDIT_WRITE_DURATION.labels(mode="sync").time():
+            db.add(log)
+            await db.commit()
         
         return log
     
@@ -129,3 +367,7 @@ class AuditLogger:
             },
             ip_address=ip_address
         )
+
+
+# Instance singleton
+audit_writer = AuditWriter()
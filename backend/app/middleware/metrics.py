@@ -0,0 +1,46 @@
+"""
+HTTP metrics middleware
+"""
+import time
+
+from app.metrics import HTTP_REQUEST_DURATION
+
+
+class MetricsMiddleware:
+    """
+    Records request latency per route template
+    
+    Written as a plain ASGI middleware so that streamed responses are not
+    buffered. Server-Sent Events streams are not observed: their duration is
+    the lifetime of the connection.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        response = {"status": 500, "streaming": False}
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                headers = dict(message.get("headers") or [])
+                response["streaming"] = headers.get(b"content-type", b"").startswith(b"text/event-stream")
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not response["streaming"]:
+                # Route templates keep label cardinality bounded
+                route = scope.get("route")
+                HTTP_REQUEST_DURATION.labels(
+                    method=scope["method"],
+                    route=getattr(route, "path", "unmatched"),
+                    status=str(response["status"])
+                ).observe(time.perf_counter() - started)
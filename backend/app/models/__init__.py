@@ -4,6 +4,7 @@ SQLAlchemy models package
 from app.models.user import User, UserRole
 from app.models.transaction import Transaction, TransactionType, TransactionChannel, TransactionStatus
 from app.models.audit_log import AuditLog, FraudAlert
+from app.models.explanation_job import ExplanationJob, ExplanationJobStatus
 
 __all__ = [
     "User",
@@ -13,5 +14,7 @@ __all__ = [
     "TransactionChannel",
     "TransactionStatus",
     "AuditLog",
-    "FraudAlert"
+    "FraudAlert",
+    "ExplanationJob",
+    "ExplanationJobStatus"
 ]
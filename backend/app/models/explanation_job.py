@@ -0,0 +1,43 @@
+"""
+Explanation job model - durable backing of the LLM explanation queue
+"""
+from sqlalchemy import Column, String, DateTime, Integer, Text, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+import uuid
+import enum
+
+from app.database import Base
+
+
+class ExplanationJobStatus(str, enum.Enum):
+    """Lifecycle of an explanation job"""
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ExplanationJob(Base):
+    """LLM explanation waiting for Ollama capacity, served by risk"""
+    
+    __tablename__ = "explanation_jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    transaction_id = Column(UUID(as_uuid=True), ForeignKey("transactions.id", ondelete="CASCADE"), nullable=False, index=True)
+    fraud_score = Column(Integer, nullable=False)
+    risk_factors = Column(JSONB)
+    status = Column(String(20), default=ExplanationJobStatus.QUEUED.value, nullable=False, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True))
+    completed_at = Column(DateTime(timezone=True))
+    next_attempt_at = Column(DateTime(timezone=True))  # Retry backoff, not reloaded before
+    
+    # Relationships
+    transaction = relationship("Transaction")
+    
+    def __repr__(self):
+        return f"<ExplanationJob {self.transaction_id} - {self.status}>"
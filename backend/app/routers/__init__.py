@@ -3,5 +3,6 @@ API Routers package
 """
 from app.routers.auth import router as auth_router
 from app.routers.transactions import router as transactions_router
+from app.routers.scoring import router as scoring_router
 
-__all__ = ["auth_router", "transactions_router"]
+__all__ = ["auth_router", "transactions_router", "scoring_router"]
@@ -2,20 +2,31 @@
 Authentication router
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.schemas.auth import LoginRequest, LoginResponse
+from app.database import get_db, get_async_db
+from app.schemas.auth import LoginRequest, LoginResponse, StreamTokenResponse
 from app.schemas.user import UserResponse, UserCreate
-from app.services.auth_service import AuthService
+from app.services.auth_service import AuthService, AsyncAuthService
 from app.utils.dependencies import get_current_user
-from app.utils.security import get_password_hash
+from app.utils.security import create_stream_token, password_hasher, PasswordHasherBusy
 from app.models.user import User
+from app.config import settings
 from app.middleware.audit import AuditLogger, get_client_ip, get_user_agent
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
+def raise_auth_overloaded() -> None:
+    """Reject a password operation while the hasher pool is saturated"""
+    raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Service d'authentification surchargé, veuillez réessayer",
+        headers={"Retry-After": "1"}
+    )
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     request: Request,
@@ -38,10 +49,15 @@ async def register(
             detail="Un compte avec cet email existe déjà"
         )
     
-    # Create new user
+    # Create new user (bcrypt runs off the event loop)
+    try:
+        hashed_password = await password_hasher.hash(user_data.password)
+    except PasswordHasherBusy:
+        raise_auth_overloaded()
+    
     new_user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=hashed_password,
         full_name=user_data.full_name,
         role=user_data.role
     )
@@ -68,7 +84,7 @@ async def register(
 async def login(
     request: Request,
     login_data: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Authenticate user and return JWT token
@@ -78,12 +94,15 @@ async def login(
     
     Returns access token and user information
     """
-    auth_service = AuthService(db)
-    user = auth_service.authenticate_user(login_data.email, login_data.password)
+    auth_service = AsyncAuthService(db)
+    try:
+        user = await auth_service.authenticate_user(login_data.email, login_data.password)
+    except PasswordHasherBusy:
+        raise_auth_overloaded()
     
     if not user:
         # Log failed login attempt
-        AuditLogger.log_action(
+        await AuditLogger.log_action_async(
             db=db,
             user_id=None,
             action="login_failed",
@@ -100,7 +119,7 @@ async def login(
         )
     
     # Log successful login
-    AuditLogger.log_action(
+    await AuditLogger.log_action_async(
         db=db,
         user_id=user.id,
         action="login_success",
@@ -160,3 +179,20 @@ async def refresh_token(
     """
     auth_service = AuthService(db)
     return auth_service.create_user_token(current_user)
+
+
+@router.post("/stream-token", response_model=StreamTokenResponse)
+async def issue_stream_token(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Issue a short-lived token for the live analysis feed
+    
+    EventSource cannot send an Authorization header: this token goes in the
+    stream URL instead of the access token, and is rejected by every other
+    endpoint.
+    """
+    return StreamTokenResponse(
+        token=create_stream_token(current_user.id, current_user.email),
+        expires_in=settings.stream_token_expire_seconds
+    )
@@ -0,0 +1,30 @@
+"""
+Real-time scoring router
+"""
+from fastapi import APIRouter, Depends
+
+from app.config import settings
+from app.models.user import User
+from app.schemas.transaction import TransactionCreate
+from app.schemas.scoring import ScoreResponse
+from app.services.realtime_scorer import realtime_scorer
+from app.utils.dependencies import get_current_user
+
+router = APIRouter(prefix="/score", tags=["Scoring"])
+
+
+@router.post("", response_model=ScoreResponse)
+async def score_transaction(
+    transaction_data: TransactionCreate,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Score a transaction before authorization
+    
+    The transaction is not persisted. Scoring runs from memory only
+    (compiled model, pair cache, compiled rules) so it can be called
+    synchronously by the payment flow. If the ML step exceeds its latency
+    budget, the score falls back to the rules (degraded=true).
+    """
+    result = realtime_scorer.score(transaction_data)
+    return ScoreResponse(**result, within_budget=result["latency_ms"] <= settings.realtime_budget_ms)
@@ -2,44 +2,125 @@
 Transactions router with fraud analysis
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from typing import Optional, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, desc, select, insert, update
+from pydantic import TypeAdapter, ValidationError
+from typing import Optional, List, Union
 from datetime import datetime, timedelta
+from functools import partial
+import time
 from uuid import UUID, uuid4
+from decimal import Decimal
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.transaction import Transaction, TransactionStatus
 from app.models.user import User
 from app.schemas.transaction import (
     TransactionCreate,
     TransactionResponse,
     TransactionListResponse,
+    TransactionSummaryListResponse,
+    TransactionSummaryResponse,
+    BulkTransactionItem,
+    BulkTransactionResponse,
     TransactionAnalysisRequest,
     TransactionAnalysisResponse,
     TransactionStatsResponse,
     DailyStatsResponse,
     TransactionReviewRequest
 )
-from app.utils.dependencies import get_current_user, get_admin_user
+from app.config import settings
+from app.utils.dependencies import get_current_user, get_stream_user, get_admin_user
+from app.utils.unit_of_work import UnitOfWork, get_unit_of_work
 from app.services.fraud_detection import fraud_detection_service
 from app.services.llm_explainer import llm_explainer_service
-from app.middleware.audit import AuditLogger, get_client_ip
+from app.services.analysis_tracker import analysis_tracker
+from app.services.event_hub import EventHub, event_hub, format_sse
+from app.services.columnar_export import COLUMNAR_FORMATS, columnar_exporter, load_pyarrow, resolve_columns
+from app.services.explanation_queue import explanation_queue
+from app.services.transaction_filters import apply_transaction_filters
+from app.services.report_export import DEFAULT_REPORT_COLUMNS, REPORT_EXTRA_COLUMNS, REPORT_FORMATS, report_exporter
+from app.services.realtime_scorer import realtime_scorer
+from app.middleware.audit import get_client_ip
+from app.utils.responses import ModelJSONResponse
 
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
+# Validates a whole bulk payload in one pass
+TRANSACTION_BATCH_ADAPTER = TypeAdapter(List[TransactionCreate])
+
+# Response models serialize with their own compiled schema, lists need an adapter
+DAILY_STATS_ADAPTER = TypeAdapter(List[DailyStatsResponse])
+
+# Columns of the list summary view, the large text columns are never loaded
+SUMMARY_COLUMNS = [Transaction.__table__.c[name] for name in TransactionSummaryResponse.model_fields]
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
 
 def generate_transaction_ref() -> str:
     """Generate unique transaction reference"""
     return f"TXN-{datetime.now().strftime('%Y%m%d')}-{uuid4().hex[:8].upper()}"
 
 
+def analysis_event_payload(transaction: Transaction) -> dict:
+    """Summary of a transaction carried by the analysis.started event"""
+    return {
+        "transaction_id": str(transaction.id),
+        "transaction_ref": transaction.transaction_ref,
+        "amount": float(transaction.amount),
+        "currency": transaction.currency,
+        "sender_name": transaction.sender_name,
+        "receiver_name": transaction.receiver_name,
+        "country_origin": transaction.country_origin,
+        "country_destination": transaction.country_destination,
+        "transaction_type": transaction.transaction_type
+    }
+
+
+def parse_bulk_payload(body: bytes, content_type: str) -> List[TransactionCreate]:
+    """
+    Validate a JSON array or NDJSON body of transactions
+    
+    NDJSON lines are joined into an array so both formats are validated
+    in a single pass; error locations carry the item index.
+    """
+    if content_type.split(";")[0].strip() in NDJSON_MEDIA_TYPES:
+        lines = [line for line in body.splitlines() if line.strip()]
+        body = b"[" + b",".join(lines) + b"]"
+    try:
+        return TRANSACTION_BATCH_ADAPTER.validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError([
+            {**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)
+        ])
+
+
+def stream_session_factory(db: Session):
+    """
+    Sessions for a streamed response body
+    
+    The request session is closed before the body is sent, the stream
+    opens its own on the same engine.
+    """
+    return partial(Session, bind=db.get_bind())
+
+
+def publish_scoring_step(event: dict) -> None:
+    """Forward a scorer step event to the live analysis feed"""
+    event_hub.publish(EventHub.STEP_COMPLETED, **event)
+
+
 @router.post("", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
 async def create_transaction(
     transaction_data: TransactionCreate,
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    uow: UnitOfWork = Depends(get_unit_of_work)
 ):
     """
     Create a new transaction
@@ -48,8 +129,10 @@ async def create_transaction(
     Use POST /transactions/{id}/analyze to perform fraud analysis.
     """
     transaction = Transaction(
+        id=uuid4(),
         transaction_ref=generate_transaction_ref(),
-        amount=transaction_data.amount,
+        # Same scale as the NUMERIC(15, 2) column, the row is not reloaded
+        amount=transaction_data.amount.quantize(Decimal("0.01")),
         currency=transaction_data.currency,
         sender_account=transaction_data.sender_account,
         receiver_account=transaction_data.receiver_account,
@@ -66,13 +149,10 @@ async def create_transaction(
         transaction_date=transaction_data.transaction_date
     )
     
-    db.add(transaction)
-    db.commit()
-    db.refresh(transaction)
+    uow.add(transaction)
     
     # Log creation
-    AuditLogger.log_action(
-        db=db,
+    uow.audit(
         user_id=current_user.id,
         action="create_transaction",
         resource_type="transaction",
@@ -81,10 +161,142 @@ async def create_transaction(
         ip_address=get_client_ip(request)
     )
     
+    uow.commit()
+    realtime_scorer.record_transaction(transaction)
+    
     return transaction
 
 
-@router.get("", response_model=TransactionListResponse)
+@router.post(
+    "/bulk",
+    response_model=BulkTransactionResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/TransactionCreate"}}
+                },
+                "application/x-ndjson": {"schema": {"type": "string", "description": "One TransactionCreate per line"}}
+            }
+        }
+    }
+)
+async def create_transactions_bulk(
+    request: Request,
+    score: bool = Query(False, description="Score inline within the latency budget"),
+    score_budget_ms: Optional[int] = Query(None, ge=0, le=60000),
+    current_user: User = Depends(get_current_user),
+    uow: UnitOfWork = Depends(get_unit_of_work)
+):
+    """
+    Ingest a batch of transactions
+    
+    Accepts a JSON array or NDJSON (Content-Type: application/x-ndjson) of
+    transactions, inserted with multi-row INSERTs in one database transaction.
+    
+    - **score**: Run the batched scorer on the new transactions. Chunks are
+      scored until score_budget_ms is spent; the remaining transactions stay
+      pending for a later analysis. Scored transactions get the rule-based
+      explanation, the LLM one is generated in the background.
+    """
+    items = parse_bulk_payload(await request.body(), request.headers.get("content-type", ""))
+    
+    if not items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Aucune transaction fournie"
+        )
+    if len(items) > settings.bulk_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Trop de transactions: maximum {settings.bulk_max_items} par requête"
+        )
+    
+    client_ip = get_client_ip(request)
+    rows = [
+        {
+            **item.model_dump(),
+            "id": uuid4(),
+            "transaction_ref": generate_transaction_ref(),
+            # Same scale as the NUMERIC(15, 2) column
+            "amount": item.amount.quantize(Decimal("0.01")),
+            "ip_address": item.ip_address or client_ip,
+            "status": TransactionStatus.PENDING.value
+        }
+        for item in items
+    ]
+    
+    db = uow.db
+    await run_in_threadpool(db.execute, insert(Transaction), rows)
+    
+    # Detached copies for the scorer, the rows are already inserted
+    transactions = [Transaction(**row) for row in rows]
+    
+    scored = 0
+    if score:
+        budget = settings.bulk_score_budget_ms if score_budget_ms is None else score_budget_ms
+        deadline = time.perf_counter() + budget / 1000
+        chunk_size = settings.bulk_score_chunk_size
+        analysis_date = datetime.utcnow()
+        
+        scored_results = []
+        while scored < len(transactions) and time.perf_counter() < deadline:
+            chunk = transactions[scored:scored + chunk_size]
+            results = await run_in_threadpool(fraud_detection_service.score_batch, chunk, db)
+            for transaction, (fraud_score, is_suspicious, _) in zip(chunk, results):
+                transaction.fraud_score = fraud_score
+                transaction.is_suspicious = is_suspicious
+            scored_results.extend(zip(chunk, results))
+            scored += len(chunk)
+        
+        if scored:
+            await run_in_threadpool(db.execute, update(Transaction), [
+                {
+                    "id": t.id,
+                    "fraud_score": t.fraud_score,
+                    "is_suspicious": t.is_suspicious,
+                    "analysis_date": analysis_date,
+                    "status": TransactionStatus.ANALYZED.value
+                }
+                for t in transactions[:scored]
+            ])
+            # Rule-based explanations now, LLM batches by risk in the background
+            if settings.explanation_queue_enabled:
+                await run_in_threadpool(explanation_queue.enqueue_scored, scored_results, db)
+    
+    uow.audit(
+        user_id=current_user.id,
+        action="bulk_create_transactions",
+        resource_type="transaction",
+        details={"count": len(rows), "scored": scored},
+        ip_address=client_ip
+    )
+    
+    uow.commit()
+    for transaction in transactions:
+        realtime_scorer.record_transaction(transaction)
+    
+    return BulkTransactionResponse(
+        created=len(rows),
+        scored=scored,
+        pending_scoring=len(rows) - scored if score else 0,
+        items=[
+            BulkTransactionItem(
+                index=index,
+                id=t.id,
+                transaction_ref=t.transaction_ref,
+                fraud_score=t.fraud_score,
+                is_suspicious=t.is_suspicious if t.fraud_score is not None else None,
+                risk_level=t.risk_level if t.fraud_score is not None else None
+            )
+            for index, t in enumerate(transactions)
+        ]
+    )
+
+
+@router.get("", response_model=Union[TransactionListResponse, TransactionSummaryListResponse])
 async def list_transactions(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
@@ -97,12 +309,16 @@ async def list_transactions(
     search: Optional[str] = None,
     sort_by: str = "transaction_date",
     sort_order: str = "desc",
+    view: str = Query("full", pattern="^(full|summary)$"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List transactions with filtering and pagination
     
+    - **view**: full (TransactionResponse items) or summary (TransactionSummaryResponse
+      items: identifiers, parties, amount, countries, score and status; details
+      stay on GET /transactions/{id})
     - **page**: Page number (starting from 1)
     - **page_size**: Number of items per page (max 100)
     - **status**: Filter by status (pending, analyzed, reviewed, confirmed_fraud, cleared)
@@ -113,37 +329,22 @@ async def list_transactions(
     - **end_date**: Filter transactions before this date
     - **search**: Search in transaction reference, sender/receiver names
     """
-    query = db.query(Transaction)
+    summary = view == "summary"
     
     # Apply filters
-    if status:
-        query = query.filter(Transaction.status == status)
-    
-    if is_suspicious is not None:
-        query = query.filter(Transaction.is_suspicious == is_suspicious)
-    
-    if min_amount:
-        query = query.filter(Transaction.amount >= min_amount)
-    
-    if max_amount:
-        query = query.filter(Transaction.amount <= max_amount)
-    
-    if start_date:
-        query = query.filter(Transaction.transaction_date >= start_date)
-    
-    if end_date:
-        query = query.filter(Transaction.transaction_date <= end_date)
-    
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Transaction.transaction_ref.ilike(search_term)) |
-            (Transaction.sender_name.ilike(search_term)) |
-            (Transaction.receiver_name.ilike(search_term))
-        )
+    query = apply_transaction_filters(
+        select(*SUMMARY_COLUMNS) if summary else select(Transaction),
+        status=status,
+        is_suspicious=is_suspicious,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        start_date=start_date,
+        end_date=end_date,
+        search=search
+    )
     
     # Get total count
-    total = query.count()
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
     
     # Apply sorting
     sort_column = getattr(Transaction, sort_by, Transaction.transaction_date)
@@ -154,23 +355,35 @@ async def list_transactions(
     
     # Apply pagination
     offset = (page - 1) * page_size
-    transactions = query.offset(offset).limit(page_size).all()
-    
     total_pages = (total + page_size - 1) // page_size
     
-    return TransactionListResponse(
+    if summary:
+        # Plain rows, no ORM objects
+        rows = (await db.execute(query.offset(offset).limit(page_size))).mappings().all()
+        response = TransactionSummaryListResponse(
+            items=rows,
+            total=total,
+            page=page,
+            page_size=page_size,
+            total_pages=total_pages
+        )
+        return ModelJSONResponse(response)
+    
+    transactions = (await db.scalars(query.offset(offset).limit(page_size))).all()
+    
+    return ModelJSONResponse(TransactionListResponse(
         items=transactions,
         total=total,
         page=page,
         page_size=page_size,
         total_pages=total_pages
-    )
+    ))
 
 
 @router.get("/stats", response_model=TransactionStatsResponse)
 async def get_transaction_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get dashboard statistics
@@ -179,49 +392,41 @@ async def get_transaction_stats(
     """
     today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
     
-    # Total counts
-    total = db.query(Transaction).count()
-    suspicious = db.query(Transaction).filter(Transaction.is_suspicious == True).count()
-    confirmed_fraud = db.query(Transaction).filter(Transaction.is_confirmed_fraud == True).count()
-    pending = db.query(Transaction).filter(Transaction.status == TransactionStatus.PENDING.value).count()
-    
-    # Average fraud score
-    avg_score = db.query(func.avg(Transaction.fraud_score)).filter(
-        Transaction.fraud_score.isnot(None)
-    ).scalar()
-    
-    # Total fraud amount
-    fraud_amount = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.is_confirmed_fraud == True
-    ).scalar()
-    
-    # Today's transactions
-    today_count = db.query(Transaction).filter(
-        Transaction.transaction_date >= today
-    ).count()
-    
-    # High risk count (score >= 85)
-    high_risk = db.query(Transaction).filter(
-        Transaction.fraud_score >= 85
-    ).count()
-    
-    return TransactionStatsResponse(
-        total_transactions=total,
-        suspicious_count=suspicious,
-        confirmed_fraud_count=confirmed_fraud,
-        pending_review=pending,
-        average_fraud_score=float(avg_score) if avg_score else None,
-        total_fraud_amount=fraud_amount,
-        transactions_today=today_count,
-        high_risk_count=high_risk
-    )
+    # All aggregates in a single round trip
+    stats = (await db.execute(select(
+        func.count(Transaction.id).label('total'),
+        func.count(Transaction.id).filter(Transaction.is_suspicious == True).label('suspicious'),
+        func.count(Transaction.id).filter(Transaction.is_confirmed_fraud == True).label('confirmed_fraud'),
+        func.count(Transaction.id).filter(
+            Transaction.status == TransactionStatus.PENDING.value
+        ).label('pending'),
+        # Average fraud score (NULL scores are ignored by AVG)
+        func.avg(Transaction.fraud_score).label('avg_score'),
+        # Total fraud amount
+        func.sum(Transaction.amount).filter(Transaction.is_confirmed_fraud == True).label('fraud_amount'),
+        # Today's transactions
+        func.count(Transaction.id).filter(Transaction.transaction_date >= today).label('today_count'),
+        # High risk count (score >= 85)
+        func.count(Transaction.id).filter(Transaction.fraud_score >= 85).label('high_risk')
+    ))).one()
+    
+    return ModelJSONResponse(TransactionStatsResponse(
+        total_transactions=stats.total,
+        suspicious_count=stats.suspicious,
+        confirmed_fraud_count=stats.confirmed_fraud,
+        pending_review=stats.pending,
+        average_fraud_score=float(stats.avg_score) if stats.avg_score else None,
+        total_fraud_amount=stats.fraud_amount,
+        transactions_today=stats.today_count,
+        high_risk_count=stats.high_risk
+    ))
 
 
 @router.get("/daily-stats", response_model=List[DailyStatsResponse])
 async def get_daily_stats(
     days: int = Query(7, ge=1, le=30),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get daily statistics for charts
@@ -230,7 +435,7 @@ async def get_daily_stats(
     """
     start_date = datetime.now() - timedelta(days=days)
     
-    results = db.query(
+    results = (await db.execute(select(
         func.date(Transaction.transaction_date).label('date'),
         func.count(Transaction.id).label('total'),
         func.count(Transaction.id).filter(Transaction.is_suspicious == True).label('suspicious'),
@@ -238,15 +443,15 @@ async def get_daily_stats(
             func.sum(Transaction.amount).filter(Transaction.is_confirmed_fraud == True),
             0
         ).label('fraud_amount')
-    ).filter(
+    ).where(
         Transaction.transaction_date >= start_date
     ).group_by(
         func.date(Transaction.transaction_date)
     ).order_by(
         func.date(Transaction.transaction_date)
-    ).all()
+    ))).all()
     
-    return [
+    return ModelJSONResponse([
         DailyStatsResponse(
             date=str(r.date),
             total=r.total,
@@ -254,19 +459,88 @@ async def get_daily_stats(
             fraud_amount=r.fraud_amount
         )
         for r in results
-    ]
+    ], adapter=DAILY_STATS_ADAPTER)
+
+
+@router.get("/export")
+def export_transactions(
+    export_format: str = Query("parquet", alias="format", pattern="^(parquet|arrow|csv|ndjson)$"),
+    columns: Optional[str] = Query(None, description="Comma separated column names"),
+    features: bool = True,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    is_suspicious: Optional[bool] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    search: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream an export of the transactions matching the list filters
+    
+    - **format**: parquet or arrow (Arrow IPC file) for analytics, csv or ndjson for reporting
+    - **columns**: Exported columns, comma separated (default: per format, see below)
+    - **features**: parquet/arrow only, add the engineered features of the ML model (feature_* columns)
+    
+    parquet/arrow default to identifiers, amounts, countries, scores and status.
+    csv/ndjson default to the compliance extract: parties, scores, status,
+    explanation and review. **ai_explanation** is the explanation stored by
+    the analysis, empty when there is none; **generated_explanation** (csv/ndjson
+    only) holds the rule-based text computed at export time for the scored
+    rows without a stored explanation, empty for the others.
+    
+    Rows are read with a server-side cursor and written chunk by chunk,
+    memory stays constant whatever the number of rows.
+    """
+    requested = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+    report = export_format in REPORT_FORMATS
+    try:
+        if report:
+            selected = resolve_columns(requested, default=DEFAULT_REPORT_COLUMNS, extra=REPORT_EXTRA_COLUMNS)
+        else:
+            selected = resolve_columns(requested)
+            load_pyarrow()
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+    
+    stmt = apply_transaction_filters(
+        report_exporter.build_query(selected) if report else columnar_exporter.build_query(selected, include_features=features),
+        status=status_filter,
+        is_suspicious=is_suspicious,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        start_date=start_date,
+        end_date=end_date,
+        search=search
+    )
+    if report:
+        media_type, extension = REPORT_FORMATS[export_format]
+        body = report_exporter.stream(stream_session_factory(db), stmt, selected, export_format)
+    else:
+        media_type, extension = COLUMNAR_FORMATS[export_format]
+        body = columnar_exporter.stream(stream_session_factory(db), stmt, selected, export_format, include_features=features)
+    filename = f"transactions-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{extension}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 async def get_transaction(
     transaction_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific transaction by ID
     """
-    transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
+    transaction = await db.get(Transaction, transaction_id)
     
     if not transaction:
         raise HTTPException(
@@ -280,21 +554,75 @@ async def get_transaction(
 @router.get("/analysis/in-progress", response_model=List[TransactionResponse])
 async def get_analyzing_transactions(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all transactions currently being analyzed
-    Returns transactions with status 'analyzing'
+    Returns transactions registered in the analysis tracker
+    
+    The tracker is in memory: with several workers, the analyses of the
+    others are only listed when EVENT_BRIDGE_ENABLED relays them. An
+    analysis started before this worker (re)started is not listed.
     """
     from loguru import logger
-    logger.info("[API] Recuperation des transactions en cours d'analyse...")
     
-    transactions = db.query(Transaction).filter(
-        Transaction.status == TransactionStatus.ANALYZING.value
-    ).order_by(desc(Transaction.analysis_date)).all()
+    in_progress = analysis_tracker.in_progress()
+    if not in_progress:
+        return []
+    
+    transactions = (await db.scalars(
+        select(Transaction).where(Transaction.id.in_(list(in_progress.keys())))
+    )).all()
     
     logger.info(f"[API] {len(transactions)} transaction(s) en cours d'analyse")
-    return transactions
+    items = [
+        TransactionResponse.model_validate(t).model_copy(update={
+            "status": TransactionStatus.ANALYZING.value,
+            "analysis_date": in_progress[t.id]
+        })
+        for t in transactions
+    ]
+    return sorted(items, key=lambda t: t.analysis_date, reverse=True)
+
+
+@router.get("/analysis/stream")
+async def stream_analysis_events(
+    request: Request,
+    current_user: User = Depends(get_stream_user)
+):
+    """
+    Live feed of analysis lifecycle events (Server-Sent Events)
+    
+    Pushes started, step_completed, scored, explained, completed and failed
+    events as they happen. Authenticated with the **token** query parameter
+    since EventSource cannot send headers: a short-lived stream token from
+    POST /auth/stream-token, access tokens are refused.
+    """
+    subscription = event_hub.subscribe()
+    
+    async def event_stream():
+        event_id = 0
+        try:
+            # Flush headers immediately so the client sees the stream as open
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=settings.event_heartbeat_interval)
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                event_id += 1
+                yield format_sse(event, event_id)
+        finally:
+            event_hub.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
 
 
 @router.post("/{transaction_id}/start-analysis")
@@ -315,10 +643,13 @@ async def start_analysis(
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction non trouvée")
     
-    # Mark as analyzing
-    transaction.status = TransactionStatus.ANALYZING.value
-    transaction.analysis_date = datetime.utcnow()
-    db.commit()
+    # Mark as analyzing (published in memory, not committed)
+    started_at = analysis_tracker.start(transaction.id)
+    event_hub.publish(
+        EventHub.ANALYSIS_STARTED,
+        started_at=started_at.isoformat(),
+        **analysis_event_payload(transaction)
+    )
     
     logger.info(f"[API] 🚀 Analyse demarree pour transaction: {transaction.transaction_ref}")
     
@@ -336,7 +667,7 @@ async def analyze_transaction(
     request: Request,
     analysis_request: TransactionAnalysisRequest = TransactionAnalysisRequest(),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    uow: UnitOfWork = Depends(get_unit_of_work)
 ):
     """
     Analyze a transaction for fraud
@@ -348,6 +679,7 @@ async def analyze_transaction(
     """
     from loguru import logger
     
+    db = uow.db
     transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
     
     if not transaction:
@@ -360,7 +692,7 @@ async def analyze_transaction(
     if transaction.fraud_score is not None and not analysis_request.force_reanalysis:
         logger.info(f"[API] Transaction {transaction.transaction_ref} deja analysee - score: {transaction.fraud_score}")
         # Return existing analysis
-        return TransactionAnalysisResponse(
+        return ModelJSONResponse(TransactionAnalysisResponse(
             transaction_id=transaction.id,
             transaction_ref=transaction.transaction_ref,
             fraud_score=transaction.fraud_score,
@@ -369,49 +701,85 @@ async def analyze_transaction(
             ai_explanation=transaction.ai_explanation or "Analyse précédente - aucune explication disponible",
             analysis_date=transaction.analysis_date,
             factors=[]
-        )
+        ))
     
-    # Mark as analyzing first
+    # Mark as analyzing first (published in memory, not committed)
     logger.info(f"[API] 🔄 Passage au statut 'analyzing' pour {transaction.transaction_ref}")
-    transaction.status = TransactionStatus.ANALYZING.value
-    transaction.analysis_date = datetime.utcnow()
-    db.commit()
-    
-    # Perform fraud analysis (with detailed logs)
-    logger.info(f"[API] 🤖 Lancement de l'analyse IA...")
-    fraud_score, is_suspicious, risk_factors = fraud_detection_service.analyze_transaction(transaction, db)
-    
-    # Generate AI explanation
-    logger.info(f"[API] 📝 Generation de l'explication LLM...")
-    ai_explanation = await llm_explainer_service.explain_transaction(
-        transaction=transaction,
-        fraud_score=fraud_score,
-        risk_factors=risk_factors
+    started_at = analysis_tracker.start(transaction.id)
+    event_hub.publish(
+        EventHub.ANALYSIS_STARTED,
+        started_at=started_at.isoformat(),
+        **analysis_event_payload(transaction)
     )
-    
-    # Update transaction with results
-    transaction.fraud_score = fraud_score
-    transaction.is_suspicious = is_suspicious
-    transaction.ai_explanation = ai_explanation
-    transaction.analysis_date = datetime.utcnow()
-    transaction.status = TransactionStatus.ANALYZED.value
-    
-    db.commit()
-    db.refresh(transaction)
-    
-    logger.info(f"[API] ✅ Analyse terminee - Score: {fraud_score}/100 - Suspect: {is_suspicious}")
-    
-    # Log analysis
-    AuditLogger.log_transaction_analysis(
-        db=db,
-        user_id=current_user.id,
-        transaction_id=transaction.id,
-        fraud_score=fraud_score,
-        is_suspicious=is_suspicious,
-        ip_address=get_client_ip(request)
+    event_ref = {"transaction_id": str(transaction.id), "transaction_ref": transaction.transaction_ref}
+    
+    try:
+        # Perform fraud analysis (with detailed logs), off the event loop
+        logger.info(f"[API] 🤖 Lancement de l'analyse IA...")
+        fraud_score, is_suspicious, risk_factors = await run_in_threadpool(
+            fraud_detection_service.analyze_transaction,
+            transaction,
+            db,
+            publish_scoring_step if event_hub.active else None
+        )
+        transaction.fraud_score = fraud_score
+        transaction.is_suspicious = is_suspicious
+        event_hub.publish(
+            EventHub.SCORED,
+            fraud_score=int(fraud_score),
+            is_suspicious=bool(is_suspicious),
+            risk_level=transaction.risk_level,
+            **event_ref
+        )
+        
+        # Generate AI explanation (by risk priority when the queue runs)
+        logger.info(f"[API] 📝 Generation de l'explication LLM...")
+        if explanation_queue.is_running:
+            ai_explanation = await explanation_queue.explain(transaction, fraud_score, risk_factors, db)
+        else:
+            ai_explanation = await llm_explainer_service.explain_transaction(
+                transaction=transaction,
+                fraud_score=fraud_score,
+                risk_factors=risk_factors
+            )
+        event_hub.publish(EventHub.EXPLAINED, **event_ref)
+        
+        # Update transaction with results
+        transaction.ai_explanation = ai_explanation
+        transaction.analysis_date = datetime.utcnow()
+        transaction.status = TransactionStatus.ANALYZED.value
+        
+        # Log analysis in the same transaction
+        uow.audit(
+            user_id=current_user.id,
+            action="analyze_transaction",
+            resource_type="transaction",
+            resource_id=transaction.id,
+            details={
+                "fraud_score": int(fraud_score),
+                "is_suspicious": bool(is_suspicious)
+            },
+            ip_address=get_client_ip(request)
+        )
+        
+        uow.commit()
+    except Exception as e:
+        event_hub.publish(EventHub.FAILED, error=type(e).__name__, **event_ref)
+        raise
+    finally:
+        analysis_tracker.finish(transaction.id)
+    
+    event_hub.publish(
+        EventHub.COMPLETED,
+        fraud_score=int(fraud_score),
+        is_suspicious=bool(is_suspicious),
+        risk_level=transaction.risk_level,
+        analysis_date=transaction.analysis_date.isoformat(),
+        **event_ref
     )
+    logger.info(f"[API] ✅ Analyse terminee - Score: {fraud_score}/100 - Suspect: {is_suspicious}")
     
-    return TransactionAnalysisResponse(
+    return ModelJSONResponse(TransactionAnalysisResponse(
         transaction_id=transaction.id,
         transaction_ref=transaction.transaction_ref,
         fraud_score=fraud_score,
@@ -420,7 +788,7 @@ async def analyze_transaction(
         ai_explanation=ai_explanation,
         analysis_date=transaction.analysis_date,
         factors=risk_factors
-    )
+    ))
 
 
 @router.post("/{transaction_id}/review")
@@ -429,7 +797,7 @@ async def review_transaction(
     request: Request,
     review_data: TransactionReviewRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    uow: UnitOfWork = Depends(get_unit_of_work)
 ):
     """
     Review and mark a transaction as fraud or cleared
@@ -437,7 +805,7 @@ async def review_transaction(
     - **is_confirmed_fraud**: True if confirmed as fraud, False if cleared
     - **review_notes**: Optional notes from the reviewer
     """
-    transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
+    transaction = uow.db.query(Transaction).filter(Transaction.id == transaction_id).first()
     
     if not transaction:
         raise HTTPException(
@@ -456,18 +824,21 @@ async def review_transaction(
         else TransactionStatus.CLEARED.value
     )
     
-    db.commit()
-    
     # Log review
-    AuditLogger.log_transaction_review(
-        db=db,
+    uow.audit(
         user_id=current_user.id,
-        transaction_id=transaction.id,
-        is_confirmed_fraud=review_data.is_confirmed_fraud,
-        notes=review_data.review_notes,
+        action="review_transaction",
+        resource_type="transaction",
+        resource_id=transaction.id,
+        details={
+            "decision": transaction.status,
+            "notes": review_data.review_notes
+        },
         ip_address=get_client_ip(request)
     )
     
+    uow.commit()
+    
     return {
         "message": "Transaction revue avec succès",
         "status": transaction.status
@@ -483,7 +854,7 @@ async def block_transaction(
     transaction_id: UUID,
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    uow: UnitOfWork = Depends(get_unit_of_work)
 ):
     """
     BLOQUER une transaction suspecte
@@ -491,7 +862,7 @@ async def block_transaction(
     Bloque immediatement le virement et le marque comme fraude confirmee.
     Utilise en cas de fraude averee ou de risque critique.
     """
-    transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
+    transaction = uow.db.query(Transaction).filter(Transaction.id == transaction_id).first()
     
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction non trouvee")
@@ -506,11 +877,8 @@ async def block_transaction(
     transaction.reviewed_by = current_user.id
     transaction.reviewed_at = datetime.utcnow()
     
-    db.commit()
-    
     # Log l'action
-    AuditLogger.log_action(
-        db=db,
+    uow.audit(
         user_id=current_user.id,
         action="block_transaction",
         resource_type="transaction",
@@ -522,6 +890,8 @@ async def block_transaction(
         ip_address=get_client_ip(request)
     )
     
+    uow.commit()
+    
     return {
         "success": True,
         "message": f"Transaction {transaction.transaction_ref} BLOQUEE avec succes",
@@ -537,7 +907,7 @@ async def create_fraud_ticket(
     transaction_id: UUID,
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    uow: UnitOfWork = Depends(get_unit_of_work)
 ):
     """
     OUVRIR UN TICKET FRAUDE
@@ -545,7 +915,7 @@ async def create_fraud_ticket(
     Cree un ticket d'investigation pour l'equipe Conformite/Fraude.
     La transaction reste en attente pendant l'enquete.
     """
-    transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
+    transaction = uow.db.query(Transaction).filter(Transaction.id == transaction_id).first()
     
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction non trouvee")
@@ -560,11 +930,8 @@ async def create_fraud_ticket(
     transaction.ticket_created_by = current_user.id
     transaction.review_notes = f"Ticket {ticket_number} ouvert par {current_user.full_name} - Investigation en cours"
     
-    db.commit()
-    
     # Log l'action
-    AuditLogger.log_action(
-        db=db,
+    uow.audit(
         user_id=current_user.id,
         action="create_fraud_ticket",
         resource_type="transaction",
@@ -577,6 +944,8 @@ async def create_fraud_ticket(
         ip_address=get_client_ip(request)
     )
     
+    uow.commit()
+    
     return {
         "success": True,
         "message": f"Ticket fraude cree avec succes",
@@ -596,7 +965,7 @@ async def call_client(
     transaction_id: UUID,
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    uow: UnitOfWork = Depends(get_unit_of_work)
 ):
     """
     APPELER LE CLIENT
@@ -604,7 +973,7 @@ async def call_client(
     Enregistre une demande d'appel client pour verification.
     La transaction reste en attente de confirmation telephonique.
     """
-    transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
+    transaction = uow.db.query(Transaction).filter(Transaction.id == transaction_id).first()
     
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction non trouvee")
@@ -620,11 +989,8 @@ async def call_client(
     previous_notes = transaction.review_notes or ""
     transaction.review_notes = f"{previous_notes}\n[{datetime.now().strftime('%d/%m/%Y %H:%M')}] Appel client demande par {current_user.full_name} (ID: {call_id})"
     
-    db.commit()
-    
     # Log l'action
-    AuditLogger.log_action(
-        db=db,
+    uow.audit(
         user_id=current_user.id,
         action="request_client_call",
         resource_type="transaction",
@@ -637,6 +1003,8 @@ async def call_client(
         ip_address=get_client_ip(request)
     )
     
+    uow.commit()
+    
     return {
         "success": True,
         "message": f"Demande d'appel client enregistree",
@@ -657,7 +1025,7 @@ async def approve_transaction(
     transaction_id: UUID,
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    uow: UnitOfWork = Depends(get_unit_of_work)
 ):
     """
     LAISSER PASSER (Fausse alerte)
@@ -665,7 +1033,7 @@ async def approve_transaction(
     Approuve la transaction et la marque comme fausse alerte.
     Utilise quand l'analyse revele que la transaction est legitime.
     """
-    transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
+    transaction = uow.db.query(Transaction).filter(Transaction.id == transaction_id).first()
     
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction non trouvee")
@@ -681,11 +1049,8 @@ async def approve_transaction(
     previous_notes = transaction.review_notes or ""
     transaction.review_notes = f"{previous_notes}\n[{datetime.now().strftime('%d/%m/%Y %H:%M')}] APPROUVE par {current_user.full_name} - Fausse alerte confirmee"
     
-    db.commit()
-    
     # Log l'action
-    AuditLogger.log_action(
-        db=db,
+    uow.audit(
         user_id=current_user.id,
         action="approve_transaction",
         resource_type="transaction",
@@ -698,6 +1063,8 @@ async def approve_transaction(
         ip_address=get_client_ip(request)
     )
     
+    uow.commit()
+    
     return {
         "success": True,
         "message": f"Transaction {transaction.transaction_ref} APPROUVEE - Fausse alerte",
@@ -717,14 +1084,14 @@ async def record_call_result(
     confirmed_by_client: bool = True,
     notes: str = "",
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    uow: UnitOfWork = Depends(get_unit_of_work)
 ):
     """
     ENREGISTRER LE RESULTAT DE L'APPEL CLIENT
     
     Enregistre si le client a confirme ou infirme la transaction lors de l'appel.
     """
-    transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
+    transaction = uow.db.query(Transaction).filter(Transaction.id == transaction_id).first()
     
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction non trouvee")
@@ -753,11 +1120,8 @@ async def record_call_result(
     previous_notes = transaction.review_notes or ""
     transaction.review_notes = f"{previous_notes}\n[{datetime.now().strftime('%d/%m/%Y %H:%M')}] Resultat appel: {result_text}. Notes: {notes}"
     
-    db.commit()
-    
     # Log l'action
-    AuditLogger.log_action(
-        db=db,
+    uow.audit(
         user_id=current_user.id,
         action="record_call_result",
         resource_type="transaction",
@@ -770,6 +1134,8 @@ async def record_call_result(
         ip_address=get_client_ip(request)
     )
     
+    uow.commit()
+    
     return {
         "success": True,
         "message": f"Resultat de l'appel enregistre",
@@ -784,12 +1150,12 @@ async def delete_transaction(
     transaction_id: UUID,
     request: Request,
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    uow: UnitOfWork = Depends(get_unit_of_work)
 ):
     """
     Delete a transaction (Admin only)
     """
-    transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
+    transaction = uow.db.query(Transaction).filter(Transaction.id == transaction_id).first()
     
     if not transaction:
         raise HTTPException(
@@ -798,8 +1164,7 @@ async def delete_transaction(
         )
     
     # Log deletion
-    AuditLogger.log_action(
-        db=db,
+    uow.audit(
         user_id=current_user.id,
         action="delete_transaction",
         resource_type="transaction",
@@ -808,5 +1173,5 @@ async def delete_transaction(
         ip_address=get_client_ip(request)
     )
     
-    db.delete(transaction)
-    db.commit()
+    uow.delete(transaction)
+    uow.commit()
@@ -1,7 +1,7 @@
 """
 Pydantic schemas package
 """
-from app.schemas.auth import Token, TokenData, LoginRequest, LoginResponse
+from app.schemas.auth import Token, TokenData, LoginRequest, LoginResponse, StreamTokenResponse
 from app.schemas.user import UserBase, UserCreate, UserUpdate, UserResponse, UserInDB
 from app.schemas.transaction import (
     TransactionBase,
@@ -10,16 +10,22 @@ from app.schemas.transaction import (
     TransactionAnalysisRequest,
     TransactionAnalysisResponse,
     TransactionListResponse,
+    TransactionSummaryResponse,
+    TransactionSummaryListResponse,
+    BulkTransactionItem,
+    BulkTransactionResponse,
     TransactionStatsResponse,
     DailyStatsResponse,
     TransactionReviewRequest
 )
+from app.schemas.scoring import ScoreResponse
 
 __all__ = [
     "Token",
     "TokenData", 
     "LoginRequest",
     "LoginResponse",
+    "StreamTokenResponse",
     "UserBase",
     "UserCreate",
     "UserUpdate",
@@ -31,7 +37,12 @@ __all__ = [
     "TransactionAnalysisRequest",
     "TransactionAnalysisResponse",
     "TransactionListResponse",
+    "TransactionSummaryResponse",
+    "TransactionSummaryListResponse",
+    "BulkTransactionItem",
+    "BulkTransactionResponse",
     "TransactionStatsResponse",
     "DailyStatsResponse",
-    "TransactionReviewRequest"
+    "TransactionReviewRequest",
+    "ScoreResponse"
 ]
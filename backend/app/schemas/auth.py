@@ -11,6 +11,12 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 
+class StreamTokenResponse(BaseModel):
+    """Short-lived token of the event stream"""
+    token: str
+    expires_in: int  # Seconds
+
+
 class TokenData(BaseModel):
     """Data encoded in JWT token"""
     email: Optional[str] = None
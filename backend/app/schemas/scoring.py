@@ -0,0 +1,17 @@
+"""
+Pydantic schemas for real-time scoring
+"""
+from pydantic import BaseModel
+from typing import List
+
+
+class ScoreResponse(BaseModel):
+    """Pre-authorization score of a transaction that is not persisted"""
+    fraud_score: int
+    is_suspicious: bool
+    risk_level: str
+    factors: List[str]
+    ml_used: bool
+    degraded: bool
+    latency_ms: float
+    within_budget: bool
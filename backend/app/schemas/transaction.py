@@ -10,19 +10,19 @@ from decimal import Decimal
 
 class TransactionBase(BaseModel):
     """Base transaction schema"""
-    amount: Decimal = Field(..., gt=0, description="Transaction amount")
+    amount: Decimal = Field(..., gt=0, max_digits=15, decimal_places=2, description="Transaction amount")
     currency: str = Field(default="EUR", max_length=3)
     sender_account: str = Field(..., max_length=34)
     receiver_account: str = Field(..., max_length=34)
-    sender_name: Optional[str] = None
-    receiver_name: Optional[str] = None
-    transaction_type: str = Field(..., description="Type: virement, prelevement, carte, retrait, depot")
-    channel: str = Field(default="web", description="Channel: web, mobile, agence, atm, api")
+    sender_name: Optional[str] = Field(None, max_length=255)
+    receiver_name: Optional[str] = Field(None, max_length=255)
+    transaction_type: str = Field(..., max_length=50, description="Type: virement, prelevement, carte, retrait, depot")
+    channel: str = Field(default="web", max_length=50, description="Channel: web, mobile, agence, atm, api")
     country_origin: Optional[str] = Field(None, max_length=3)
     country_destination: Optional[str] = Field(None, max_length=3)
-    ip_address: Optional[str] = None
-    device_id: Optional[str] = None
-    merchant_category: Optional[str] = None
+    ip_address: Optional[str] = Field(None, max_length=45)
+    device_id: Optional[str] = Field(None, max_length=255)
+    merchant_category: Optional[str] = Field(None, max_length=100)
     description: Optional[str] = None
     transaction_date: datetime
 
@@ -86,6 +86,24 @@ class TransactionAnalysisResponse(BaseModel):
     factors: List[str]
 
 
+class BulkTransactionItem(BaseModel):
+    """Outcome of one ingested transaction, in request order"""
+    index: int
+    id: UUID
+    transaction_ref: str
+    fraud_score: Optional[int] = None
+    is_suspicious: Optional[bool] = None
+    risk_level: Optional[str] = None
+
+
+class BulkTransactionResponse(BaseModel):
+    """Response from bulk ingestion"""
+    created: int
+    scored: int
+    pending_scoring: int
+    items: List[BulkTransactionItem]
+
+
 class TransactionListResponse(BaseModel):
     """Paginated list of transactions"""
     items: List[TransactionResponse]
@@ -95,6 +113,34 @@ class TransactionListResponse(BaseModel):
     total_pages: int
 
 
+class TransactionSummaryResponse(BaseModel):
+    """Transaction row of the list views (GET /transactions?view=summary)"""
+    id: UUID
+    transaction_ref: str
+    amount: Decimal
+    currency: Optional[str] = None
+    sender_name: Optional[str] = None
+    receiver_name: Optional[str] = None
+    transaction_type: str
+    channel: Optional[str] = None
+    country_origin: Optional[str] = None
+    country_destination: Optional[str] = None
+    transaction_date: datetime
+    fraud_score: Optional[int] = None
+    is_suspicious: Optional[bool] = None
+    is_confirmed_fraud: Optional[bool] = None
+    status: Optional[str] = None
+
+
+class TransactionSummaryListResponse(BaseModel):
+    """Paginated list of transaction summaries"""
+    items: List[TransactionSummaryResponse]
+    total: int
+    page: int
+    page_size: int
+    total_pages: int
+
+
 class TransactionStatsResponse(BaseModel):
     """Dashboard statistics"""
     total_transactions: int
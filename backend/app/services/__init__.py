@@ -1,14 +1,41 @@
 """
 Services package
 """
-from app.services.auth_service import AuthService
+from app.services.analysis_tracker import AnalysisTracker, analysis_tracker
+from app.services.auth_service import AuthService, AsyncAuthService
+from app.services.columnar_export import ColumnarExporter, columnar_exporter
+from app.services.event_hub import EventHub, event_hub
+from app.services.explanation_queue import ExplanationQueue, explanation_queue
+from app.services.explanation_templates import FallbackExplanationEngine, fallback_explanation_engine
 from app.services.fraud_detection import FraudDetectionService, fraud_detection_service
 from app.services.llm_explainer import LLMExplainerService, llm_explainer_service
+from app.services.realtime_scorer import RealtimeScorer, realtime_scorer
+from app.services.report_export import ReportExporter, report_exporter
+from app.services.rescoring import RescoringJob, rescoring_job
+from app.services.transaction_filters import apply_transaction_filters
 
 __all__ = [
+    "AnalysisTracker",
+    "analysis_tracker",
     "AuthService",
+    "AsyncAuthService",
+    "ColumnarExporter",
+    "columnar_exporter",
+    "EventHub",
+    "event_hub",
+    "ExplanationQueue",
+    "explanation_queue",
+    "FallbackExplanationEngine",
+    "fallback_explanation_engine",
     "FraudDetectionService",
     "fraud_detection_service",
     "LLMExplainerService",
-    "llm_explainer_service"
+    "llm_explainer_service",
+    "RealtimeScorer",
+    "realtime_scorer",
+    "ReportExporter",
+    "report_exporter",
+    "RescoringJob",
+    "rescoring_job",
+    "apply_transaction_filters"
 ]
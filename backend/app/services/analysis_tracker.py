@@ -0,0 +1,64 @@
+"""
+In-process tracking of transactions being analyzed
+Publie le statut 'analyzing' sans ecriture en base
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from app.services.event_hub import EventHub
+
+
+class AnalysisTracker:
+    """
+    Registre des analyses en cours
+    
+    The 'analyzing' state only lives for the duration of an analysis
+    request, so it is kept in memory instead of being committed to the
+    transactions table. Entries older than the TTL are considered abandoned.
+    
+    Each worker only starts its own analyses; with several workers, the
+    ones of the others come from the event bridge (apply_event). Analyses
+    started before this worker (re)started are not listed by it.
+    """
+    
+    def __init__(self, ttl_seconds: int = 300):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self._in_progress: Dict[UUID, datetime] = {}
+        self._lock = threading.Lock()
+    
+    def start(self, transaction_id: UUID, started_at: Optional[datetime] = None) -> datetime:
+        """Mark a transaction as being analyzed and return the start time"""
+        started_at = started_at or datetime.utcnow()
+        with self._lock:
+            self._in_progress[transaction_id] = started_at
+        return started_at
+    
+    def finish(self, transaction_id: UUID) -> None:
+        """Remove a transaction from the in-progress registry"""
+        with self._lock:
+            self._in_progress.pop(transaction_id, None)
+    
+    def apply_event(self, event: Dict[str, Any]) -> None:
+        """Follow an analysis lifecycle event relayed from another worker"""
+        if not event.get("transaction_id"):
+            return
+        transaction_id = UUID(event["transaction_id"])
+        if event.get("type") == EventHub.ANALYSIS_STARTED:
+            started_at = event.get("started_at")
+            self.start(transaction_id, datetime.fromisoformat(started_at) if started_at else None)
+        elif event.get("type") in (EventHub.COMPLETED, EventHub.FAILED):
+            self.finish(transaction_id)
+    
+    def in_progress(self) -> Dict[UUID, datetime]:
+        """Get in-progress transaction ids with their start time"""
+        cutoff = datetime.utcnow() - self.ttl
+        with self._lock:
+            for transaction_id in [t for t, started in self._in_progress.items() if started < cutoff]:
+                del self._in_progress[transaction_id]
+            return dict(self._in_progress)
+
+
+# Instance singleton
+analysis_tracker = AnalysisTracker()
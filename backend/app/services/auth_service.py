@@ -1,13 +1,15 @@
 """
 Authentication service for user login and token management
 """
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import timedelta
 
 from app.models.user import User
 from app.schemas.auth import LoginResponse
-from app.utils.security import verify_password, create_access_token
+from app.utils.security import verify_password, create_access_token, password_hasher
 from app.config import settings
 
 
@@ -78,3 +80,50 @@ class AuthService:
     def get_user_by_id(self, user_id: str) -> Optional[User]:
         """Get user by ID"""
         return self.db.query(User).filter(User.id == user_id).first()
+
+
+class AsyncAuthService:
+    """Async counterpart of AuthService for queries served from the event loop"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def authenticate_user(self, email: str, password: str) -> Optional[User]:
+        """
+        Authenticate a user with email and password
+        
+        Args:
+            email: User's email address
+            password: Plain text password
+            
+        Returns:
+            User object if authentication successful, None otherwise
+        """
+        user = await self.get_user_by_email(email)
+        
+        if not user:
+            return None
+        
+        is_valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+        if not is_valid:
+            return None
+        
+        if not user.is_active:
+            return None
+        
+        if new_hash:
+            user.hashed_password = new_hash
+            await self.db.commit()
+        
+        return user
+    
+    # Token issuance does not touch the session
+    create_user_token = AuthService.create_user_token
+    
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        """Get user by email address"""
+        return await self.db.scalar(select(User).where(User.email == email))
+    
+    async def get_user_by_id(self, user_id: str) -> Optional[User]:
+        """Get user by ID"""
+        return await self.db.scalar(select(User).where(User.id == user_id))
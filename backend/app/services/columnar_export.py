@@ -0,0 +1,239 @@
+"""
+Columnar export of transactions (Parquet, Arrow IPC) for offline analytics
+Rows are read through a server-side cursor by chunks and written one record
+batch at a time, the file is streamed without being built in memory
+"""
+from typing import Callable, Iterator, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import Boolean, DateTime, Integer, Numeric, Uuid, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.config import settings
+from app.models.transaction import Transaction
+from app.services.fraud_detection import (
+    FEATURE_NAMES,
+    FEATURE_SOURCE_COLUMNS,
+    FraudDetectionService,
+    fraud_detection_service,
+)
+
+
+# Format -> (media type, file extension)
+COLUMNAR_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+}
+
+DEFAULT_EXPORT_COLUMNS = [
+    "id", "transaction_ref", "amount", "currency", "transaction_type", "channel",
+    "country_origin", "country_destination", "merchant_category", "transaction_date",
+    "fraud_score", "is_suspicious", "is_confirmed_fraud", "is_false_positive", "status",
+]
+
+# Features are exported next to the columns, prefixed to avoid clashes (amount)
+FEATURE_PREFIX = "feature_"
+
+
+def load_pyarrow():
+    """
+    Import pyarrow (optional dependency)
+
+    Raises:
+        RuntimeError: pyarrow is not installed
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Le paquet 'pyarrow' est requis pour l'export Parquet/Arrow (pip install pyarrow)")
+    return pyarrow
+
+
+def resolve_columns(
+    columns: Optional[Sequence[str]],
+    default: Sequence[str] = DEFAULT_EXPORT_COLUMNS,
+    extra: Sequence[str] = ()
+) -> List[str]:
+    """
+    Validate the requested column names, default ones when none are given
+
+    Args:
+        extra: Computed columns accepted besides the table ones
+
+    Raises:
+        ValueError: Unknown column names
+    """
+    if not columns:
+        return list(default)
+    unknown = [name for name in columns if name not in Transaction.__table__.c and name not in extra]
+    if unknown:
+        raise ValueError(f"Colonnes inconnues: {', '.join(unknown)}")
+    return list(dict.fromkeys(columns))
+
+
+def _arrow_type(pa, column):
+    """Arrow type and value converter of a transactions column"""
+    if isinstance(column.type, Boolean):
+        return pa.bool_(), None
+    if isinstance(column.type, Integer):
+        return pa.int32(), None
+    if isinstance(column.type, Numeric):
+        return pa.float64(), float
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us", tz="UTC"), None
+    if isinstance(column.type, Uuid):
+        return pa.string(), str
+    return pa.string(), None
+
+
+class _ChunkSink:
+    """Write-only file object emptied after each record batch"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ColumnarExporter:
+    """
+    Transactions and their engineered features as Arrow record batches
+
+    The features are the IsolationForest inputs computed by
+    FraudDetectionService._prepare_features, so offline analyses see the
+    exact vectors the model scores.
+    """
+
+    def __init__(self, service: FraudDetectionService, chunk_size: int = 10000):
+        self.service = service
+        self.chunk_size = chunk_size
+
+    def build_query(self, columns: List[str], include_features: bool = True) -> Select:
+        """Select of the exported columns and the feature inputs, stable order"""
+        table = Transaction.__table__
+        names = list(columns)
+        if include_features:
+            names += [name for name in FEATURE_SOURCE_COLUMNS if name not in names]
+        return select(*[table.c[name] for name in names]).order_by(table.c.transaction_date, table.c.id)
+
+    def schema(self, columns: List[str], include_features: bool = True):
+        pa = load_pyarrow()
+        fields = [pa.field(name, _arrow_type(pa, Transaction.__table__.c[name])[0]) for name in columns]
+        if include_features:
+            fields += [pa.field(FEATURE_PREFIX + name, pa.float64()) for name in FEATURE_NAMES]
+        return pa.schema(fields)
+
+    def iter_batches(
+        self,
+        session_factory: Callable[[], Session],
+        stmt: Select,
+        columns: List[str],
+        include_features: bool = True
+    ) -> Iterator:
+        """
+        Record batches of chunk_size rows read with a server-side cursor
+
+        Args:
+            stmt: build_query() result, filters applied
+        """
+        pa = load_pyarrow()
+        schema = self.schema(columns, include_features)
+        converters = [_arrow_type(pa, Transaction.__table__.c[name])[1] for name in columns]
+        db = session_factory()
+        try:
+            result = db.execute(stmt.execution_options(yield_per=self.chunk_size))
+            for rows in result.partitions():
+                values = list(zip(*rows))
+                arrays = [
+                    pa.array(
+                        values[i] if convert is None else [None if v is None else convert(v) for v in values[i]],
+                        type=field.type
+                    )
+                    for i, (convert, field) in enumerate(zip(converters, schema))
+                ]
+                if include_features:
+                    features = np.vstack([self.service._prepare_features(row) for row in rows]).astype(np.float64)
+                    arrays += [pa.array(features[:, j]) for j in range(len(FEATURE_NAMES))]
+                yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+        finally:
+            db.close()
+
+    def _open_writer(self, pa, sink, schema, fmt: str):
+        if fmt == "parquet":
+            return pa.parquet.ParquetWriter(sink, schema, compression="snappy")
+        return pa.ipc.new_file(sink, schema)
+
+    def stream(
+        self,
+        session_factory: Callable[[], Session],
+        stmt: Select,
+        columns: List[str],
+        fmt: str = "parquet",
+        include_features: bool = True
+    ) -> Iterator[bytes]:
+        """File content by pieces, one per record batch (StreamingResponse body)"""
+        pa = load_pyarrow()
+        sink = _ChunkSink()
+        writer = self._open_writer(pa, pa.PythonFile(sink, mode="w"), self.schema(columns, include_features), fmt)
+        try:
+            for batch in self.iter_batches(session_factory, stmt, columns, include_features):
+                writer.write_batch(batch)
+                data = sink.drain()
+                if data:
+                    yield data
+        except BaseException:
+            writer.close()
+            raise
+        writer.close()
+        yield sink.drain()
+
+    def write(
+        self,
+        session_factory: Callable[[], Session],
+        stmt: Select,
+        columns: List[str],
+        path: str,
+        fmt: str = "parquet",
+        include_features: bool = True
+    ) -> int:
+        """
+        Write the export to a file
+
+        Returns:
+            Number of exported rows
+        """
+        pa = load_pyarrow()
+        rows = 0
+        with pa.OSFile(path, "wb") as sink:
+            with self._open_writer(pa, sink, self.schema(columns, include_features), fmt) as writer:
+                for batch in self.iter_batches(session_factory, stmt, columns, include_features):
+                    writer.write_batch(batch)
+                    rows += batch.num_rows
+        return rows
+
+
+# Instance singleton
+columnar_exporter = ColumnarExporter(fraud_detection_service, chunk_size=settings.export_chunk_size)
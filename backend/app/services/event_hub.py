@@ -0,0 +1,243 @@
+"""
+In-process publish/subscribe hub for analysis lifecycle events
+Alimente le flux temps reel des analyses (SSE) sans interroger la base
+"""
+import asyncio
+import json
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from loguru import logger
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+
+
+class Subscription:
+    """
+    Bounded event queue of a single subscriber
+
+    The queue belongs to the event loop of the subscriber; events published
+    from other threads are handed over with call_soon_threadsafe.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_size: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.dropped = 0
+
+    def put(self, event: Dict[str, Any]) -> None:
+        """Enqueue an event, dropping the oldest one for slow consumers (loop thread only)"""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait for the next event, None if the timeout expires"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventHub:
+    """
+    Diffusion des evenements d'analyse vers les abonnes
+
+    Publishing is a no-op while nobody listens, and never blocks the
+    publisher: each subscriber has its own bounded queue.
+    """
+
+    ANALYSIS_STARTED = "analysis.started"
+    STEP_COMPLETED = "analysis.step_completed"
+    SCORED = "analysis.scored"
+    EXPLAINED = "analysis.explained"
+    COMPLETED = "analysis.completed"
+    FAILED = "analysis.failed"
+
+    def __init__(self, max_queue_size: int = 256):
+        self.max_queue_size = max_queue_size
+        self.origin = uuid.uuid4().hex  # Identifies this worker on the bridge
+        self._subscribers: Set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._bridge: Optional["PostgresEventBridge"] = None
+        # Called with the events received from the other workers
+        self._remote_handlers: List[Callable[[Dict[str, Any]], None]] = []
+        self.published = 0
+        self.dropped = 0
+
+    @property
+    def active(self) -> bool:
+        """True if a published event would reach someone"""
+        return bool(self._subscribers) or self._bridge is not None
+
+    def subscribe(self) -> Subscription:
+        """Register a subscriber on the running event loop"""
+        subscription = Subscription(asyncio.get_running_loop(), self.max_queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscriber"""
+        with self._lock:
+            self._subscribers.discard(subscription)
+        self.dropped += subscription.dropped
+
+    def publish(self, event_type: str, **data: Any) -> None:
+        """
+        Publish an event to local subscribers and to the other workers
+
+        Safe to call from the event loop or from worker threads.
+        """
+        if not self.active:
+            return
+
+        event = {"type": event_type, "timestamp": datetime.utcnow().isoformat(), **data}
+        self.published += 1
+        self.deliver(event)
+
+        if self._bridge is not None:
+            self._bridge.forward(event)
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        """Hand an event over to every local subscriber"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+
+        for subscription in subscribers:
+            if subscription.loop is current_loop:
+                subscription.put(event)
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # Loop closed without unsubscribing
+                self.unsubscribe(subscription)
+
+    def add_remote_handler(self, handler: Callable[[Dict[str, Any]], None]) -> None:
+        """Register a callback for the events relayed from the other workers"""
+        self._remote_handlers.append(handler)
+
+    def handle_remote(self, event: Dict[str, Any]) -> None:
+        """Run the remote handlers, then deliver to the local subscribers"""
+        for handler in list(self._remote_handlers):
+            try:
+                handler(event)
+            except Exception as e:
+                logger.warning(f"Remote event handler failed on {event.get('type')}: {e}")
+        self.deliver(event)
+
+    async def start_bridge(self, database_url: str, channel: str) -> None:
+        """Relay events between workers through Postgres LISTEN/NOTIFY"""
+        bridge = PostgresEventBridge(self, database_url, channel)
+        await bridge.start()
+        self._bridge = bridge
+
+    async def stop_bridge(self) -> None:
+        """Stop relaying events between workers"""
+        bridge, self._bridge = self._bridge, None
+        if bridge is not None:
+            await bridge.stop()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get hub status"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "subscribers": len(subscribers),
+            "published": self.published,
+            "dropped": self.dropped + sum(s.dropped for s in subscribers),
+            "bridge": self._bridge.channel if self._bridge else None
+        }
+
+
+class PostgresEventBridge:
+    """
+    Relais LISTEN/NOTIFY entre workers
+
+    Every worker listens on the channel and re-delivers notifications to its
+    own subscribers, skipping the ones it emitted itself.
+    """
+
+    # NOTIFY payloads are limited to 8000 bytes
+    MAX_PAYLOAD_SIZE = 7900
+
+    def __init__(self, hub: EventHub, database_url: str, channel: str):
+        self.hub = hub
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.channel = channel
+        self._connection = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._send_lock: Optional[asyncio.Lock] = None
+
+    async def start(self) -> None:
+        """Open the listening connection"""
+        import asyncpg
+
+        self._loop = asyncio.get_running_loop()
+        self._send_lock = asyncio.Lock()
+        self._connection = await asyncpg.connect(self.dsn)
+        await self._connection.add_listener(self.channel, self._on_notify)
+        logger.info(f"📡 Event bridge listening on '{self.channel}'")
+
+    async def stop(self) -> None:
+        """Close the listening connection"""
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    def forward(self, event: Dict[str, Any]) -> None:
+        """Schedule a NOTIFY for an event published on this worker"""
+        if self._connection is None or self._loop is None:
+            return
+
+        payload = json.dumps({**event, "origin": self.hub.origin}, default=str)
+        if len(payload.encode()) > self.MAX_PAYLOAD_SIZE:
+            logger.warning(f"Event {event['type']} too large for NOTIFY, not relayed")
+            return
+
+        asyncio.run_coroutine_threadsafe(self._notify(payload), self._loop)
+
+    async def _notify(self, payload: str) -> None:
+        """Send a notification on the shared connection"""
+        try:
+            async with self._send_lock:
+                await self._connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+        except Exception as e:
+            logger.warning(f"Event bridge NOTIFY failed: {e}")
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        """Deliver events emitted by the other workers"""
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+        if event.pop("origin", None) == self.hub.origin:
+            return
+        self.hub.handle_remote(event)
+
+
+def format_sse(event: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """Serialize an event as a Server-Sent Events message"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+# Instance singleton
+event_hub = EventHub(max_queue_size=settings.event_queue_size)
@@ -0,0 +1,531 @@
+"""
+Priority queue for LLM explanations
+Ollama capacity is fixed: critical alerts are explained first, low-risk
+transactions get the rule-based explanation at once and an LLM upgrade
+when the queue is idle
+"""
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from loguru import logger
+from sqlalchemy import bindparam, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.metrics import EXPLANATION_QUEUE_WAIT
+from app.models.explanation_job import ExplanationJob, ExplanationJobStatus
+from app.models.transaction import Transaction
+from app.services.explanation_templates import fallback_explanation_engine
+from app.services.llm_explainer import llm_explainer_service
+from app.utils.dates import as_utc
+
+
+class QueueEntry:
+    """One explanation waiting for a generation slot"""
+
+    __slots__ = ("fraud_score", "risk_factors", "enqueued_at", "job_id", "transaction", "future")
+
+    def __init__(
+        self,
+        fraud_score: int,
+        risk_factors: List[str],
+        enqueued_at: float,
+        job_id: Optional[UUID] = None,
+        transaction: Optional[Transaction] = None,
+        future: Optional[asyncio.Future] = None
+    ):
+        self.fraud_score = fraud_score
+        self.risk_factors = risk_factors
+        self.enqueued_at = enqueued_at
+        self.job_id = job_id  # Durable job, generated in the background
+        self.transaction = transaction  # Awaited by an analyst request
+        self.future = future
+
+
+class ExplanationQueue:
+    """
+    In-process priority queue backed by the explanation_jobs table
+
+    The effective priority of an entry is its fraud score, minus a penalty
+    for low-risk upgrades, plus aging_per_minute for each minute spent
+    waiting. Since every entry ages at the same rate the heap order never
+    changes: an old entry simply overtakes the fresher ones once its wait
+    makes up the score difference, so nothing starves.
+
+    Analyst requests await their entry in memory. Background jobs are
+    persisted first and reloaded periodically, which also picks up the
+    jobs written by other processes (scripts/rescore.py) and recovers the
+    jobs of a crashed worker. A job is claimed with a conditional UPDATE,
+    so several API workers never generate the same explanation twice.
+    Consecutive background jobs of a risk level are explained together,
+    batch_size per LLM call. A failed job is queued again after an
+    exponential backoff, and marked failed after max_attempts.
+    """
+
+    RELOAD_LIMIT = 1000  # Jobs loaded per reload, highest scores and oldest
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        explainer,
+        concurrency: int = 1,
+        batch_size: int = 1,
+        llm_min_score: int = 50,
+        low_risk_penalty: int = 100,
+        aging_per_minute: float = 10.0,
+        wait_timeout: float = 120.0,
+        poll_interval: float = 5.0,
+        stale_after: float = 600.0,
+        max_attempts: int = 3,
+        retry_backoff: float = 30.0,
+        clock: Callable[[], float] = time.time
+    ):
+        self.session_factory = session_factory
+        self.explainer = explainer
+        self.concurrency = concurrency
+        self.batch_size = batch_size  # Background jobs per explain_batch call
+        self.llm_min_score = llm_min_score
+        self.low_risk_penalty = low_risk_penalty
+        self.aging_per_minute = aging_per_minute
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff  # Seconds, doubled after each failure
+        self.clock = clock
+        self._heap: List[Tuple[float, int, QueueEntry]] = []
+        self._queued_jobs = set()  # Durable job ids present in the heap
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self.stats = {
+            "explained": 0, "upgraded": 0, "deferred": 0, "postponed": 0, "skipped": 0, "retried": 0, "failed": 0
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._tasks)
+
+    def is_low_risk(self, fraud_score: int) -> bool:
+        return fraud_score < self.llm_min_score
+
+    def priority(self, fraud_score: int, enqueued_at: float) -> float:
+        """Priority at time t is this value plus aging_per_minute * t / 60"""
+        base = fraud_score - (self.low_risk_penalty if self.is_low_risk(fraud_score) else 0)
+        return base - self.aging_per_minute * enqueued_at / 60.0
+
+    def build_job(self, transaction_id: UUID, fraud_score: int, risk_factors: List[str]) -> ExplanationJob:
+        """Durable job row, added to the caller's session"""
+        return ExplanationJob(
+            id=uuid4(),
+            transaction_id=transaction_id,
+            fraud_score=int(fraud_score),
+            risk_factors=list(risk_factors or []),
+            status=ExplanationJobStatus.QUEUED.value,
+            attempts=0,
+            created_at=datetime.now(timezone.utc)
+        )
+
+    def fallback(self, transaction: Transaction, fraud_score: int, risk_factors: List[str]) -> str:
+        """Instant rule-based explanation"""
+        return self.explainer._generate_fallback_explanation(
+            transaction, fraud_score, self.explainer._get_risk_level(fraud_score), risk_factors
+        )
+
+    async def explain(
+        self,
+        transaction: Transaction,
+        fraud_score: int,
+        risk_factors: List[str],
+        db: Session
+    ) -> str:
+        """
+        Explanation for an analysis in progress
+
+        Alerts wait for their turn and get the LLM explanation. Low-risk
+        transactions, alerts arriving while the Ollama circuit is open and
+        alerts still waiting after wait_timeout get the rule-based
+        explanation now and a durable upgrade job, committed with the
+        caller's session.
+        """
+        if not self.is_low_risk(fraud_score) and self.explainer.llm_available:
+            future = asyncio.get_running_loop().create_future()
+            self._push(QueueEntry(fraud_score, risk_factors, self.clock(), transaction=transaction, future=future))
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), self.wait_timeout)
+            except asyncio.TimeoutError:
+                future.cancel()
+                self.stats["deferred"] += 1
+                logger.warning(f"[EXPLAIN] File d'attente saturee - explication differee pour {transaction.transaction_ref}")
+
+        db.add(self.build_job(transaction.id, fraud_score, risk_factors))
+        return self.fallback(transaction, fraud_score, risk_factors)
+
+    def enqueue_scored(
+        self,
+        scored: List[Tuple[Transaction, Tuple[int, bool, List[str]]]],
+        db: Optional[Session] = None
+    ) -> int:
+        """
+        Queue the explanations of transactions scored in the background
+
+        Each transaction without an explanation gets the rule-based one at
+        once, the LLM version replaces it when its turn comes. Safe to call
+        from any thread or process. With the caller's session nothing is
+        committed here, the jobs are picked up by the next reload.
+        """
+        if not scored:
+            return 0
+        jobs = [self.build_job(t.id, fraud_score, factors) for t, (fraud_score, _, factors) in scored]
+        # Read before the commit expires the rows
+        entries = [(job.fraud_score, job.risk_factors, job.id) for job in jobs]
+        fallbacks = fallback_explanation_engine.explain_many(
+            [t for t, _ in scored],
+            [job.fraud_score for job in jobs],
+            [job.risk_factors for job in jobs]
+        )
+        session = db or self.session_factory()
+        try:
+            session.execute(
+                update(Transaction.__table__)
+                .where(Transaction.__table__.c.id == bindparam("row_id"))
+                .where(Transaction.__table__.c.ai_explanation.is_(None))
+                .values(ai_explanation=bindparam("ai_explanation")),
+                [
+                    {"row_id": t.id, "ai_explanation": explanation}
+                    for (t, _), explanation in zip(scored, fallbacks)
+                ]
+            )
+            session.add_all(jobs)
+            if db is not None:
+                return len(jobs)
+            session.commit()
+        except Exception:
+            if db is None:
+                session.rollback()
+            raise
+        finally:
+            if db is None:
+                session.close()
+
+        if self.is_running:
+            now = self.clock()
+            for fraud_score, risk_factors, job_id in entries:
+                self._push(QueueEntry(fraud_score, risk_factors, now, job_id=job_id))
+        return len(jobs)
+
+    def reload(self) -> int:
+        """Load queued jobs missing from the heap, requeue stale ones"""
+        db = self.session_factory()
+        try:
+            now = datetime.now(timezone.utc)
+            stale = now - timedelta(seconds=self.stale_after)
+            db.execute(
+                update(ExplanationJob)
+                .where(ExplanationJob.status == ExplanationJobStatus.PROCESSING.value)
+                .where(ExplanationJob.started_at < stale)
+                .values(status=ExplanationJobStatus.QUEUED.value)
+            )
+            queued = select(
+                ExplanationJob.id, ExplanationJob.fraud_score, ExplanationJob.risk_factors, ExplanationJob.created_at
+            ).where(ExplanationJob.status == ExplanationJobStatus.QUEUED.value).where(
+                or_(ExplanationJob.next_attempt_at.is_(None), ExplanationJob.next_attempt_at <= now)
+            )
+            rows = {}
+            for order in (ExplanationJob.fraud_score.desc(), ExplanationJob.created_at):
+                for row in db.execute(queued.order_by(order).limit(self.RELOAD_LIMIT)):
+                    rows[row.id] = row
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        loaded = 0
+        for row in rows.values():
+            if row.id in self._queued_jobs:
+                continue
+            self._push(QueueEntry(row.fraud_score, row.risk_factors or [], as_utc(row.created_at).timestamp(), job_id=row.id))
+            loaded += 1
+        return loaded
+
+    async def start(self) -> None:
+        """Start the generation workers and the periodic reload"""
+        if self.is_running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._reload_loop()))
+        logger.info(f"[EXPLAIN] File d'explications demarree ({self.concurrency} generation(s) en parallele)")
+
+    async def stop(self) -> None:
+        """Stop the workers, waiting analyst requests get the rule-based explanation"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        with self._lock:
+            entries = [entry for _, _, entry in self._heap]
+            self._heap.clear()
+            self._queued_jobs.clear()
+        for entry in entries:
+            if entry.future is not None and not entry.future.done():
+                entry.future.set_result(self.fallback(entry.transaction, entry.fraud_score, entry.risk_factors))
+        self._loop = self._wakeup = None
+
+    def _push(self, entry: QueueEntry, wake: bool = True) -> None:
+        with self._lock:
+            if entry.job_id is not None:
+                self._queued_jobs.add(entry.job_id)
+            heapq.heappush(self._heap, (-self.priority(entry.fraud_score, entry.enqueued_at), next(self._counter), entry))
+        if wake and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _pop(self) -> Optional[QueueEntry]:
+        with self._lock:
+            if not self._heap:
+                return None
+            entry = heapq.heappop(self._heap)[2]
+            self._queued_jobs.discard(entry.job_id)
+            return entry
+
+    async def _next(self) -> QueueEntry:
+        while True:
+            # Cleared before looking so that a concurrent push is never missed
+            self._wakeup.clear()
+            entry = self._pop()
+            if entry is not None:
+                return entry
+            await self._wakeup.wait()
+
+    def _pop_batch_mates(self, entry: QueueEntry) -> List[QueueEntry]:
+        """Next background jobs of the same risk level, explained with one prompt"""
+        risk_level = self.explainer._get_risk_level(entry.fraud_score)
+        mates = []
+        with self._lock:
+            while len(mates) + 1 < self.batch_size and self._heap:
+                top = self._heap[0][2]
+                if top.job_id is None or self.explainer._get_risk_level(top.fraud_score) != risk_level:
+                    break
+                heapq.heappop(self._heap)
+                self._queued_jobs.discard(top.job_id)
+                mates.append(top)
+        return mates
+
+    async def _worker(self) -> None:
+        while True:
+            entry = await self._next()
+            entries = [entry] if entry.job_id is None else [entry] + self._pop_batch_mates(entry)
+            try:
+                await self._process(entries)
+            except Exception as e:
+                # Background jobs are retried by _process, or still queued if the claim failed
+                logger.error(f"[EXPLAIN] Echec de generation: {e}")
+                if entry.future is not None:
+                    self.stats["failed"] += 1
+                    if not entry.future.done():
+                        entry.future.set_result(self.fallback(entry.transaction, entry.fraud_score, entry.risk_factors))
+
+    async def _process(self, entries: List[QueueEntry]) -> None:
+        entry = entries[0]
+
+        if entry.future is not None:
+            # The analyst request gave up (timeout) and already has a fallback
+            if entry.future.done():
+                return
+            EXPLANATION_QUEUE_WAIT.labels(tier=self._tier(entry)).observe(self.clock() - entry.enqueued_at)
+            explanation = await self.explainer.explain_transaction(
+                transaction=entry.transaction,
+                fraud_score=entry.fraud_score,
+                risk_factors=entry.risk_factors
+            )
+            if not entry.future.done():
+                entry.future.set_result(explanation)
+            self.stats["explained"] += 1
+            return
+
+        if not self.explainer.llm_available:
+            # Ollama circuit open: keep the jobs for later instead of writing the fallback again,
+            # without waking the workers, and sleep until the recovery probe is due
+            for queued in entries:
+                self._push(queued, wake=False)
+            self.stats["postponed"] += len(entries)
+            self._wakeup.clear()
+            try:
+                # Cut short by new entries
+                await asyncio.wait_for(self._wakeup.wait(), self.explainer.llm_retry_in)
+            except asyncio.TimeoutError:
+                pass
+            return
+
+        claimed = await asyncio.to_thread(self._claim_jobs, [e.job_id for e in entries])
+        # Taken by another worker, or transaction deleted
+        self.stats["skipped"] += len(entries) - len(claimed)
+        entries = [e for e in entries if e.job_id in claimed]
+        if not entries:
+            return
+
+        for queued in entries:
+            EXPLANATION_QUEUE_WAIT.labels(tier=self._tier(queued)).observe(self.clock() - queued.enqueued_at)
+        items = [(claimed[e.job_id], e.fraud_score, e.risk_factors) for e in entries]
+        try:
+            if len(items) == 1:
+                explanations = [await self.explainer.explain_transaction(*items[0])]
+            else:
+                explanations = await self.explainer.explain_batch(items)
+            # Text the job is allowed to replace, anything else was written since
+            fallbacks = fallback_explanation_engine.explain_many(*zip(*items))
+
+            await asyncio.to_thread(self._finish_jobs, [
+                (queued.job_id, claimed[queued.job_id].id, explanation, fallback)
+                for queued, explanation, fallback in zip(entries, explanations, fallbacks)
+            ])
+        except Exception as e:
+            # If this fails too the jobs stay processing until stale_after
+            await asyncio.to_thread(self._retry_jobs, [queued.job_id for queued in entries], str(e))
+            raise
+        for queued in entries:
+            self.stats["upgraded" if self._tier(queued) == "upgrade" else "explained"] += 1
+
+    def _tier(self, entry: QueueEntry) -> str:
+        return "upgrade" if self.is_low_risk(entry.fraud_score) else "urgent"
+
+    def _claim_jobs(self, job_ids: List[UUID]) -> Dict[UUID, Transaction]:
+        """Claim queued jobs, returns the transaction of each job obtained"""
+        db = self.session_factory()
+        try:
+            claimed = {}
+            now = datetime.now(timezone.utc)
+            for job_id in job_ids:
+                updated = db.execute(
+                    update(ExplanationJob)
+                    .where(ExplanationJob.id == job_id)
+                    .where(ExplanationJob.status == ExplanationJobStatus.QUEUED.value)
+                    # An entry still in memory never skips a retry backoff
+                    .where(or_(ExplanationJob.next_attempt_at.is_(None), ExplanationJob.next_attempt_at <= now))
+                    .values(
+                        status=ExplanationJobStatus.PROCESSING.value,
+                        started_at=now,
+                        attempts=ExplanationJob.attempts + 1
+                    )
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                if updated == 1:
+                    job = db.get(ExplanationJob, job_id)
+                    transaction = db.get(Transaction, job.transaction_id)
+                    if transaction is not None:
+                        claimed[job_id] = transaction
+            # Detached before the commit so that they stay readable
+            db.expunge_all()
+            db.commit()
+            return claimed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _finish_jobs(self, jobs: List[Tuple[UUID, UUID, str, str]]) -> None:
+        """
+        Store the explanations and close the jobs, (job_id, transaction_id, explanation, fallback) each
+
+        An explanation only replaces an empty cell or the rule-based text of
+        the job: a transaction analysed again meanwhile keeps its newer one.
+        """
+        db = self.session_factory()
+        try:
+            column = Transaction.__table__.c.ai_explanation
+            db.execute(
+                update(Transaction.__table__)
+                .where(Transaction.__table__.c.id == bindparam("row_id"))
+                .where(or_(column.is_(None), column == bindparam("fallback")))
+                .values(ai_explanation=bindparam("ai_explanation")),
+                [
+                    {"row_id": transaction_id, "ai_explanation": explanation, "fallback": fallback}
+                    for _, transaction_id, explanation, fallback in jobs
+                ]
+            )
+            db.execute(
+                update(ExplanationJob.__table__)
+                .where(ExplanationJob.__table__.c.id == bindparam("job_id"))
+                .values(status=ExplanationJobStatus.DONE.value, completed_at=datetime.now(timezone.utc)),
+                [{"job_id": job_id} for job_id, _, _, _ in jobs]
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _retry_jobs(self, job_ids: List[UUID], error: str) -> None:
+        """Queue failed jobs again after a backoff, or mark them failed after max_attempts"""
+        db = self.session_factory()
+        try:
+            now = datetime.now(timezone.utc)
+            for job in db.scalars(select(ExplanationJob).where(ExplanationJob.id.in_(job_ids))):
+                job.last_error = error
+                if job.attempts >= self.max_attempts:
+                    job.status = ExplanationJobStatus.FAILED.value
+                    job.completed_at = now
+                    self.stats["failed"] += 1
+                else:
+                    job.status = ExplanationJobStatus.QUEUED.value
+                    job.next_attempt_at = now + timedelta(seconds=self.retry_backoff * 2 ** max(job.attempts - 1, 0))
+                    self.stats["retried"] += 1
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _reload_loop(self) -> None:
+        while True:
+            try:
+                loaded = await asyncio.to_thread(self.reload)
+                if loaded:
+                    logger.info(f"[EXPLAIN] {loaded} explication(s) en attente chargee(s)")
+            except Exception as e:
+                logger.warning(f"[EXPLAIN] Rechargement de la file impossible: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def get_status(self) -> dict:
+        with self._lock:
+            entries = [entry for _, _, entry in self._heap]
+        upgrades = sum(1 for entry in entries if self.is_low_risk(entry.fraud_score))
+        return {
+            "running": self.is_running,
+            "concurrency": self.concurrency,
+            "queued_urgent": len(entries) - upgrades,
+            "queued_upgrades": upgrades,
+            **self.stats
+        }
+
+
+# Instance singleton
+explanation_queue = ExplanationQueue(
+    SessionLocal,
+    llm_explainer_service,
+    concurrency=settings.explanation_concurrency,
+    batch_size=settings.llm_batch_size,
+    llm_min_score=settings.explanation_llm_min_score,
+    low_risk_penalty=settings.explanation_low_risk_penalty,
+    aging_per_minute=settings.explanation_aging_per_minute,
+    wait_timeout=settings.explanation_wait_timeout,
+    poll_interval=settings.explanation_poll_interval,
+    stale_after=settings.explanation_stale_after,
+    max_attempts=settings.explanation_max_attempts,
+    retry_backoff=settings.explanation_retry_backoff
+)
@@ -0,0 +1,219 @@
+"""
+Batch rule-based explanations
+Same text as LLMExplainerService._generate_fallback_explanation, built for
+many transactions at once: the buckets (score, amount, country, hour,
+keywords) are classified over arrays, each sentence comes from a
+precompiled template or lookup table, then the strings are assembled
+"""
+import re
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from app.models.transaction import Transaction
+from app.services.llm_explainer import HIGH_RISK_COUNTRIES_NAMES
+
+
+# Index = score bucket: >=85, >=70, >=50, >=30, below
+INTRO_TEMPLATES = (
+    "ALERTE CRITIQUE (Score {0}/100): Cette transaction de {1} EUR presente un niveau de risque TRES ELEVE necessitant une intervention immediate.",
+    "ALERTE ELEVEE (Score {0}/100): Cette transaction de {1} EUR presente plusieurs indicateurs de risque significatifs necessitant verification.",
+    "VIGILANCE REQUISE (Score {0}/100): Cette transaction de {1} EUR presente des elements inhabituels meritant une attention particuliere.",
+    "RISQUE FAIBLE (Score {0}/100): Cette transaction de {1} EUR presente quelques points de vigilance mineurs.",
+    "TRANSACTION NORMALE (Score {0}/100): Cette transaction de {1} EUR ne presente pas d'anomalie significative.",
+)
+# Split around the amount: the text before it only depends on the score
+INTRO_HEADS = tuple(template.split("{1}")[0].format for template in INTRO_TEMPLATES)
+INTRO_TAILS = tuple(template.split("{1}")[1] for template in INTRO_TEMPLATES)
+
+RECOMMENDATIONS = (
+    "ACTION REQUISE: BLOQUER la transaction immediatement. Alerter le responsable Fraude et le service Conformite. Contacter le client pour verification d'identite renforcee avant toute validation.",
+    "ACTION REQUISE: SUSPENDRE la transaction en attente de verification. Contacter le client par telephone pour confirmer l'operation et documenter l'echange.",
+    "SURVEILLANCE RECOMMANDEE: Marquer le compte pour surveillance renforcee. Analyser les transactions suivantes dans les 48h. Documenter dans le dossier client.",
+    "VIGILANCE: Aucune action immediate necessaire. Enregistrer l'alerte dans l'historique pour analyse statistique ulterieure.",
+    "Aucune action requise. Transaction dans les parametres normaux du profil client.",
+)
+
+# Index = amount bucket: >=50000, >=20000, >=10000, 9000-9999
+AMOUNT_TEMPLATES = tuple(template.format for template in (
+    "Le montant exceptionnel de {0} EUR depasse largement les seuils de vigilance AML et necessite une declaration Tracfin",
+    "Le montant de {0} EUR est significativement eleve et declenche une vigilance renforcee",
+    "Le montant de {0} EUR atteint le seuil de declaration reglementaire",
+    "Le montant de {0} EUR, juste sous le seuil de 10 000 EUR, pourrait indiquer une tentative de structuration",
+))
+
+HIGH_RISK_COUNTRY_TEMPLATE = "La destination ({0}) figure sur la liste des pays a haut risque GAFI, necessitant une vigilance renforcee AML".format
+INTERNATIONAL_TEMPLATE = "Il s'agit d'un transfert international vers {0}, ce qui augmente le niveau de surveillance requis".format
+
+HIGH_RISK_COUNTRY_SENTENCES = {
+    code: HIGH_RISK_COUNTRY_TEMPLATE(name) for code, name in HIGH_RISK_COUNTRIES_NAMES.items()
+}
+
+# Index = hour of the day: 0h-5h and 23h
+HOUR_SENTENCES = np.array(
+    [
+        f"L'operation a ete effectuee a {hour}h, une heure nocturne tres inhabituelle pour une activite bancaire legitime"
+        for hour in range(6)
+    ]
+    + [None] * 17
+    + ["L'operation tardive (23h) sort des habitudes transactionnelles standards"],
+    dtype=object
+)
+
+# Index = weekday - 5
+WEEKEND_SENTENCES = np.array([
+    "La transaction elevee effectuee un samedi constitue un comportement atypique",
+    "La transaction elevee effectuee un dimanche constitue un comportement atypique",
+], dtype=object)
+
+# Crypto/trading receivers, then shell company structures
+RECEIVER_TEMPLATES = tuple(template.format for template in (
+    "Le beneficiaire '{0}' suggere une activite liee aux cryptomonnaies ou au trading, secteurs a risque eleve",
+    "La structure juridique du beneficiaire ({0}) presente des caracteristiques de societe ecran potentielle",
+))
+
+CRYPTO_RECEIVER = re.compile("crypto|trading|forex|exchange")
+SHELL_RECEIVER = re.compile("llc|fze|offshore|ltd")
+# Factors already described by one of the sentences above
+COVERED_FACTOR = re.compile("montant|pays|heure|nocturne|beneficiaire")
+
+HIGH_RISK_CODES = np.array(sorted(HIGH_RISK_COUNTRIES_NAMES), dtype=object)
+
+NO_BUCKET = -1
+
+
+def _receiver_sentence(receiver: str) -> Optional[str]:
+    receiver_lower = receiver.lower()
+    if CRYPTO_RECEIVER.search(receiver_lower):
+        return RECEIVER_TEMPLATES[0](receiver)
+    if SHELL_RECEIVER.search(receiver_lower):
+        return RECEIVER_TEMPLATES[1](receiver)
+    return None
+
+
+class FallbackExplanationEngine:
+    """
+    Rule-based explanations for many transactions at once
+
+    The output is byte-identical to LLMExplainerService._generate_fallback_explanation,
+    called once per transaction. Used by the bulk analysis and the background
+    rescoring (through ExplanationQueue.enqueue_scored) and by the exports.
+    """
+
+    def __init__(self):
+        # Factor text -> whether it adds a sentence, factors repeat a lot
+        self._extra_factor_cache = {}
+
+    def explain_many(
+        self,
+        transactions: Sequence[Transaction],
+        fraud_scores: Sequence[int],
+        risk_factors: Sequence[Optional[List[str]]]
+    ) -> List[str]:
+        """Explanations of transactions, in order"""
+        return self.explain_columns(
+            amounts=[float(t.amount) for t in transactions],
+            fraud_scores=fraud_scores,
+            origins=[t.country_origin for t in transactions],
+            destinations=[t.country_destination for t in transactions],
+            dates=[t.transaction_date for t in transactions],
+            receivers=[t.receiver_name for t in transactions],
+            risk_factors=risk_factors
+        )
+
+    def explain_columns(
+        self,
+        amounts: Sequence[float],
+        fraud_scores: Sequence[int],
+        origins: Sequence[Optional[str]],
+        destinations: Sequence[Optional[str]],
+        dates: Sequence[datetime],
+        receivers: Sequence[Optional[str]],
+        risk_factors: Sequence[Optional[List[str]]]
+    ) -> List[str]:
+        """
+        Explanations from column values (query rows, no ORM objects needed)
+
+        Args:
+            amounts: Amounts as floats
+            risk_factors: Detected factors of each transaction, None for none
+        """
+        count = len(fraud_scores)
+        if count == 0:
+            return []
+
+        amount = np.fromiter(amounts, dtype=np.float64, count=count)
+        score = np.fromiter(fraud_scores, dtype=np.int64, count=count)
+        hour = np.fromiter((d.hour for d in dates), dtype=np.int64, count=count)
+        weekday = np.fromiter((d.weekday() for d in dates), dtype=np.int64, count=count)
+        dest = np.array([d or 'FRA' for d in destinations], dtype=object)
+        origin = np.array([o or 'FRA' for o in origins], dtype=object)
+
+        # === BUCKETS ===
+        score_bucket = np.select([score >= 85, score >= 70, score >= 50, score >= 30], [0, 1, 2, 3], 4)
+        amount_bucket = np.select(
+            [amount >= 50000, amount >= 20000, amount >= 10000, (amount >= 9000) & (amount <= 9999)],
+            [0, 1, 2, 3],
+            NO_BUCKET
+        )
+        high_risk = np.isin(dest, HIGH_RISK_CODES)
+        international = ~high_risk & (dest != 'FRA') & (dest != origin)
+        weekend = (weekday >= 5) & (amount > 5000)
+
+        # === SENTENCES, one column each (None: no sentence) ===
+        amount_texts = [format(value, ",.0f") for value in amount.tolist()]
+        amount_sentences = np.full(count, None, dtype=object)
+        for i in np.flatnonzero(amount_bucket != NO_BUCKET).tolist():
+            amount_sentences[i] = AMOUNT_TEMPLATES[amount_bucket[i]](amount_texts[i])
+
+        country_sentences = np.full(count, None, dtype=object)
+        country_sentences[high_risk] = [HIGH_RISK_COUNTRY_SENTENCES[code] for code in dest[high_risk]]
+        country_sentences[international] = [INTERNATIONAL_TEMPLATE(code) for code in dest[international]]
+
+        hour_sentences = HOUR_SENTENCES[hour]
+        weekend_sentences = np.full(count, None, dtype=object)
+        weekend_sentences[weekend] = WEEKEND_SENTENCES[weekday[weekend] - 5]
+
+        # Few distinct receivers: keyword scans once per name
+        receiver_names = [r or 'Non specifie' for r in receivers]
+        by_name = {name: _receiver_sentence(name) for name in set(receiver_names)}
+        receiver_sentences = [by_name[name] for name in receiver_names]
+
+        # === ASSEMBLAGE ===
+        explanations = []
+        append = explanations.append
+        intro_heads = {}
+        for fraud_score, amount_text, bucket, factors, *sentences in zip(
+            fraud_scores, amount_texts, score_bucket.tolist(), risk_factors, amount_sentences.tolist(),
+            country_sentences.tolist(), hour_sentences.tolist(), weekend_sentences.tolist(), receiver_sentences
+        ):
+            analysis = [sentence for sentence in sentences if sentence is not None]
+            if factors:
+                analysis.extend(self._extra_factors(factors))
+            head = intro_heads.get(fraud_score)
+            if head is None:
+                head = intro_heads[fraud_score] = INTRO_HEADS[bucket](fraud_score)
+            intro = head + amount_text + INTRO_TAILS[bucket]
+            if analysis:
+                append(f"{intro} {' '.join(analysis[:3])}. {RECOMMENDATIONS[bucket]}")
+            else:
+                append(f"{intro} {RECOMMENDATIONS[bucket]}")
+        return explanations
+
+    def _extra_factors(self, factors: List[str]) -> List[str]:
+        """Factors among the first two not covered by a sentence"""
+        extra = []
+        for factor in factors[:2]:
+            keep = self._extra_factor_cache.get(factor)
+            if keep is None:
+                keep = not COVERED_FACTOR.search(factor.lower())
+                if len(self._extra_factor_cache) < 10_000:
+                    self._extra_factor_cache[factor] = keep
+            if keep:
+                extra.append(factor)
+        return extra
+
+
+# Instance singleton
+fallback_explanation_engine = FallbackExplanationEngine()
@@ -4,16 +4,20 @@ Detection automatique des fraudes avec scoring intelligent et analyse comporteme
 """
 import numpy as np
 import os
+import re
 import joblib
 import time
 from datetime import datetime, timedelta
-from typing import Tuple, List, Optional, Dict, Any
+from typing import Tuple, List, Optional, Dict, Any, Callable, Set
+from collections import Counter
 from decimal import Decimal
 from loguru import logger
+from sqlalchemy import tuple_
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 
 from app.config import settings
+from app.metrics import ANALYSIS_RESULTS, ML_INFERENCE_DURATION
 from app.models.transaction import Transaction
 
 
@@ -40,6 +44,43 @@ SUSPICIOUS_KEYWORDS = [
 
 RISKY_LEGAL_STRUCTURES = ['llc', 'fze', 'ltd', 'offshore', 'holdings', 'trust', 'foundation']
 
+# Columns of the _prepare_features vector, in order
+FEATURE_NAMES = [
+    'amount', 'amount_log', 'hour', 'day_of_week', 'is_weekend', 'is_night', 'is_international',
+    'country_risk', 'is_high_risk_country', 'channel_encoded', 'type_encoded', 'is_round_amount',
+    'is_large_amount', 'is_very_large'
+]
+# Transaction attributes read by _prepare_features
+FEATURE_SOURCE_COLUMNS = ['amount', 'transaction_date', 'country_origin', 'country_destination', 'channel', 'transaction_type']
+
+
+def compile_keywords(keywords: List[str]) -> Tuple["re.Pattern", Dict[str, int]]:
+    """
+    Compile a keyword list into one regex and the rank of each keyword
+    
+    The lookahead finds overlapping occurrences, and the alternation tries
+    keywords in list order, so the lowest ranked match is the keyword the
+    list loop would have stopped at.
+    """
+    pattern = re.compile("(?=(" + "|".join(re.escape(k) for k in keywords) + "))")
+    return pattern, {k: i for i, k in enumerate(keywords)}
+
+
+def first_keyword(compiled: Tuple["re.Pattern", Dict[str, int]], text: str) -> Optional[str]:
+    """First keyword of the list contained in text, or None"""
+    pattern, rank = compiled
+    found = pattern.findall(text)
+    return min(found, key=rank.__getitem__) if found else None
+
+
+SUSPICIOUS_KEYWORDS_RULE = compile_keywords(SUSPICIOUS_KEYWORDS)
+RISKY_LEGAL_STRUCTURES_RULE = compile_keywords(RISKY_LEGAL_STRUCTURES)
+
+# Receives one structured event per completed analysis step
+ScoringObserver = Callable[[Dict[str, Any]], None]
+
+SCORING_STEPS = ['ml', 'amount', 'geography', 'timing', 'beneficiary']
+
 
 def log_separator():
     logger.info("=" * 70)
@@ -60,6 +101,7 @@ class FraudDetectionService:
         self.scaler_path = self.model_path.replace('.joblib', '_scaler.joblib')
         self.encoders_path = self.model_path.replace('.joblib', '_encoders.joblib')
         self.threshold = settings.fraud_score_threshold
+        self._observers: Tuple[ScoringObserver, ...] = ()
         self._load_model()
     
     def _load_model(self) -> None:
@@ -133,10 +175,66 @@ class FraudDetectionService:
         logger.info(f"Modele sauvegarde: {self.model_path}")
         return {"status": "success", "samples_trained": len(transactions)}
     
-    def analyze_transaction(self, transaction: Transaction, db_session=None) -> Tuple[int, bool, List[str]]:
-        """Analyse complete avec logs temps reel"""
+    def add_observer(self, observer: ScoringObserver) -> None:
+        """Subscribe to the step events of every analysis (metrics, profiling)"""
+        self._observers = self._observers + (observer,)
+    
+    def remove_observer(self, observer: ScoringObserver) -> None:
+        """Unsubscribe a service-wide observer"""
+        self._observers = tuple(o for o in self._observers if o != observer)
+    
+    def _emit_step(
+        self,
+        observers: Tuple[ScoringObserver, ...],
+        transaction: Transaction,
+        score_components: list,
+        factors: List[str],
+        started: float
+    ) -> None:
+        """Notify observers that the last scored component is complete"""
+        if not observers:
+            return
+        
+        duration_ms = (time.perf_counter() - started) * 1000
+        
+        index = len(score_components)
+        label, score, weight = score_components[-1]
+        event = {
+            "transaction_id": str(transaction.id),
+            "transaction_ref": transaction.transaction_ref,
+            "step": SCORING_STEPS[index - 1],
+            "label": label,
+            "index": index,
+            "total": len(SCORING_STEPS),
+            "score": round(float(score), 1),
+            "weight": weight,
+            "partial_score": round(sum(s * w for _, s, w in score_components), 1),
+            "duration_ms": round(duration_ms, 3),
+            "factors": list(factors)
+        }
+        for observer in observers:
+            try:
+                observer(event)
+            except Exception as e:
+                logger.debug(f"Scoring observer failed: {e}")
+    
+    def analyze_transaction(
+        self,
+        transaction: Transaction,
+        db_session=None,
+        observer: Optional[ScoringObserver] = None
+    ) -> Tuple[int, bool, List[str]]:
+        """
+        Analyse complete avec logs temps reel
+        
+        Args:
+            observer: Optional callback receiving a structured event (step,
+                score, partial_score, duration_ms, factors) after each of
+                the five steps, in addition to the service-wide observers
+        """
         all_factors = []
         score_components = []
+        observers = self._observers + ((observer,) if observer else ())
         
         log_separator()
         logger.info(f"🔍 DEBUT ANALYSE TRANSACTION: {transaction.transaction_ref}")
@@ -158,9 +256,11 @@ class FraudDetectionService:
         log_step(1, 5, "ANALYSE PAR MODELE IA (IsolationForest)")
         logger.info("   ⏳ Chargement du modele ML...")
         time.sleep(0.2)
+        step_started = time.perf_counter()
         ml_score, ml_factors = self._ml_analysis(transaction)
         score_components.append(('Modele IA', ml_score, 0.35))
         all_factors.extend(ml_factors)
+        self._emit_step(observers, transaction, score_components, ml_factors, step_started)
         logger.info(f"   ✅ Score ML: {ml_score:.1f}/100")
         for f in ml_factors:
             logger.info(f"      → {f}")
@@ -170,9 +270,11 @@ class FraudDetectionService:
         log_step(2, 5, "ANALYSE DU MONTANT")
         logger.info(f"   ⏳ Verification du montant: {transaction.amount} EUR...")
         time.sleep(0.2)
+        step_started = time.perf_counter()
         amount_score, amount_factors = self._analyze_amount(transaction, db_session)
         score_components.append(('Montant', amount_score, 0.25))
         all_factors.extend(amount_factors)
+        self._emit_step(observers, transaction, score_components, amount_factors, step_started)
         logger.info(f"   ✅ Score Montant: {amount_score:.1f}/100")
         for f in amount_factors:
             logger.info(f"      → {f}")
@@ -183,9 +285,11 @@ class FraudDetectionService:
         dest = transaction.country_destination or 'FRA'
         logger.info(f"   ⏳ Verification pays destination: {dest}...")
         time.sleep(0.2)
+        step_started = time.perf_counter()
         geo_score, geo_factors = self._analyze_geography(transaction)
         score_components.append(('Geographie', geo_score, 0.20))
         all_factors.extend(geo_factors)
+        self._emit_step(observers, transaction, score_components, geo_factors, step_started)
         logger.info(f"   ✅ Score Geographique: {geo_score:.1f}/100")
         for f in geo_factors:
             logger.info(f"      → {f}")
@@ -196,9 +300,11 @@ class FraudDetectionService:
         hour = transaction.transaction_date.hour
         logger.info(f"   ⏳ Verification heure: {hour}h...")
         time.sleep(0.2)
+        step_started = time.perf_counter()
         time_score, time_factors = self._analyze_timing(transaction)
         score_components.append(('Horaire', time_score, 0.10))
         all_factors.extend(time_factors)
+        self._emit_step(observers, transaction, score_components, time_factors, step_started)
         logger.info(f"   ✅ Score Temporel: {time_score:.1f}/100")
         for f in time_factors:
             logger.info(f"      → {f}")
@@ -208,9 +314,11 @@ class FraudDetectionService:
         log_step(5, 5, "ANALYSE DU BENEFICIAIRE")
         logger.info(f"   ⏳ Verification beneficiaire: {transaction.receiver_name}...")
         time.sleep(0.2)
+        step_started = time.perf_counter()
         benef_score, benef_factors = self._analyze_beneficiary(transaction, db_session)
         score_components.append(('Beneficiaire', benef_score, 0.10))
         all_factors.extend(benef_factors)
+        self._emit_step(observers, transaction, score_components, benef_factors, step_started)
         logger.info(f"   ✅ Score Beneficiaire: {benef_score:.1f}/100")
         for f in benef_factors:
             logger.info(f"      → {f}")
@@ -237,6 +345,7 @@ class FraudDetectionService:
         
         if is_suspicious:
             all_factors.append(f"Score de risque global: {final_score:.0f}/100 ({risk_level.upper()})")
+        ANALYSIS_RESULTS.labels(risk_level=risk_level, suspicious=str(is_suspicious).lower()).inc()
         
         log_separator()
         if is_suspicious:
@@ -258,6 +367,99 @@ class FraudDetectionService:
         
         return int(round(final_score)), is_suspicious, all_factors
     
+    def score_batch(
+        self,
+        transactions: List[Transaction],
+        db_session=None
+    ) -> List[Tuple[int, bool, List[str]]]:
+        """
+        Score a batch of transactions without the demo logs and pauses
+        
+        Same scores and factors as analyze_transaction, with a single
+        IsolationForest call for the batch and a single query for the
+        beneficiary history. No step events are emitted.
+        
+        Returns:
+            (fraud_score, is_suspicious, factors) for each transaction, in order
+        """
+        if not transactions:
+            return []
+        
+        ml_results = self._ml_analysis_batch(transactions)
+        known_pairs = self._known_pairs(transactions, db_session) if db_session else None
+        
+        results = []
+        for transaction, (ml_score, ml_factors) in zip(transactions, ml_results):
+            all_factors = list(ml_factors)
+            score_components = [('Modele IA', ml_score, 0.35)]
+            for label, weight, (score, factors) in (
+                ('Montant', 0.25, self._analyze_amount(transaction)),
+                ('Geographie', 0.20, self._analyze_geography(transaction)),
+                ('Horaire', 0.10, self._analyze_timing(transaction)),
+                ('Beneficiaire', 0.10, self._analyze_beneficiary(transaction, known_pairs=known_pairs)),
+            ):
+                score_components.append((label, score, weight))
+                all_factors.extend(factors)
+            
+            final_score = sum(score * weight for _, score, weight in score_components)
+            final_score = self._apply_risk_boosters(final_score, all_factors, transaction, verbose=False)
+            final_score = min(100, max(0, final_score))
+            
+            is_suspicious = final_score >= self.threshold
+            risk_level = self._get_risk_level(final_score)
+            if is_suspicious:
+                all_factors.append(f"Score de risque global: {final_score:.0f}/100 ({risk_level.upper()})")
+            ANALYSIS_RESULTS.labels(risk_level=risk_level, suspicious=str(is_suspicious).lower()).inc()
+            
+            results.append((int(round(final_score)), is_suspicious, all_factors))
+        return results
+    
+    def _ml_analysis_batch(self, transactions: List[Transaction]) -> List[Tuple[float, List[str]]]:
+        """Vectorized _ml_analysis: one transform and one score_samples call"""
+        if not self.model or not self.scaler:
+            return [(50.0, ["Modele ML en cours de chargement"]) for _ in transactions]
+        
+        try:
+            features = np.vstack([self._prepare_features(t) for t in transactions])
+            with ML_INFERENCE_DURATION.time():
+                features_scaled = self.scaler.transform(features)
+                scores_raw = self.model.score_samples(features_scaled)
+            # IsolationForest.predict flags an anomaly when score_samples < offset_
+            anomalies = scores_raw < self.model.offset_
+        except Exception as e:
+            logger.error(f"Erreur ML (lot): {e}")
+            return [(50.0, []) for _ in transactions]
+        
+        results = []
+        for score_raw, is_anomaly in zip(scores_raw, anomalies):
+            ml_score = max(0, min(100, 50 - (score_raw * 100)))
+            if is_anomaly:
+                results.append((max(ml_score, 65), ["Comportement anormal detecte par l'IA (IsolationForest)"]))
+            else:
+                results.append((ml_score, []))
+        return results
+    
+    def _known_pairs(self, transactions: List[Transaction], db_session) -> Optional[Set[Tuple[str, str]]]:
+        """
+        Sender/receiver pairs that already have another transaction
+        
+        Covers both the database (excluding the batch itself) and
+        repeated pairs inside the batch.
+        """
+        pairs = Counter((t.sender_account, t.receiver_account) for t in transactions)
+        known = {pair for pair, count in pairs.items() if count > 1}
+        try:
+            rows = db_session.query(Transaction.sender_account, Transaction.receiver_account).filter(
+                tuple_(Transaction.sender_account, Transaction.receiver_account).in_(list(pairs)),
+                Transaction.id.notin_([t.id for t in transactions if t.id is not None])
+            ).distinct().all()
+        except Exception as e:
+            # Same as the per-transaction lookup: no history, no new beneficiary factor
+            logger.debug(f"Historique beneficiaires indisponible: {e}")
+            return None
+        known.update((sender, receiver) for sender, receiver in rows)
+        return known
+    
     def _ml_analysis(self, transaction: Transaction) -> Tuple[float, List[str]]:
         factors = []
         if not self.model or not self.scaler:
@@ -266,9 +468,10 @@ class FraudDetectionService:
         
         try:
             features = self._prepare_features(transaction)
-            features_scaled = self.scaler.transform(features)
-            prediction = self.model.predict(features_scaled)[0]
-            score_raw = self.model.score_samples(features_scaled)[0]
+            with ML_INFERENCE_DURATION.time():
+                features_scaled = self.scaler.transform(features)
+                prediction = self.model.predict(features_scaled)[0]
+                score_raw = self.model.score_samples(features_scaled)[0]
             
             ml_score = 50 - (score_raw * 100)
             ml_score = max(0, min(100, ml_score))
@@ -361,7 +564,12 @@ class FraudDetectionService:
         
         return min(100, score), factors
     
-    def _analyze_beneficiary(self, transaction: Transaction, db_session=None) -> Tuple[float, List[str]]:
+    def _analyze_beneficiary(
+        self,
+        transaction: Transaction,
+        db_session=None,
+        known_pairs: Optional[Set[Tuple[str, str]]] = None
+    ) -> Tuple[float, List[str]]:
         factors = []
         score = 0
         
@@ -369,19 +577,21 @@ class FraudDetectionService:
         description = (transaction.description or '').lower()
         text_to_check = f"{receiver_name} {description}"
         
-        for keyword in SUSPICIOUS_KEYWORDS:
-            if keyword in text_to_check:
-                score += 40
-                factors.append(f"Mot-cle suspect detecte: '{keyword}'")
-                break
+        keyword = first_keyword(SUSPICIOUS_KEYWORDS_RULE, text_to_check)
+        if keyword:
+            score += 40
+            factors.append(f"Mot-cle suspect detecte: '{keyword}'")
         
-        for structure in RISKY_LEGAL_STRUCTURES:
-            if structure in receiver_name:
-                score += 25
-                factors.append(f"Structure juridique a risque: {structure.upper()}")
-                break
+        structure = first_keyword(RISKY_LEGAL_STRUCTURES_RULE, receiver_name)
+        if structure:
+            score += 25
+            factors.append(f"Structure juridique a risque: {structure.upper()}")
         
-        if db_session:
+        if known_pairs is not None:
+            if (transaction.sender_account, transaction.receiver_account) not in known_pairs:
+                score += 35
+                factors.append("NOUVEAU BENEFICIAIRE: premiere transaction vers ce compte")
+        elif db_session:
             try:
                 previous = db_session.query(Transaction).filter(
                     Transaction.sender_account == transaction.sender_account,
@@ -397,28 +607,38 @@ class FraudDetectionService:
         
         return min(100, score), factors
     
-    def _apply_risk_boosters(self, score: float, factors: List[str], transaction: Transaction) -> float:
+    def _apply_risk_boosters(
+        self,
+        score: float,
+        factors: List[str],
+        transaction: Transaction,
+        verbose: bool = True
+    ) -> float:
         amount = float(transaction.amount)
         dest = transaction.country_destination or 'FRA'
         hour = transaction.transaction_date.hour
         factors_text = ' '.join(factors).lower()
         
         if amount >= 10000 and dest in HIGH_RISK_COUNTRIES and hour in SUSPICIOUS_HOURS:
-            logger.warning("   🚨 BOOSTER ACTIF: Combo critique (montant + pays + nuit)")
+            if verbose:
+                logger.warning("   🚨 BOOSTER ACTIF: Combo critique (montant + pays + nuit)")
             score *= 1.5
             factors.append("ALERTE MAXIMALE: Combinaison critique detectee!")
         
         if 'nouveau' in factors_text and amount >= 5000 and dest not in ['FRA', 'DEU', 'BEL', 'ESP', 'ITA']:
-            logger.warning("   ⚠️ BOOSTER ACTIF: Premier transfert international significatif")
+            if verbose:
+                logger.warning("   ⚠️ BOOSTER ACTIF: Premier transfert international significatif")
             score *= 1.3
             factors.append("RISQUE COMBINE: Premier transfert international significatif")
         
         if 'structuration' in factors_text and dest in HIGH_RISK_COUNTRIES:
-            logger.warning("   🚨 BOOSTER ACTIF: Structuration vers pays a risque")
+            if verbose:
+                logger.warning("   🚨 BOOSTER ACTIF: Structuration vers pays a risque")
             score *= 1.4
             factors.append("ALERTE BLANCHIMENT: Structuration vers pays a risque")
         
-        logger.info(f"   Score apres boosters: {score:.1f}/100")
+        if verbose:
+            logger.info(f"   Score apres boosters: {score:.1f}/100")
         return score
     
     def _get_risk_level(self, score: float) -> str:
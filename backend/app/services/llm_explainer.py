@@ -4,12 +4,23 @@ Explainable AI - Genere des explications claires et professionnelles pour les an
 """
 import httpx
 import json
-from typing import List, Optional
+import time
+from typing import Dict, List, Optional, Tuple
 from loguru import logger
 from decimal import Decimal
 
 from app.config import settings
+from app.metrics import (
+    LLM_EXPLANATIONS,
+    LLM_GENERATION_DURATION,
+    LLM_PROMPT_EVAL_DURATION,
+    LLM_QUEUE_DURATION,
+    LLM_REQUEST_DURATION,
+    LLM_TOKENS,
+)
 from app.models.transaction import Transaction
+from app.services.prompt_builder import ExplanationPrompt, build_batch_prompt, build_explanation_prompt
+from app.utils.circuit_breaker import CircuitBreaker
 
 
 # Pays a haut risque pour les explications
@@ -19,6 +30,9 @@ HIGH_RISK_COUNTRIES_NAMES = {
     'MMR': 'Myanmar', 'VEN': 'Venezuela', 'LBY': 'Libye', 'SOM': 'Somalie'
 }
 
+# Shorter answers in a batch are treated as missing
+MIN_EXPLANATION_LENGTH = 40
+
 
 class LLMExplainerService:
     """
@@ -26,10 +40,31 @@ class LLMExplainerService:
     Implemente l'Explainable AI pour la conformite bancaire
     """
     
-    def __init__(self):
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
         self.ollama_host = settings.ollama_host
         self.model = settings.ollama_model
-        self.timeout = 60.0
+        self.timeout = settings.ollama_timeout  # Maximum, the breaker adapts it to observed latency
+        self.breaker = CircuitBreaker(
+            "ollama",
+            failure_threshold=settings.llm_breaker_failure_threshold,
+            slow_call_seconds=settings.llm_breaker_slow_call_seconds,
+            recovery_timeout=settings.llm_breaker_recovery_seconds,
+            min_timeout=settings.llm_timeout_min_seconds,
+            timeout_percentile=settings.llm_timeout_percentile,
+            timeout_multiplier=settings.llm_timeout_multiplier
+        )
+        self.keep_alive = settings.ollama_keep_alive
+        self.batch_size = settings.llm_batch_size
+        # Custom transport (tests, benchmarks); None uses the network
+        self.transport = transport
+        self.usage = {
+            "requests": 0,
+            "prompt_tokens": 0,
+            "output_tokens": 0,
+            "prompt_eval_seconds": 0.0,
+            "eval_seconds": 0.0,
+            "load_seconds": 0.0
+        }
     
     async def explain_transaction(
         self,
@@ -41,79 +76,197 @@ class LLMExplainerService:
         Genere une explication en langage naturel pour une analyse de fraude
         """
         risk_level = self._get_risk_level(fraud_score)
-        factors_text = "\n".join(f"- {f}" for f in risk_factors) if risk_factors else "Aucun facteur majeur"
+        prompt = build_explanation_prompt(transaction, fraud_score, risk_level, risk_factors)
         
-        prompt = f"""Tu es un analyste senior en detection de fraude bancaire chez BPCE.
-Analyse cette transaction et fournis une explication PROFESSIONNELLE pour l'equipe Conformite.
-
-=== TRANSACTION ===
-Reference: {transaction.transaction_ref}
-Montant: {transaction.amount} {transaction.currency}
-Type: {transaction.transaction_type}
-Canal: {transaction.channel}
-Date/Heure: {transaction.transaction_date.strftime('%d/%m/%Y a %H:%M')}
-Expediteur: {transaction.sender_name or 'Non specifie'}
-Beneficiaire: {transaction.receiver_name or 'Non specifie'}
-Pays origine: {transaction.country_origin or 'France'}
-Pays destination: {transaction.country_destination or 'France'}
-Motif: {transaction.description or 'Non specifie'}
-
-=== ANALYSE IA ===
-Score: {fraud_score}/100
-Niveau: {risk_level}
-Facteurs:
-{factors_text}
-
-Redige 4-5 phrases professionnelles:
-1. Niveau de risque clair
-2. Explication des 2-3 facteurs principaux
-3. Contexte AML/KYC si pertinent
-4. Recommandation precise
-
-Reponds UNIQUEMENT avec l'explication."""
-
-        try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.ollama_host}/api/generate",
-                    json={
-                        "model": self.model,
-                        "prompt": prompt,
-                        "stream": False,
-                        "options": {
-                            "temperature": 0.3,
-                            "top_p": 0.9,
-                            "num_predict": 400
-                        }
-                    }
+        result, reason = await self._generate(prompt)
+        if result is None:
+            LLM_EXPLANATIONS.labels(source="fallback", reason=reason).inc()
+            return self._generate_fallback_explanation(
+                transaction, fraud_score, risk_level, risk_factors
+            )
+        
+        LLM_EXPLANATIONS.labels(source="llm", reason="").inc()
+        logger.info(f"Explication LLM generee pour {transaction.transaction_ref}")
+        return result.get("response", "").strip()
+    
+    async def explain_batch(self, items: List[Tuple[Transaction, int, List[str]]]) -> List[str]:
+        """
+        Explique plusieurs transactions avec un appel LLM par niveau de risque
+        
+        Transactions sharing a risk level are explained by one prompt asking
+        for a JSON object keyed by reference, up to llm_batch_size per call.
+        Items missing from a valid answer, and every item of an unusable
+        answer, get the rule-based explanation.
+        
+        Args:
+            items: (transaction, fraud_score, risk_factors) tuples
+        
+        Returns:
+            One explanation per item, in order
+        """
+        explanations: List[Optional[str]] = [None] * len(items)
+        groups: Dict[str, List[int]] = {}
+        for index, (_, fraud_score, _) in enumerate(items):
+            groups.setdefault(self._get_risk_level(fraud_score), []).append(index)
+        
+        for risk_level, indexes in groups.items():
+            for start in range(0, len(indexes), self.batch_size):
+                chunk = indexes[start:start + self.batch_size]
+                if len(chunk) == 1:
+                    explanations[chunk[0]] = await self.explain_transaction(*items[chunk[0]])
+                    continue
+                
+                batch = [items[i] for i in chunk]
+                prompt = build_batch_prompt(
+                    [(t, fraud_score, factors) for t, fraud_score, factors in batch], risk_level
                 )
+                result, reason = await self._generate(prompt, json_output=True, timeout_scale=len(chunk))
+                answers = self._parse_batch_response(result, [t.transaction_ref for t, _, _ in batch]) if result else {}
+                if result is not None and not answers:
+                    reason = "parse_error"
+                
+                for i, (transaction, fraud_score, factors) in zip(chunk, batch):
+                    answer = answers.get(transaction.transaction_ref)
+                    if answer:
+                        LLM_EXPLANATIONS.labels(source="llm", reason="").inc()
+                        explanations[i] = answer
+                    else:
+                        LLM_EXPLANATIONS.labels(source="fallback", reason=reason or "missing_item").inc()
+                        explanations[i] = self._generate_fallback_explanation(
+                            transaction, fraud_score, risk_level, factors
+                        )
+                logger.info(f"Lot LLM {risk_level}: {len(answers)}/{len(chunk)} explication(s) generee(s)")
+        
+        return explanations
+    
+    def _parse_batch_response(self, result: dict, refs: List[str]) -> Dict[str, str]:
+        """Explanations of the expected references found in a JSON answer"""
+        try:
+            data = json.loads(result.get("response", ""))
+        except (TypeError, ValueError):
+            logger.warning("Reponse LLM par lot illisible (JSON invalide)")
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        
+        answers = {}
+        for ref in refs:
+            value = data.get(ref)
+            if isinstance(value, str) and len(value.strip()) >= MIN_EXPLANATION_LENGTH:
+                answers[ref] = value.strip()
+        return answers
+    
+    async def _generate(
+        self,
+        prompt: ExplanationPrompt,
+        json_output: bool = False,
+        timeout_scale: float = 1.0
+    ) -> Tuple[Optional[dict], str]:
+        """
+        Call /api/generate through the circuit breaker
+        
+        Args:
+            json_output: Constrain the answer to valid JSON (format=json)
+            timeout_scale: Expected duration relative to a single explanation
+        
+        Returns:
+            (Ollama response, "") or (None, fallback reason)
+        """
+        # Ollama known to be down: no wait for a connect error or a timeout
+        if not self.breaker.allow_request(self.timeout):
+            return None, "circuit_open"
+        
+        body = {
+            "model": self.model,
+            "system": prompt.system,
+            "prompt": prompt.prompt,
+            "stream": False,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "temperature": 0.3,
+                "top_p": 0.9,
+                "num_predict": prompt.num_predict
+            }
+        }
+        if json_output:
+            body["format"] = "json"
+        
+        # A batch of n items may take n times the single-call maximum
+        timeout = self.breaker.current_timeout(self.timeout) * timeout_scale
+        try:
+            async with httpx.AsyncClient(timeout=timeout, transport=self.transport) as client:
+                started = time.perf_counter()
+                response = await client.post(f"{self.ollama_host}/api/generate", json=body)
+                
+                elapsed = time.perf_counter() - started
+                LLM_REQUEST_DURATION.observe(elapsed)
                 
                 if response.status_code == 200:
                     result = response.json()
-                    explanation = result.get("response", "").strip()
-                    logger.info(f"Explication LLM generee pour {transaction.transaction_ref}")
-                    return explanation
-                else:
-                    logger.error(f"Erreur API Ollama: {response.status_code}")
-                    return self._generate_fallback_explanation(
-                        transaction, fraud_score, risk_level, risk_factors
-                    )
+                    self._record_usage(result, elapsed)
+                    self.breaker.record_success(elapsed / timeout_scale)
+                    return result, ""
+                
+                logger.error(f"Erreur API Ollama: {response.status_code}")
+                self.breaker.record_failure()
+                return None, "http_error"
                     
         except httpx.TimeoutException:
-            logger.error("Timeout Ollama")
-            return self._generate_fallback_explanation(
-                transaction, fraud_score, risk_level, risk_factors
-            )
+            logger.error(f"Timeout Ollama ({timeout:.1f}s)")
+            self.breaker.record_failure()
+            return None, "timeout"
         except httpx.ConnectError:
             logger.error(f"Connexion Ollama impossible: {self.ollama_host}")
-            return self._generate_fallback_explanation(
-                transaction, fraud_score, risk_level, risk_factors
-            )
+            self.breaker.record_failure()
+            return None, "connect_error"
         except Exception as e:
             logger.error(f"Erreur LLM: {e}")
-            return self._generate_fallback_explanation(
-                transaction, fraud_score, risk_level, risk_factors
-            )
+            self.breaker.record_failure()
+            return None, "error"
+    
+    def _record_usage(self, result: dict, elapsed: float) -> None:
+        """Record the token counts and durations reported by Ollama (nanoseconds)"""
+        total = result.get("total_duration")
+        if total:
+            LLM_QUEUE_DURATION.observe(max(0.0, elapsed - total / 1e9))
+        if result.get("prompt_eval_duration"):
+            LLM_PROMPT_EVAL_DURATION.observe(result["prompt_eval_duration"] / 1e9)
+        if result.get("eval_duration"):
+            LLM_GENERATION_DURATION.observe(result["eval_duration"] / 1e9)
+        # prompt_eval_count only covers the tokens missing from the prefix cache
+        if "prompt_eval_count" in result:
+            LLM_TOKENS.labels(kind="prompt").observe(result["prompt_eval_count"])
+        if "eval_count" in result:
+            LLM_TOKENS.labels(kind="output").observe(result["eval_count"])
+        
+        usage = self.usage
+        usage["requests"] += 1
+        usage["prompt_tokens"] += result.get("prompt_eval_count", 0)
+        usage["output_tokens"] += result.get("eval_count", 0)
+        usage["prompt_eval_seconds"] += result.get("prompt_eval_duration", 0) / 1e9
+        usage["eval_seconds"] += result.get("eval_duration", 0) / 1e9
+        usage["load_seconds"] += result.get("load_duration", 0) / 1e9
+    
+    @property
+    def llm_available(self) -> bool:
+        """False while the circuit refuses calls; True again once a recovery probe is due"""
+        return self.breaker.is_available(self.timeout)
+    
+    @property
+    def llm_retry_in(self) -> float:
+        """Seconds before llm_available becomes True again, 0 when it is"""
+        return self.breaker.retry_in(self.timeout)
+    
+    def get_usage(self) -> dict:
+        """Cumulated Ollama usage of this process"""
+        usage = self.usage
+        requests = usage["requests"] or 1
+        return {
+            **{key: round(value, 3) if isinstance(value, float) else value for key, value in usage.items()},
+            "avg_prompt_tokens": round(usage["prompt_tokens"] / requests, 1),
+            "avg_output_tokens": round(usage["output_tokens"] / requests, 1),
+            "output_tokens_per_second": round(usage["output_tokens"] / usage["eval_seconds"], 1) if usage["eval_seconds"] else None
+        }
     
     def _get_risk_level(self, score: int) -> str:
         """Convertit le score en niveau de risque"""
@@ -225,7 +378,7 @@ Reponds UNIQUEMENT avec l'explication."""
     async def check_ollama_status(self) -> dict:
         """Verifie si Ollama est disponible"""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
+            async with httpx.AsyncClient(timeout=5.0, transport=self.transport) as client:
                 response = await client.get(f"{self.ollama_host}/api/tags")
                 
                 if response.status_code == 200:
@@ -238,7 +391,9 @@ Reponds UNIQUEMENT avec l'explication."""
                         "host": self.ollama_host,
                         "model": self.model,
                         "model_available": model_available,
-                        "available_models": models
+                        "available_models": models,
+                        "usage": self.get_usage(),
+                        "circuit_breaker": self.breaker.get_status(self.timeout)
                     }
                     
         except Exception as e:
@@ -249,7 +404,9 @@ Reponds UNIQUEMENT avec l'explication."""
             "host": self.ollama_host,
             "model": self.model,
             "model_available": False,
-            "error": "Impossible de se connecter a Ollama"
+            "error": "Impossible de se connecter a Ollama",
+            "usage": self.get_usage(),
+            "circuit_breaker": self.breaker.get_status(self.timeout)
         }
 
 
@@ -0,0 +1,125 @@
+"""
+Prompt builder for the Mistral explainer
+Static system prefix (cached by Ollama across requests) and compact
+per-transaction payload, with an output budget by risk level
+"""
+from typing import List, Tuple
+
+from app.models.transaction import Transaction
+
+
+ROLE = "Tu es analyste senior en detection de fraude bancaire chez BPCE. "
+CONTENT = (
+    "une explication professionnelle en francais, en texte continu: "
+    "le niveau de risque, les 2-3 facteurs principaux, le contexte AML/KYC si pertinent, "
+    "puis une recommandation precise. Respecte le nombre de phrases demande. "
+)
+
+# Byte-identical for every request: Ollama reuses the evaluated prefix
+# from its KV cache instead of processing the instructions again
+SYSTEM_PROMPT = (
+    ROLE
+    + "Tu recois une transaction et le resultat de son analyse automatique, au format cle=valeur. "
+    + "Redige pour l'equipe Conformite " + CONTENT
+    + "Reponds UNIQUEMENT avec l'explication."
+)
+
+# Several transactions of a risk level, answered as one JSON object
+BATCH_SYSTEM_PROMPT = (
+    ROLE
+    + "Tu recois plusieurs transactions separees par --- et le resultat de leur analyse automatique, au format cle=valeur. "
+    + "Redige pour l'equipe Conformite, pour chacune independamment, " + CONTENT
+    + "Reponds UNIQUEMENT avec un objet JSON dont les cles sont les valeurs ref et les valeurs les explications, "
+    + "par exemple {\"TXN-1\": \"...\", \"TXN-2\": \"...\"}."
+)
+
+# Risk level -> (num_predict, sentences): short answers for low risks
+OUTPUT_BUDGETS = {
+    "CRITIQUE": (260, "4-5"),
+    "ELEVE": (200, "3-4"),
+    "MOYEN": (150, "3"),
+    "FAIBLE": (110, "2"),
+    "MINIMAL": (80, "1-2"),
+}
+
+MAX_FACTORS = 5
+
+# Output tokens per item for the JSON key, quotes and separators
+BATCH_ITEM_OVERHEAD = 16
+
+
+class ExplanationPrompt:
+    """System prefix, payload and output budget of one generation"""
+
+    __slots__ = ("system", "prompt", "num_predict", "risk_level")
+
+    def __init__(self, system: str, prompt: str, num_predict: int, risk_level: str):
+        self.system = system
+        self.prompt = prompt
+        self.num_predict = num_predict
+        self.risk_level = risk_level
+
+
+def transaction_payload(transaction: Transaction, fraud_score: int, risk_level: str, risk_factors: List[str]) -> List[str]:
+    """Key=value lines describing a transaction, unknown fields are omitted"""
+    parties = []
+    for label, name, country in (
+        ("de", transaction.sender_name, transaction.country_origin or "FRA"),
+        ("vers", transaction.receiver_name, transaction.country_destination or "FRA"),
+    ):
+        parties.append(f"{label}={name} ({country})" if name else f"{label}={country}")
+
+    lines = [
+        f"ref={transaction.transaction_ref}",
+        f"montant={transaction.amount} {transaction.currency or 'EUR'} | type={transaction.transaction_type} | canal={transaction.channel}",
+        f"date={transaction.transaction_date.strftime('%d/%m/%Y %H:%M')}",
+        " | ".join(parties),
+    ]
+    if transaction.description:
+        lines.append(f"motif={transaction.description}")
+    lines.append(f"score={fraud_score}/100 | niveau={risk_level}")
+    if risk_factors:
+        lines.append("facteurs=" + "; ".join(risk_factors[:MAX_FACTORS]))
+    return lines
+
+
+def build_explanation_prompt(
+    transaction: Transaction,
+    fraud_score: int,
+    risk_level: str,
+    risk_factors: List[str]
+) -> ExplanationPrompt:
+    """
+    Build the generation request of one explanation
+
+    Args:
+        risk_level: Level from LLMExplainerService._get_risk_level (CRITIQUE ... MINIMAL)
+    """
+    num_predict, sentences = OUTPUT_BUDGETS.get(risk_level, OUTPUT_BUDGETS["MOYEN"])
+    lines = transaction_payload(transaction, fraud_score, risk_level, risk_factors)
+    lines.append(f"phrases={sentences}")
+    return ExplanationPrompt(SYSTEM_PROMPT, "\n".join(lines), num_predict, risk_level)
+
+
+def build_batch_prompt(
+    items: List[Tuple[Transaction, int, List[str]]],
+    risk_level: str
+) -> ExplanationPrompt:
+    """
+    Build one generation request for several transactions of a risk level
+
+    Args:
+        items: (transaction, fraud_score, risk_factors) tuples
+    """
+    num_predict, sentences = OUTPUT_BUDGETS.get(risk_level, OUTPUT_BUDGETS["MOYEN"])
+    blocks = [
+        "\n".join(transaction_payload(transaction, fraud_score, risk_level, risk_factors))
+        for transaction, fraud_score, risk_factors in items
+    ]
+    prompt = "\n---\n".join(blocks) + f"\n---\nphrases={sentences} par transaction"
+    return ExplanationPrompt(
+        BATCH_SYSTEM_PROMPT,
+        prompt,
+        (num_predict + BATCH_ITEM_OVERHEAD) * len(items),
+        risk_level
+    )
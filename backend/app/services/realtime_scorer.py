@@ -0,0 +1,459 @@
+"""
+Real-time pre-authorization scoring
+Scoring synchrone d'une transaction non persistee, a partir de l'etat en memoire
+
+The rules of FraudDetectionService are reused as is. The ML path runs on a
+compiled copy of the IsolationForest (padded node arrays walked for every
+tree at once), and the beneficiary history comes from an in-memory pair
+cache instead of a query. When the ML latency exceeds its budget, the
+scorer degrades to rules only and probes the model periodically.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.metrics import REALTIME_SCORING_DURATION
+from app.models.transaction import Transaction
+from app.services.fraud_detection import (
+    HIGH_RISK_COUNTRIES,
+    MEDIUM_RISK_COUNTRIES,
+    SUSPICIOUS_HOURS,
+    FraudDetectionService,
+    fraud_detection_service,
+)
+
+
+def average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """Average path length of an unsuccessful BST search (IsolationForest normalization)"""
+    n_samples = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros_like(n_samples)
+    result[n_samples == 2] = 1.0
+    large = n_samples > 2
+    n = n_samples[large]
+    result[large] = 2.0 * (np.log(n - 1.0) + np.euler_gamma) - 2.0 * (n - 1.0) / n
+    return result
+
+
+class CompiledForest:
+    """
+    IsolationForest score_samples for a single row without sklearn overhead
+
+    Each tree is flattened into padded arrays (feature, threshold, children,
+    leaf path length). Leaves point to themselves, so walking max_depth
+    levels for all trees at once lands every tree on its leaf.
+    """
+
+    def __init__(self, model, scaler):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        width = max(tree.node_count for tree in trees)
+        n_trees = len(trees)
+
+        self.feature = np.zeros((n_trees, width), dtype=np.intp)
+        self.threshold = np.full((n_trees, width), np.inf)
+        self.left = np.tile(np.arange(width), (n_trees, 1))
+        self.right = self.left.copy()
+        self.path_length = np.zeros((n_trees, width))
+        self.max_depth = 0
+
+        for t, (tree, features) in enumerate(zip(trees, model.estimators_features_)):
+            nodes = np.arange(tree.node_count)
+            is_split = tree.children_left != -1
+            depth = np.zeros(tree.node_count)
+            for node in nodes[is_split]:
+                # Children are numbered after their parent (depth-first build)
+                depth[tree.children_left[node]] = depth[node] + 1
+                depth[tree.children_right[node]] = depth[node] + 1
+
+            self.feature[t, nodes[is_split]] = np.asarray(features)[tree.feature[is_split]]
+            self.threshold[t, nodes[is_split]] = tree.threshold[is_split]
+            self.left[t, nodes[is_split]] = tree.children_left[is_split]
+            self.right[t, nodes[is_split]] = tree.children_right[is_split]
+            self.path_length[t, :tree.node_count] = depth + average_path_length(tree.n_node_samples)
+            self.max_depth = max(self.max_depth, int(depth.max()))
+
+        self.rows = np.arange(n_trees)
+        self.denominator = n_trees * float(average_path_length([model.max_samples_])[0])
+        self.offset = float(model.offset_)
+        self.mean = np.asarray(scaler.mean_, dtype=np.float64)
+        self.scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+    def score_samples(self, features: np.ndarray) -> float:
+        """Same value as model.score_samples(scaler.transform(features))[0]"""
+        # sklearn compares float32 inputs against the float64 thresholds
+        x = ((features - self.mean) / self.scale).astype(np.float32).astype(np.float64)
+        nodes = np.zeros(len(self.rows), dtype=np.intp)
+        for _ in range(self.max_depth):
+            go_left = x[self.feature[self.rows, nodes]] <= self.threshold[self.rows, nodes]
+            nodes = np.where(go_left, self.left[self.rows, nodes], self.right[self.rows, nodes])
+        depths = self.path_length[self.rows, nodes].sum()
+        if self.denominator == 0:
+            return -1.0
+        return -(2 ** (-depths / self.denominator))
+
+
+class PairCache:
+    """
+    Bounded LRU set of known sender/receiver account pairs
+
+    Stands in for the per-transaction history query of the beneficiary
+    rule. Warmed from the most recent pairs at startup, fed with every
+    transaction created by this process and refreshed with the rows
+    created elsewhere (see RealtimeScorer).
+
+    complete is False once a pair was left out (load truncated at
+    max_entries, LRU eviction): a missing pair may then be known.
+    """
+
+    # Rows are refreshed from a little before the last sync: created_at is
+    # the start of the writing database transaction, not its commit
+    REFRESH_OVERLAP = timedelta(seconds=60)
+
+    def __init__(self, max_entries: int = 200_000):
+        self.max_entries = max_entries
+        self.complete = True
+        self.synced_until = None  # Newest created_at already loaded
+        self._pairs: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, sender_account: str, receiver_account: str) -> None:
+        """Record a pair (most recently used)"""
+        pair = (sender_account, receiver_account)
+        with self._lock:
+            self._pairs[pair] = None
+            self._pairs.move_to_end(pair)
+            while len(self._pairs) > self.max_entries:
+                self._pairs.popitem(last=False)
+                self.complete = False
+
+    def __contains__(self, pair: Tuple[str, str]) -> bool:
+        with self._lock:
+            if pair not in self._pairs:
+                return False
+            self._pairs.move_to_end(pair)
+            return True
+
+    def __len__(self) -> int:
+        return len(self._pairs)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pairs.clear()
+            self.complete = True
+            self.synced_until = None
+
+    def load(self, db: Session) -> int:
+        """
+        Fill the cache with the most recent pairs of the database
+
+        Returns:
+            Number of loaded pairs
+        """
+        synced_until = db.query(func.max(Transaction.created_at)).scalar()
+        last_seen = func.max(Transaction.transaction_date)
+        rows = db.query(Transaction.sender_account, Transaction.receiver_account).group_by(
+            Transaction.sender_account, Transaction.receiver_account
+        ).order_by(last_seen.desc()).limit(self.max_entries).all()
+        # Oldest first, so the most recent pairs end up the last evicted
+        for sender_account, receiver_account in reversed(rows):
+            self.add(sender_account, receiver_account)
+        if len(rows) >= self.max_entries:
+            self.complete = False
+        self.synced_until = synced_until
+        return len(rows)
+
+    def refresh(self, db: Session) -> int:
+        """
+        Add the pairs of the transactions created since the last load or refresh
+
+        Returns:
+            Number of pairs read
+        """
+        if self.synced_until is None:
+            return self.load(db)
+        rows = db.query(
+            Transaction.sender_account, Transaction.receiver_account, func.max(Transaction.created_at)
+        ).filter(
+            Transaction.created_at >= self.synced_until - self.REFRESH_OVERLAP
+        ).group_by(Transaction.sender_account, Transaction.receiver_account).all()
+        for sender_account, receiver_account, created_at in rows:
+            self.add(sender_account, receiver_account)
+            if created_at is not None and created_at > self.synced_until:
+                self.synced_until = created_at
+        return len(rows)
+
+
+class RealtimeScorer:
+    """
+    Scoring temps reel avant autorisation
+
+    Same rules, weights and boosters as FraudDetectionService.analyze_transaction,
+    evaluated from memory only. The ML latency is tracked with an EWMA; above
+    the budget the ML step is skipped (neutral score, as when no model is
+    loaded) until a periodic probe runs within budget again.
+
+    The pair cache is per worker: pairs written by other API workers, the
+    ingestion worker, rescoring or the seed are only seen after the next
+    refresh (every pair_refresh_interval seconds, start_refresh). A missing
+    pair counts as a new beneficiary only while the cache is complete and
+    its last refresh is recent; otherwise the beneficiary history is
+    unknown and adds no points. Size realtime_pair_cache_size above the
+    number of distinct account pairs to keep the rule active.
+    """
+
+    EWMA_ALPHA = 0.2
+    # Refreshes missed before cache misses stop counting as new beneficiaries
+    MAX_MISSED_REFRESHES = 3
+
+    def __init__(
+        self,
+        service: FraudDetectionService,
+        ml_budget_ms: float = 5.0,
+        probe_interval: float = 5.0,
+        pair_cache_size: int = 200_000,
+        pair_refresh_interval: Optional[float] = None,
+        clock: Callable[[], float] = time.perf_counter
+    ):
+        self.service = service
+        self.ml_budget_ms = ml_budget_ms
+        self.probe_interval = probe_interval
+        self.pairs = PairCache(pair_cache_size)
+        self.pair_refresh_interval = pair_refresh_interval  # None: fed by this process only
+        self.clock = clock
+        self._pairs_synced_at: Optional[float] = None
+        self._refresh_stop = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+        self.ml_latency_ms: Optional[float] = None
+        self.degraded = False
+        self._last_probe = 0.0
+        self._forest: Optional[CompiledForest] = None
+        self._compiled_for: Optional[int] = None
+        self._encoders: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def warm_up(self, session_factory: Callable[[], Session]) -> int:
+        """Compile the model and load the pair cache; returns the number of pairs"""
+        self._compiled_forest()
+        db = session_factory()
+        try:
+            loaded = self.pairs.load(db)
+        finally:
+            db.close()
+        self._pairs_synced_at = self.clock()
+        return loaded
+
+    def refresh_pairs(self, session_factory: Callable[[], Session]) -> int:
+        """Add the pairs created since the last sync; returns the number read"""
+        db = session_factory()
+        try:
+            count = self.pairs.refresh(db)
+        finally:
+            db.close()
+        self._pairs_synced_at = self.clock()
+        return count
+
+    def start_refresh(self, session_factory: Callable[[], Session]) -> None:
+        """Refresh the pair cache every pair_refresh_interval seconds in a background thread"""
+        if not self.pair_refresh_interval or self._refresh_thread is not None:
+            return
+        self._refresh_stop.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_loop, args=(session_factory,), name="realtime-pairs", daemon=True
+        )
+        self._refresh_thread.start()
+
+    def stop_refresh(self, timeout: float = 10.0) -> None:
+        self._refresh_stop.set()
+        if self._refresh_thread is None:
+            return
+        self._refresh_thread.join(timeout)
+        self._refresh_thread = None
+
+    def _refresh_loop(self, session_factory: Callable[[], Session]) -> None:
+        while not self._refresh_stop.wait(self.pair_refresh_interval):
+            try:
+                self.refresh_pairs(session_factory)
+            except Exception as e:
+                logger.warning(f"[REALTIME] Rafraichissement des paires impossible: {e}")
+
+    def record_transaction(self, transaction: Any) -> None:
+        """Keep the pair cache in sync with a created transaction"""
+        self.pairs.add(transaction.sender_account, transaction.receiver_account)
+
+    def pairs_authoritative(self) -> bool:
+        """Whether a pair missing from the cache is a new beneficiary (see class docstring)"""
+        if not self.pairs.complete:
+            return False
+        if self.pair_refresh_interval is None:
+            return True
+        if self._pairs_synced_at is None:
+            return False
+        max_age = self.pair_refresh_interval * self.MAX_MISSED_REFRESHES
+        return self.clock() - self._pairs_synced_at <= max_age
+
+    def _compiled_forest(self) -> Optional[CompiledForest]:
+        """Compiled copy of the current model, rebuilt when the model changes"""
+        model, scaler = self.service.model, self.service.scaler
+        if model is None or scaler is None:
+            return None
+        key = id(model)
+        if self._compiled_for != key:
+            with self._lock:
+                if self._compiled_for != key:
+                    self._encoders = {
+                        name: self._encoder_mapping(name)
+                        for name in ('channel', 'transaction_type')
+                    }
+                    self._forest = CompiledForest(model, scaler)
+                    self._compiled_for = key
+                    logger.info(f"[REALTIME] Modele compile: {len(self._forest.rows)} arbres")
+        return self._forest
+
+    def _encoder_mapping(self, name: str) -> Dict[str, int]:
+        # Fits the default encoder if the model was saved without it
+        self.service._encode_categorical(name, '')
+        return {value: index for index, value in enumerate(self.service.label_encoders[name].classes_)}
+
+    def _prepare_features(self, transaction: Any) -> np.ndarray:
+        """Same features as FraudDetectionService._prepare_features, without the encoders"""
+        amount = float(transaction.amount)
+        hour = transaction.transaction_date.hour
+        day_of_week = transaction.transaction_date.weekday()
+        dest = transaction.country_destination or 'FRA'
+        return np.array([
+            amount,
+            np.log1p(amount),
+            hour,
+            day_of_week,
+            1 if day_of_week >= 5 else 0,
+            1 if hour in SUSPICIOUS_HOURS else 0,
+            1 if transaction.country_origin != dest else 0,
+            HIGH_RISK_COUNTRIES.get(dest, MEDIUM_RISK_COUNTRIES.get(dest, 0)),
+            1 if dest in HIGH_RISK_COUNTRIES else 0,
+            self._encoders['channel'].get(transaction.channel or 'web', 0),
+            self._encoders['transaction_type'].get(transaction.transaction_type, 0),
+            1 if amount % 100 == 0 else 0,
+            1 if amount > 5000 else 0,
+            1 if amount > 10000 else 0,
+        ], dtype=np.float64)
+
+    def _ml_allowed(self) -> bool:
+        if not self.degraded:
+            return True
+        now = self.clock()
+        if now - self._last_probe >= self.probe_interval:
+            self._last_probe = now
+            return True
+        return False
+
+    def _record_ml_latency(self, elapsed_ms: float, probe: bool) -> None:
+        if probe and elapsed_ms <= self.ml_budget_ms:
+            # A probe within budget restores the ML path right away
+            self.ml_latency_ms = elapsed_ms
+        elif self.ml_latency_ms is None:
+            self.ml_latency_ms = elapsed_ms
+        else:
+            self.ml_latency_ms += self.EWMA_ALPHA * (elapsed_ms - self.ml_latency_ms)
+
+        degraded = self.ml_latency_ms > self.ml_budget_ms
+        if degraded and not self.degraded:
+            logger.warning(f"[REALTIME] Latence ML {self.ml_latency_ms:.2f} ms > {self.ml_budget_ms} ms: regles seules")
+            self._last_probe = self.clock()
+        elif self.degraded and not degraded:
+            logger.info(f"[REALTIME] Latence ML revenue sous le budget ({self.ml_latency_ms:.2f} ms)")
+        self.degraded = degraded
+
+    def _ml_analysis(self, transaction: Any) -> Tuple[float, List[str], bool]:
+        """ML step with the latency guard; returns (score, factors, ml_used)"""
+        forest = self._compiled_forest()
+        if forest is None:
+            return 50.0, ["Modele ML en cours de chargement"], False
+
+        probe = self.degraded
+        if not self._ml_allowed():
+            return 50.0, ["Analyse IA non evaluee (budget de latence depasse)"], False
+
+        started = self.clock()
+        score_raw = forest.score_samples(self._prepare_features(transaction))
+        self._record_ml_latency((self.clock() - started) * 1000, probe)
+
+        ml_score = max(0, min(100, 50 - (score_raw * 100)))
+        if score_raw < forest.offset:
+            return max(ml_score, 65), ["Comportement anormal detecte par l'IA (IsolationForest)"], True
+        return ml_score, [], True
+
+    def score(self, transaction: Any) -> Dict[str, Any]:
+        """
+        Score a transaction payload (TransactionCreate or Transaction)
+
+        Returns:
+            fraud_score, is_suspicious, risk_level, factors, ml_used,
+            degraded and latency_ms
+        """
+        started = self.clock()
+        service = self.service
+
+        ml_score, all_factors, ml_used = self._ml_analysis(transaction)
+        all_factors = list(all_factors)
+        # Without an authoritative cache, the beneficiary history is unknown (no points)
+        known_pairs = self.pairs if self.pairs_authoritative() else None
+        score_components = [('Modele IA', ml_score, 0.35)]
+        for label, weight, (score, factors) in (
+            ('Montant', 0.25, service._analyze_amount(transaction)),
+            ('Geographie', 0.20, service._analyze_geography(transaction)),
+            ('Horaire', 0.10, service._analyze_timing(transaction)),
+            ('Beneficiaire', 0.10, service._analyze_beneficiary(transaction, known_pairs=known_pairs)),
+        ):
+            score_components.append((label, score, weight))
+            all_factors.extend(factors)
+
+        final_score = sum(score * weight for _, score, weight in score_components)
+        final_score = service._apply_risk_boosters(final_score, all_factors, transaction, verbose=False)
+        final_score = min(100, max(0, final_score))
+
+        is_suspicious = final_score >= service.threshold
+        risk_level = service._get_risk_level(final_score)
+        if is_suspicious:
+            all_factors.append(f"Score de risque global: {final_score:.0f}/100 ({risk_level.upper()})")
+
+        elapsed = self.clock() - started
+        REALTIME_SCORING_DURATION.labels(mode="full" if ml_used else "rules_only").observe(elapsed)
+
+        return {
+            "fraud_score": int(round(final_score)),
+            "is_suspicious": is_suspicious,
+            "risk_level": risk_level,
+            "factors": all_factors,
+            "ml_used": ml_used,
+            "degraded": self.degraded,
+            "latency_ms": round(elapsed * 1000, 3)
+        }
+
+    def get_status(self) -> dict:
+        return {
+            "model_compiled": self._forest is not None,
+            "degraded": self.degraded,
+            "ml_latency_ms": round(self.ml_latency_ms, 3) if self.ml_latency_ms is not None else None,
+            "ml_budget_ms": self.ml_budget_ms,
+            "known_pairs": len(self.pairs),
+            "pairs_complete": self.pairs.complete,
+            "pairs_authoritative": self.pairs_authoritative()
+        }
+
+
+# Instance singleton
+realtime_scorer = RealtimeScorer(
+    fraud_detection_service,
+    ml_budget_ms=settings.realtime_ml_budget_ms,
+    probe_interval=settings.realtime_probe_interval,
+    pair_cache_size=settings.realtime_pair_cache_size,
+    pair_refresh_interval=settings.realtime_pair_refresh_seconds
+)
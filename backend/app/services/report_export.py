@@ -0,0 +1,193 @@
+"""
+CSV / NDJSON export of transactions for compliance reporting
+Rows are read through a server-side cursor by chunks and serialized row
+by row, memory stays constant whatever the size of the extract
+"""
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Iterator, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.config import settings
+from app.models.transaction import Transaction
+from app.services.explanation_templates import FallbackExplanationEngine, fallback_explanation_engine
+from app.utils.responses import dumps
+
+
+# Format -> (media type, file extension)
+REPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+DEFAULT_REPORT_COLUMNS = [
+    "transaction_ref", "transaction_date", "amount", "currency", "transaction_type", "channel",
+    "sender_name", "sender_account", "receiver_name", "receiver_account",
+    "country_origin", "country_destination", "fraud_score", "is_suspicious", "is_confirmed_fraud",
+    "status", "ai_explanation", "generated_explanation", "reviewed_by", "reviewed_at", "review_notes",
+]
+
+# Computed column: rule-based explanation of the scored rows without a stored one.
+# Kept apart from ai_explanation, which only ever holds what the analysis stored
+GENERATED_EXPLANATION_COLUMN = "generated_explanation"
+REPORT_EXTRA_COLUMNS = [GENERATED_EXPLANATION_COLUMN]
+
+# Inputs of the generated explanation
+EXPLANATION_SOURCE_COLUMNS = [
+    "amount", "fraud_score", "country_origin", "country_destination", "transaction_date", "receiver_name",
+]
+
+
+def _json_value(value):
+    """Same representation as the API responses"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    return value
+
+
+# A spreadsheet runs a cell starting with these as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        # Names, descriptions and notes come from external payloads (CSV injection)
+        return "'" + value
+    return value
+
+
+class ReportExporter:
+    """
+    Transactions as CSV or NDJSON, streamed by chunks
+
+    ai_explanation is exported as stored. Scored rows without a stored
+    explanation get the rule-based one (FallbackExplanationEngine) in the
+    separate generated_explanation column, the text the analysis would
+    have returned with the LLM unavailable.
+    """
+
+    def __init__(self, explanation_engine: FallbackExplanationEngine, chunk_size: int = 10000):
+        self.explanation_engine = explanation_engine
+        self.chunk_size = chunk_size
+
+    def build_query(self, columns: List[str]) -> Select:
+        """Select of the exported columns and the explanation inputs, stable order"""
+        table = Transaction.__table__
+        names = [name for name in columns if name != GENERATED_EXPLANATION_COLUMN]
+        if GENERATED_EXPLANATION_COLUMN in columns:
+            names += [name for name in ["ai_explanation", *EXPLANATION_SOURCE_COLUMNS] if name not in names]
+        return select(*[table.c[name] for name in names]).order_by(table.c.transaction_date, table.c.id)
+
+    def iter_chunks(
+        self,
+        session_factory: Callable[[], Session],
+        stmt: Select,
+        columns: List[str]
+    ) -> Iterator[List[tuple]]:
+        """
+        Exported rows (values of columns, in order) by chunks of chunk_size
+
+        Args:
+            stmt: build_query() result, filters applied
+        """
+        db = session_factory()
+        try:
+            result = db.execute(stmt.execution_options(yield_per=self.chunk_size))
+            names = list(result.keys())
+            generated_at = columns.index(GENERATED_EXPLANATION_COLUMN) if GENERATED_EXPLANATION_COLUMN in columns else None
+            # The generated column has no source value, it is filled below
+            selected = [names.index(name) if name in names else None for name in columns]
+            if generated_at is not None:
+                stored = names.index("ai_explanation")
+                sources = [names.index(name) for name in EXPLANATION_SOURCE_COLUMNS]
+            for rows in result.partitions():
+                exported = [[None if i is None else row[i] for i in selected] for row in rows]
+                if generated_at is not None:
+                    self._fill_explanations(rows, exported, generated_at, stored, sources)
+                yield exported
+        finally:
+            db.close()
+
+    def _fill_explanations(self, rows, exported: List[list], position: int, stored: int, sources: List[int]) -> None:
+        """Rule-based explanation of the scored rows that have none, by chunk"""
+        amount, fraud_score, origin, destination, date, receiver = sources
+        missing = [k for k, row in enumerate(rows) if row[stored] is None and row[fraud_score] is not None]
+        if not missing:
+            return
+        explanations = self.explanation_engine.explain_columns(
+            amounts=[float(rows[k][amount]) for k in missing],
+            fraud_scores=[rows[k][fraud_score] for k in missing],
+            origins=[rows[k][origin] for k in missing],
+            destinations=[rows[k][destination] for k in missing],
+            dates=[rows[k][date] for k in missing],
+            receivers=[rows[k][receiver] for k in missing],
+            risk_factors=[None] * len(missing)
+        )
+        for k, explanation in zip(missing, explanations):
+            exported[k][position] = explanation
+
+    def _serializer(self, columns: List[str], fmt: str) -> Tuple[bytes, Callable[[List[list]], bytes]]:
+        """Header and chunk serializer of a format, UTF-8 encoded"""
+        if fmt == "csv":
+            def serialize(rows: List[list]) -> bytes:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows([_csv_value(value) for value in row] for row in rows)
+                return buffer.getvalue().encode("utf-8")
+            return serialize([columns]), serialize
+
+        def serialize(rows: List[list]) -> bytes:
+            return b"".join(dumps(dict(zip(columns, map(_json_value, row)))) + b"\n" for row in rows)
+        return b"", serialize
+
+    def stream(
+        self,
+        session_factory: Callable[[], Session],
+        stmt: Select,
+        columns: List[str],
+        fmt: str = "csv"
+    ) -> Iterator[bytes]:
+        """File content by pieces, one per chunk (StreamingResponse body)"""
+        header, serialize = self._serializer(columns, fmt)
+        if header:
+            yield header
+        for rows in self.iter_chunks(session_factory, stmt, columns):
+            yield serialize(rows)
+
+    def write(
+        self,
+        session_factory: Callable[[], Session],
+        stmt: Select,
+        columns: List[str],
+        path: str,
+        fmt: str = "csv"
+    ) -> int:
+        """
+        Write the export to a file
+
+        Returns:
+            Number of exported rows
+        """
+        header, serialize = self._serializer(columns, fmt)
+        count = 0
+        with open(path, "wb") as f:
+            f.write(header)
+            for rows in self.iter_chunks(session_factory, stmt, columns):
+                f.write(serialize(rows))
+                count += len(rows)
+        return count
+
+
+# Instance singleton
+report_exporter = ReportExporter(fallback_explanation_engine, chunk_size=settings.export_chunk_size)
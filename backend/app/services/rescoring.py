@@ -0,0 +1,207 @@
+"""
+Background rescoring of pending transactions
+Claims unscored transactions with SELECT ... FOR UPDATE SKIP LOCKED,
+scores them by batches and persists the results in bulk
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.metrics import RESCORED_TRANSACTIONS, RESCORING_BATCH_DURATION
+from app.models.transaction import Transaction, TransactionStatus
+from app.services.explanation_queue import explanation_queue
+from app.services.fraud_detection import fraud_detection_service
+
+
+# Called after each committed batch with the scored transactions, e.g. to
+# queue their LLM explanations outside of the scoring path
+ScoredHandler = Callable[[List[Tuple[Transaction, Tuple[int, bool, List[str]]]]], None]
+
+
+def claim_pending_statement(batch_size: int):
+    """
+    Oldest unscored transactions, locked for the current database transaction
+
+    SKIP LOCKED lets several workers claim disjoint batches: rows locked by
+    another worker are skipped instead of waited for. The clause is ignored
+    by databases without row locks (SQLite).
+    """
+    return (
+        select(Transaction)
+        .where(Transaction.status == TransactionStatus.PENDING.value)
+        .where(Transaction.fraud_score.is_(None))
+        .order_by(Transaction.created_at, Transaction.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+
+class RescoringJob:
+    """
+    Scores the transactions left pending by bulk ingestion or by a failed
+    inline analysis
+
+    Each batch is claimed, scored and updated in a single database
+    transaction: the row locks are held for the few milliseconds of batched
+    scoring and a crash releases them with the rollback, leaving the rows
+    pending for the next worker. LLM explanations are not generated here,
+    the optional on_scored handler hands them to a lower-priority queue.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        service,
+        batch_size: int = 500,
+        interval: float = 5.0,
+        on_scored: Optional[ScoredHandler] = None
+    ):
+        self.session_factory = session_factory
+        self.service = service
+        self.batch_size = batch_size
+        self.interval = interval
+        self.on_scored = on_scored
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.scored_count = 0
+        self.batch_count = 0
+        self.failed_count = 0
+        self.last_batch_at: Optional[datetime] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def run_once(self) -> int:
+        """
+        Claim, score and persist one batch
+
+        Returns:
+            Number of transactions scored (0 when the backlog is empty)
+        """
+        db = self.session_factory()
+        try:
+            started = time.perf_counter()
+            transactions = db.execute(claim_pending_statement(self.batch_size)).scalars().all()
+            if not transactions:
+                db.rollback()
+                return 0
+
+            results = self.service.score_batch(transactions, db)
+            analysis_date = datetime.utcnow()
+            # A score written meanwhile (analyst analysis, database without
+            # row locks) is kept
+            db.execute(
+                update(Transaction.__table__)
+                .where(Transaction.__table__.c.id == bindparam("row_id"))
+                .where(Transaction.__table__.c.fraud_score.is_(None))
+                .values(
+                    fraud_score=bindparam("fraud_score"),
+                    is_suspicious=bindparam("is_suspicious"),
+                    analysis_date=bindparam("analysis_date"),
+                    status=bindparam("status")
+                ),
+                [
+                    {
+                        "row_id": t.id,
+                        "fraud_score": fraud_score,
+                        "is_suspicious": is_suspicious,
+                        "analysis_date": analysis_date,
+                        "status": TransactionStatus.ANALYZED.value
+                    }
+                    for t, (fraud_score, is_suspicious, _) in zip(transactions, results)
+                ]
+            )
+            # Detached before the commit so the handler can read them unexpired
+            db.expunge_all()
+            db.commit()
+            RESCORING_BATCH_DURATION.observe(time.perf_counter() - started)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self.scored_count += len(transactions)
+        self.batch_count += 1
+        self.last_batch_at = analysis_date
+        RESCORED_TRANSACTIONS.inc(len(transactions))
+
+        if self.on_scored:
+            try:
+                self.on_scored(list(zip(transactions, results)))
+            except Exception as e:
+                logger.warning(f"[RESCORING] Mise en file des explications impossible: {e}")
+        return len(transactions)
+
+    def drain(self, max_batches: Optional[int] = None) -> int:
+        """Score batches until the backlog is empty, returns the number scored"""
+        total = 0
+        batches = 0
+        while not self._stop_event.is_set() and (max_batches is None or batches < max_batches):
+            count = self.run_once()
+            total += count
+            batches += 1
+            if count < self.batch_size:
+                break
+        return total
+
+    def start(self) -> None:
+        """Start polling in a background thread"""
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="rescoring", daemon=True)
+        self._thread.start()
+        logger.info(f"[RESCORING] Rescoring en arriere-plan demarre (lots de {self.batch_size})")
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Stop after the batch in progress"""
+        self._stop_event.set()
+        if self._thread is None:
+            return
+        self._thread.join(timeout)
+        self._thread = None
+        logger.info(f"[RESCORING] Rescoring arrete - {self.scored_count} transaction(s) scoree(s)")
+
+    def run_forever(self) -> None:
+        """Poll in the calling thread until stop() is called"""
+        self._stop_event.clear()
+        self._run()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.drain()
+            except Exception as e:
+                self.failed_count += 1
+                logger.error(f"[RESCORING] Echec du lot: {e}")
+            # Full batches are chained, the interval only applies once drained
+            self._stop_event.wait(self.interval)
+
+    def get_status(self) -> dict:
+        return {
+            "running": self.is_running,
+            "batch_size": self.batch_size,
+            "scored": self.scored_count,
+            "batches": self.batch_count,
+            "failed": self.failed_count,
+            "last_batch_at": self.last_batch_at.isoformat() if self.last_batch_at else None,
+        }
+
+
+# Instance singleton
+rescoring_job = RescoringJob(
+    SessionLocal,
+    fraud_detection_service,
+    batch_size=settings.rescoring_batch_size,
+    interval=settings.rescoring_interval,
+    on_scored=explanation_queue.enqueue_scored if settings.explanation_queue_enabled else None
+)
@@ -0,0 +1,49 @@
+"""
+Filters of the transaction list, shared by the API and the export script
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.sql import Select
+
+from app.models.transaction import Transaction
+
+
+def apply_transaction_filters(
+    stmt: Select,
+    status: Optional[str] = None,
+    is_suspicious: Optional[bool] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    search: Optional[str] = None
+) -> Select:
+    """Apply the transaction list filters to a select statement"""
+    if status:
+        stmt = stmt.where(Transaction.status == status)
+    
+    if is_suspicious is not None:
+        stmt = stmt.where(Transaction.is_suspicious == is_suspicious)
+    
+    if min_amount:
+        stmt = stmt.where(Transaction.amount >= min_amount)
+    
+    if max_amount:
+        stmt = stmt.where(Transaction.amount <= max_amount)
+    
+    if start_date:
+        stmt = stmt.where(Transaction.transaction_date >= start_date)
+    
+    if end_date:
+        stmt = stmt.where(Transaction.transaction_date <= end_date)
+    
+    if search:
+        search_term = f"%{search}%"
+        stmt = stmt.where(
+            (Transaction.transaction_ref.ilike(search_term)) |
+            (Transaction.sender_name.ilike(search_term)) |
+            (Transaction.receiver_name.ilike(search_term))
+        )
+    
+    return stmt
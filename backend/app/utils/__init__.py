@@ -5,10 +5,18 @@ from app.utils.security import (
     verify_password,
     get_password_hash,
     create_access_token,
-    decode_access_token
+    create_stream_token,
+    decode_access_token,
+    PasswordHasher,
+    PasswordHasherBusy,
+    password_hasher
 )
+from app.utils.principal_cache import PrincipalCache, principal_cache
+from app.utils.responses import FastJSONResponse, ModelJSONResponse
+from app.utils.dates import as_utc
 from app.utils.dependencies import (
     get_current_user,
+    get_stream_user,
     get_current_active_user,
     get_admin_user,
     check_role
@@ -18,8 +26,18 @@ __all__ = [
     "verify_password",
     "get_password_hash",
     "create_access_token",
+    "create_stream_token",
     "decode_access_token",
+    "PasswordHasher",
+    "PasswordHasherBusy",
+    "password_hasher",
+    "PrincipalCache",
+    "principal_cache",
+    "FastJSONResponse",
+    "ModelJSONResponse",
+    "as_utc",
     "get_current_user",
+    "get_stream_user",
     "get_current_active_user",
     "get_admin_user",
     "check_role"
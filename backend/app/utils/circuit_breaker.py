@@ -0,0 +1,156 @@
+"""
+Circuit breaker with an adaptive timeout for slow dependencies (Ollama)
+"""
+from collections import deque
+from typing import Callable, Optional
+import threading
+import time
+
+import numpy as np
+
+from app.metrics import LLM_CIRCUIT_TRANSITIONS
+
+
+class CircuitBreaker:
+    """
+    Fails fast while a dependency is down or overloaded
+
+    - closed: calls go through; failures and slow calls in a row are counted
+    - open: after failure_threshold of them, calls are refused for
+      recovery_timeout seconds
+    - half_open: then a single probe call is let through, its success
+      closes the circuit and its failure opens it again
+
+    The call timeout follows the observed latency: a percentile of the
+    recent successful calls times a margin, bounded by min_timeout and the
+    caller's maximum, so that an overloaded dependency is detected in
+    seconds instead of at the maximum timeout.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        slow_call_seconds: float = 30.0,
+        recovery_timeout: float = 30.0,
+        min_timeout: float = 5.0,
+        timeout_percentile: float = 99.0,
+        timeout_multiplier: float = 2.0,
+        min_samples: int = 20,
+        window: int = 200,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.recovery_timeout = recovery_timeout
+        self.min_timeout = min_timeout
+        self.timeout_percentile = timeout_percentile
+        self.timeout_multiplier = timeout_multiplier
+        self.min_samples = min_samples
+        self.clock = clock
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_started_at: Optional[float] = None
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.rejected_count = 0
+        self.open_count = 0
+
+    def allow_request(self, max_timeout: float) -> bool:
+        """Whether a call may be attempted now (False: use the fallback)"""
+        with self._lock:
+            now = self.clock()
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and now - self.opened_at >= self.recovery_timeout:
+                self._transition(self.HALF_OPEN)
+            # One probe at a time; a probe that never reported is given up after its timeout
+            if self.state == self.HALF_OPEN and (
+                self.probe_started_at is None or now - self.probe_started_at > max_timeout
+            ):
+                self.probe_started_at = now
+                return True
+            self.rejected_count += 1
+            return False
+
+    def is_available(self, max_timeout: float) -> bool:
+        """Whether allow_request would let a call through now, without changing the state"""
+        with self._lock:
+            now = self.clock()
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                return now - self.opened_at >= self.recovery_timeout
+            return self.probe_started_at is None or now - self.probe_started_at > max_timeout
+
+    def retry_in(self, max_timeout: float) -> float:
+        """Seconds before is_available becomes True, 0 when it already is"""
+        with self._lock:
+            now = self.clock()
+            if self.state == self.CLOSED:
+                return 0.0
+            if self.state == self.OPEN:
+                return max(0.0, self.recovery_timeout - (now - self.opened_at))
+            if self.probe_started_at is None:
+                return 0.0
+            return max(0.0, max_timeout - (now - self.probe_started_at))
+
+    def record_success(self, duration: float) -> None:
+        """Report a completed call, slow calls count as failures"""
+        if duration > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            self._latencies.append(duration)
+            self.consecutive_failures = 0
+            if self.state != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        """Report a failed call (error, timeout, overload)"""
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold
+            ):
+                self.opened_at = self.clock()
+                self._transition(self.OPEN)
+
+    def current_timeout(self, max_timeout: float) -> float:
+        """Timeout of the next call: latency percentile with a margin"""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return max_timeout
+            observed = float(np.percentile(self._latencies, self.timeout_percentile))
+        return min(max_timeout, max(self.min_timeout, observed * self.timeout_multiplier))
+
+    def _transition(self, state: str) -> None:
+        self.state = state
+        self.probe_started_at = None
+        if state == self.OPEN:
+            self.open_count += 1
+        LLM_CIRCUIT_TRANSITIONS.labels(breaker=self.name, state=state).inc()
+
+    def get_status(self, max_timeout: float) -> dict:
+        with self._lock:
+            state = self.state
+            retry_in = None
+            if state == self.OPEN:
+                retry_in = round(max(0.0, self.recovery_timeout - (self.clock() - self.opened_at)), 1)
+            latencies = list(self._latencies)
+        return {
+            "state": state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in_seconds": retry_in,
+            "opened": self.open_count,
+            "rejected": self.rejected_count,
+            "timeout_seconds": round(self.current_timeout(max_timeout), 2),
+            "latency_p50_seconds": round(float(np.percentile(latencies, 50)), 3) if latencies else None,
+            "latency_p99_seconds": round(float(np.percentile(latencies, 99)), 3) if latencies else None,
+        }
@@ -0,0 +1,9 @@
+"""
+Date helpers
+"""
+from datetime import datetime, timezone
+
+
+def as_utc(value: datetime) -> datetime:
+    """Naive datetimes (event times, SQLite columns) are taken as UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
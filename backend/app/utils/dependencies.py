@@ -1,25 +1,28 @@
 """
 FastAPI dependencies for authentication and authorization
 """
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User, UserRole
-from app.utils.security import decode_access_token
+from app.utils.principal_cache import principal_cache
+from app.utils.security import STREAM_TOKEN_SCOPE
 
 # Security scheme
 security = HTTPBearer()
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+async def resolve_user_from_token(token: str, db: AsyncSession, scope: Optional[str] = None) -> User:
     """
-    Dependency to get the current authenticated user from JWT token
+    Resolve the user owning a JWT token
+    
+    Args:
+        token: JWT token
+        db: Database session
+        scope: Expected scope claim, None for access tokens
     
     Raises:
         HTTPException: If token is invalid or user not found
@@ -30,19 +33,27 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token = credentials.credentials
-    payload = decode_access_token(token)
+    payload = principal_cache.decode_token(token)
     
-    if payload is None:
+    if payload is None or payload.get("scope") != scope:
         raise credentials_exception
     
     email: str = payload.get("sub")
     if email is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise credentials_exception
+    user = principal_cache.get_user(user_id=payload.get("user_id"), email=email)
+    if user is None or user.email != email:
+        # Imported here: the auth service depends on app.utils.security
+        from app.services.auth_service import AsyncAuthService
+        
+        user = await AsyncAuthService(db).get_user_by_email(email)
+        if user is None:
+            raise credentials_exception
+        
+        # Detach so that the cached instance is never expired by a session
+        db.expunge(user)
+        principal_cache.set_user(user)
     
     if not user.is_active:
         raise HTTPException(
@@ -53,6 +64,33 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Dependency to get the current authenticated user from JWT token
+    
+    Raises:
+        HTTPException: If token is invalid or user not found
+    """
+    return await resolve_user_from_token(credentials.credentials, db)
+
+
+async def get_stream_user(
+    token: str = Query(..., description="Stream token (POST /auth/stream-token)"),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Dependency for event streams authenticated by query parameter
+    
+    EventSource cannot send an Authorization header, so the token is
+    passed in the URL instead. Only short-lived stream tokens are
+    accepted here, never access tokens.
+    """
+    return await resolve_user_from_token(token, db, scope=STREAM_TOKEN_SCOPE)
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
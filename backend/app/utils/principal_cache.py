@@ -0,0 +1,121 @@
+"""
+In-process cache of authenticated principals
+"""
+from sqlalchemy import event
+from typing import Dict, Optional, Tuple
+import hashlib
+import threading
+import time
+
+from app.config import settings
+from app.models.user import User
+from app.utils.security import decode_access_token
+
+
+class PrincipalCache:
+    """
+    Short-lived cache of authenticated users and decoded tokens
+    
+    Users are cached by id and email for a few seconds, detached from any
+    session, so that authenticating a request costs no database query.
+    Decoded token payloads are memoized by token hash until they expire.
+    Users are evicted as soon as they are updated or deleted through the
+    ORM in this process; the TTL bounds staleness across workers.
+    """
+    
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl = ttl_seconds if ttl_seconds is not None else settings.auth_cache_ttl
+        self.max_entries = max_entries or settings.auth_cache_max_entries
+        self._users: Dict[str, Tuple[float, User]] = {}
+        self._emails: Dict[str, str] = {}
+        self._tokens: Dict[str, Tuple[float, dict]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def decode_token(self, token: str) -> Optional[dict]:
+        """Decode a JWT token, memoized by hash until its expiry"""
+        key = hashlib.sha256(token.encode()).hexdigest()
+        now = time.time()
+        with self._lock:
+            cached = self._tokens.get(key)
+            if cached and cached[0] > now:
+                return cached[1]
+        
+        payload = decode_access_token(token)
+        if payload is None or "exp" not in payload:
+            return payload
+        
+        with self._lock:
+            if len(self._tokens) >= self.max_entries:
+                self._evict(self._tokens, now)
+            self._tokens[key] = (float(payload["exp"]), payload)
+        return payload
+    
+    def get_user(self, user_id: Optional[str] = None, email: Optional[str] = None) -> Optional[User]:
+        """Get a cached user by id, or by email"""
+        now = time.time()
+        with self._lock:
+            key = user_id or self._emails.get(email)
+            cached = self._users.get(key) if key else None
+            if cached and cached[0] > now:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+            return None
+    
+    def set_user(self, user: User) -> None:
+        """Cache a user; the instance must be detached from its session"""
+        if self.ttl <= 0:
+            return
+        now = time.time()
+        key = str(user.id)
+        with self._lock:
+            if len(self._users) >= self.max_entries:
+                self._evict(self._users, now)
+            self._users[key] = (now + self.ttl, user)
+            self._emails[user.email] = key
+    
+    def invalidate_user(self, user_id: Optional[str] = None, email: Optional[str] = None) -> None:
+        """Evict a user, e.g. after deactivation or a role change"""
+        with self._lock:
+            key = str(user_id) if user_id else self._emails.get(email)
+            cached = self._users.pop(key, None) if key else None
+            if cached:
+                self._emails.pop(cached[1].email, None)
+            if email:
+                self._emails.pop(email, None)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+            self._emails.clear()
+            self._tokens.clear()
+    
+    def _evict(self, entries: Dict[str, Tuple[float, object]], now: float) -> None:
+        """Drop expired entries, then the oldest ones if still full"""
+        for key in [k for k, (expires, _) in entries.items() if expires <= now]:
+            del entries[key]
+        while len(entries) >= self.max_entries:
+            del entries[next(iter(entries))]
+        if entries is self._users:
+            self._emails = {email: key for email, key in self._emails.items() if key in self._users}
+    
+    def get_status(self) -> dict:
+        return {
+            "users": len(self._users),
+            "tokens": len(self._tokens),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Instance singleton
+principal_cache = PrincipalCache()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target: User) -> None:
+    """Evict users whose account changed (is_active, role, email...)"""
+    principal_cache.invalidate_user(user_id=target.id, email=target.email)
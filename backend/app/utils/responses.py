@@ -0,0 +1,67 @@
+"""
+JSON responses for high-volume endpoints
+"""
+import json
+from decimal import Decimal
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # Optional: stdlib json is used without it
+    orjson = None
+
+
+def _orjson_default(value: Any) -> Any:
+    """Types orjson does not serialize natively, as jsonable_encoder does"""
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, with orjson when installed (datetime, UUID, numpy natively)"""
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Default response class of the application
+
+    FastAPI still converts the endpoint result to JSON-compatible values,
+    only the final encoding goes through orjson instead of json.dumps.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class ModelJSONResponse(Response):
+    """
+    Pydantic model (or value of a TypeAdapter) serialized in one pass by pydantic-core
+
+    Returned directly by an endpoint, it skips FastAPI's response_model
+    validation, model_dump and jsonable_encoder steps. The content must
+    already be the validated response model.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, content: Any, adapter: Optional[TypeAdapter] = None, **kwargs):
+        self.adapter = adapter
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if self.adapter is not None:
+            return self.adapter.dump_json(content)
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return dumps(content)
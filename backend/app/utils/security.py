@@ -1,16 +1,30 @@
 """
 Security utilities for password hashing and JWT tokens
 """
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from uuid import UUID
+import asyncio
+import threading
+import time
 
 from app.config import settings
 
+# Scope claim of the tokens accepted by the event stream only
+STREAM_TOKEN_SCOPE = "stream"
+
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max rounds pinned to the configured cost so that any other cost needs an update
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -23,6 +37,86 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHasherBusy(Exception):
+    """Raised when too many password operations are already waiting"""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a bounded thread pool
+    
+    bcrypt costs hundreds of milliseconds of CPU per call; running it in
+    worker threads keeps the event loop responsive. Work beyond
+    max_pending is rejected instead of queuing without bound.
+    """
+    
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.max_workers = max_workers or settings.password_hash_workers
+        self.max_pending = max_pending or settings.password_hash_max_pending
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hasher")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.operations = 0
+        self.rejected = 0
+        self.hash_time_total = 0.0
+        self.hash_time_max = 0.0
+        self.queue_time_total = 0.0
+    
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password and return a new hash if the stored one uses
+        an outdated cost
+        """
+        return await self._run(pwd_context.verify_and_update, plain_password, hashed_password)
+    
+    async def hash(self, password: str) -> str:
+        """Hash a password"""
+        return await self._run(pwd_context.hash, password)
+    
+    async def _run(self, func, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self._pending += 1
+        
+        submitted_at = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._timed, submitted_at, func, args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+    
+    def _timed(self, submitted_at: float, func, args):
+        started_at = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            with self._lock:
+                self.operations += 1
+                self.queue_time_total += started_at - submitted_at
+                self.hash_time_total += elapsed
+                self.hash_time_max = max(self.hash_time_max, elapsed)
+    
+    def get_status(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "pending": self._pending,
+                "operations": self.operations,
+                "rejected": self.rejected,
+                "hash_time_avg_ms": round(self.hash_time_total / self.operations * 1000, 1) if self.operations else 0.0,
+                "hash_time_max_ms": round(self.hash_time_max * 1000, 1),
+                "queue_time_avg_ms": round(self.queue_time_total / self.operations * 1000, 1) if self.operations else 0.0,
+            }
+
+
+# Instance singleton
+password_hasher = PasswordHasher()
+
+
 def create_access_token(
     data: dict,
     expires_delta: Optional[timedelta] = None
@@ -53,6 +147,23 @@ def create_access_token(
     return encoded_jwt
 
 
+def create_stream_token(user_id: Union[str, UUID], email: str) -> str:
+    """
+    Create a short-lived JWT token for the event stream
+    
+    EventSource cannot send an Authorization header, so this token ends up
+    in the URL: its scope claim makes it valid for the stream only.
+    """
+    return create_access_token(
+        data={
+            "sub": email,
+            "user_id": str(user_id),
+            "scope": STREAM_TOKEN_SCOPE
+        },
+        expires_delta=timedelta(seconds=settings.stream_token_expire_seconds)
+    )
+
+
 def decode_access_token(token: str) -> Optional[dict]:
     """
     Decode and validate a JWT token
@@ -0,0 +1,76 @@
+"""
+Request-scoped unit of work
+"""
+from fastapi import Depends
+from sqlalchemy.orm import Session
+from typing import Generator, Optional
+from uuid import UUID
+
+from app.database import get_db
+from app.middleware.audit import AuditLogger
+from app.models.audit_log import AuditLog
+
+
+class UnitOfWork:
+    """
+    Groups the state changes of a request and its audit record
+    into a single database transaction
+    
+    Objects stay loaded after commit: the session is closed with the
+    request, so reading them back must not trigger a refresh SELECT.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+        self.db.expire_on_commit = False
+    
+    def add(self, obj) -> None:
+        """Stage a new object"""
+        self.db.add(obj)
+    
+    def delete(self, obj) -> None:
+        """Stage an object deletion"""
+        self.db.delete(obj)
+    
+    def audit(
+        self,
+        user_id: Optional[UUID],
+        action: str,
+        resource_type: str = None,
+        resource_id: UUID = None,
+        details: dict = None,
+        ip_address: str = None,
+        user_agent: str = None
+    ) -> AuditLog:
+        """Stage an audit record, committed atomically with the state changes"""
+        log = AuditLog(**AuditLogger.build_entry(
+            user_id=user_id,
+            action=action,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            details=details,
+            ip_address=ip_address,
+            user_agent=user_agent
+        ))
+        self.db.add(log)
+        return log
+    
+    def commit(self) -> None:
+        """Commit every staged change in one transaction"""
+        self.db.commit()
+    
+    def rollback(self) -> None:
+        self.db.rollback()
+
+
+def get_unit_of_work(db: Session = Depends(get_db)) -> Generator[UnitOfWork, None, None]:
+    """
+    Dependency that provides a unit of work bound to the request session.
+    Uncommitted changes are rolled back if the request fails.
+    """
+    uow = UnitOfWork(db)
+    try:
+        yield uow
+    except Exception:
+        uow.rollback()
+        raise
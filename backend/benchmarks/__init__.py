@@ -0,0 +1,3 @@
+"""
+Benchmark suite for the scoring engine and API hot paths
+"""
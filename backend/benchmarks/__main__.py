@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark command line
+
+Usage (from backend/):
+    python -m benchmarks micro --scale 10k --iterations 2000 -o results/micro.json
+    python -m benchmarks api --base-url http://localhost:8000 --seed-rows 1m -o results/api.json
+    python -m benchmarks api --in-process --seed-rows 10k
+    python -m benchmarks serialization --iterations 500 --page-size 100
+    python -m benchmarks compare results/baseline.json results/micro.json --threshold 0.10
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from loguru import logger
+
+from benchmarks.data import parse_scale
+from benchmarks.runner import build_report, compare_reports, write_report
+
+
+def run_micro_command(args) -> int:
+    from benchmarks.micro import run_micro
+
+    run = run_micro(
+        scale=parse_scale(args.scale),
+        iterations=args.iterations,
+        seed=args.seed,
+        llm_token_latency=args.llm_token_latency,
+        llm_concurrency=args.llm_concurrency
+    )
+    write_report(build_report("micro", run["config"], run["results"]), args.output)
+    return 0
+
+
+def run_serialization_command(args) -> int:
+    from benchmarks.serialization import run_serialization
+
+    run = run_serialization(iterations=args.iterations, page_size=args.page_size, seed=args.seed)
+    write_report(build_report("serialization", run["config"], run["results"]), args.output)
+    return 0
+
+
+def run_api_command(args) -> int:
+    from app.database import SessionLocal
+    from benchmarks.api import WRITE_SCENARIOS, ensure_user, run_api
+    from benchmarks.data import load_transactions
+
+    if args.seed_rows:
+        inserted = load_transactions(SessionLocal, parse_scale(args.seed_rows), seed=args.seed)
+        print(f"💾 {inserted} transactions inserted", file=sys.stderr)
+    ensure_user(SessionLocal, args.email, args.password)
+
+    transport = None
+    if args.in_process:
+        import httpx
+        from app.main import app
+        from app.services.llm_explainer import llm_explainer_service
+        from benchmarks.fake_ollama import create_fake_ollama
+
+        fake_ollama = create_fake_ollama(
+            token_latency=args.llm_token_latency,
+            max_concurrency=args.llm_max_concurrency,
+            seed=args.seed
+        )
+        llm_explainer_service.transport = httpx.ASGITransport(app=fake_ollama)
+        transport = httpx.ASGITransport(app=app)
+
+    scenarios = args.scenarios.split(",") if args.scenarios else None
+    if args.with_writes:
+        scenarios = (scenarios or []) + WRITE_SCENARIOS
+
+    run = asyncio.run(run_api(
+        base_url=args.base_url,
+        email=args.email,
+        password=args.password,
+        iterations=args.iterations,
+        concurrency=args.concurrency,
+        scenarios=scenarios,
+        transport=transport
+    ))
+    run["config"]["seed_rows"] = args.seed_rows
+    write_report(build_report("api", run["config"], run["results"]), args.output)
+    return 0
+
+
+def run_compare_command(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    comparison = compare_reports(baseline, current, threshold=args.threshold, metric=args.metric)
+    for entry in comparison:
+        flag = "❌ REGRESSION" if entry["regression"] else "✅"
+        print(f"{flag} {entry['name']}: {entry['baseline']} -> {entry['current']} ({entry['change_pct']:+.1f}%)")
+    return 1 if any(entry["regression"] for entry in comparison) else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmarks", description="Fraud detection benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    micro = subparsers.add_parser("micro", help="Scoring and explanation micro-benchmarks")
+    micro.add_argument("--scale", default="10k", help="Dataset size: 10k, 1m, 10m or a number")
+    micro.add_argument("--iterations", type=int, default=2000, help="Calls per benchmark")
+    micro.add_argument("--llm-token-latency", type=float, default=0.005, help="Fake Ollama latency per token (s)")
+    micro.add_argument("--llm-concurrency", type=int, default=4)
+
+    api = subparsers.add_parser("api", help="End-to-end API load scenarios")
+    api.add_argument("--base-url", default="http://localhost:8000")
+    api.add_argument("--in-process", action="store_true", help="Call the app through ASGI with the fake Ollama")
+    api.add_argument("--seed-rows", help="Insert a generated dataset first: 10k, 1m, 10m or a number")
+    api.add_argument("--email", default="bench@bpce.fr")
+    api.add_argument("--password", default="Bench123!")
+    api.add_argument("--iterations", type=int, default=500, help="Requests per scenario")
+    api.add_argument("--concurrency", type=int, default=16)
+    api.add_argument("--scenarios", help="Comma-separated scenario names")
+    api.add_argument("--with-writes", action="store_true", help="Also run analyze_transaction")
+    api.add_argument("--llm-token-latency", type=float, default=0.005, help="Fake Ollama latency per token (s), in-process only")
+    api.add_argument("--llm-max-concurrency", type=int, help="Fake Ollama parallel generations, in-process only")
+
+    serialization = subparsers.add_parser("serialization", help="JSON encoding cost of the list and analysis responses")
+    serialization.add_argument("--iterations", type=int, default=500, help="Serialized pages per benchmark")
+    serialization.add_argument("--page-size", type=int, default=100, help="Transactions per list page")
+
+    for sub in (micro, api, serialization):
+        sub.add_argument("--seed", type=int, default=42, help="Random seed of the generated data")
+        sub.add_argument("-o", "--output", help="JSON result file (stdout if omitted)")
+
+    compare = subparsers.add_parser("compare", help="Compare two result files")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown ratio")
+    compare.add_argument("--metric", default="p50_ms")
+
+    args = parser.parse_args(argv)
+
+    # Log sinks would dominate the measured time of the scoring path
+    logger.remove()
+
+    commands = {
+        "micro": run_micro_command,
+        "api": run_api_command,
+        "serialization": run_serialization_command,
+        "compare": run_compare_command
+    }
+    return commands[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+End-to-end API load scenarios
+
+Runs against a server started on a local Postgres (--base-url), or in
+process through ASGI with the fake Ollama (--in-process).
+"""
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.runner import measure_async
+
+
+DEFAULT_SCENARIOS = [
+    "list_transactions",
+    "list_transactions_filtered",
+    "transaction_stats",
+    "daily_stats",
+    "get_transaction",
+    "analysis_in_progress",
+]
+
+# Write scenarios, only run when requested explicitly
+WRITE_SCENARIOS = ["analyze_transaction"]
+
+
+def ensure_user(session_factory: Callable, email: str, password: str) -> None:
+    """Create the benchmark analyst if it does not exist"""
+    from app.models.user import User
+    from app.utils.security import get_password_hash
+
+    db = session_factory()
+    try:
+        if db.query(User).filter(User.email == email).first() is None:
+            db.add(User(
+                email=email,
+                hashed_password=get_password_hash(password),
+                full_name="Benchmark Analyst",
+                role="analyst"
+            ))
+            db.commit()
+    finally:
+        db.close()
+
+
+def build_scenarios(ids: List[str]) -> Dict[str, Callable[[httpx.AsyncClient, int], Any]]:
+    """Request builders by scenario name, cycling over existing transaction ids"""
+
+    def pick(i: int) -> str:
+        return ids[i % len(ids)]
+
+    return {
+        "list_transactions": lambda c, i: c.get("/transactions", params={"page": i % 50 + 1, "page_size": 20}),
+        "list_transactions_filtered": lambda c, i: c.get(
+            "/transactions",
+            params={"is_suspicious": "true", "min_amount": 5000, "page_size": 50}
+        ),
+        "transaction_stats": lambda c, i: c.get("/transactions/stats"),
+        "daily_stats": lambda c, i: c.get("/transactions/daily-stats", params={"days": 30}),
+        "get_transaction": lambda c, i: c.get(f"/transactions/{pick(i)}"),
+        "analysis_in_progress": lambda c, i: c.get("/transactions/analysis/in-progress"),
+        "analyze_transaction": lambda c, i: c.post(
+            f"/transactions/{pick(i)}/analyze",
+            json={"force_reanalysis": True}
+        ),
+    }
+
+
+async def run_api(
+    base_url: str,
+    email: str,
+    password: str,
+    iterations: int,
+    concurrency: int,
+    scenarios: Optional[List[str]] = None,
+    transport: Optional[httpx.AsyncBaseTransport] = None
+) -> Dict[str, Any]:
+    """
+    Run API scenarios and collect latency/throughput results
+
+    Args:
+        base_url: Server URL (ignored host when a transport is given)
+        iterations: Requests per scenario
+        concurrency: Concurrent clients per scenario
+        scenarios: Scenario names, defaults to the read-only ones
+        transport: ASGI transport for in-process runs
+    """
+    scenarios = scenarios or DEFAULT_SCENARIOS
+    results = []
+
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, timeout=120.0) as client:
+        login = await client.post("/auth/login", json={"email": email, "password": password})
+        login.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+
+        page = await client.get("/transactions", params={"page_size": 100})
+        page.raise_for_status()
+        ids = [item["id"] for item in page.json()["items"]]
+        if not ids:
+            raise RuntimeError("Aucune transaction: utiliser --seed-rows pour generer des donnees")
+
+        builders = build_scenarios(ids)
+        for name in scenarios:
+            build = builders[name]
+
+            async def call(i: int, build=build):
+                response = await build(client, i)
+                response.raise_for_status()
+
+            results.append(await measure_async(f"api.{name}", call, iterations, concurrency=concurrency, warmup=1))
+
+    config = {
+        "base_url": base_url,
+        "in_process": transport is not None,
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "scenarios": scenarios
+    }
+    return {"config": config, "results": results}
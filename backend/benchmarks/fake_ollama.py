@@ -0,0 +1,284 @@
+"""
+Fake Ollama server for deterministic LLM latency and load testing
+
+Implements /api/generate (streaming, non-streaming, format=json for batched
+prompts) and /api/tags with configurable per-token latency, error rate and
+concurrency limits. Use it in process through httpx.ASGITransport, on a
+real socket with serve_in_thread (client timeouts only apply over the
+network), or standalone:
+
+    python -m benchmarks.fake_ollama --port 11500 --token-latency 0.02 --max-concurrency 1
+    OLLAMA_HOST=http://localhost:11500 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import socket
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from app.config import settings
+
+
+FAKE_EXPLANATION = (
+    "ALERTE ELEVEE: cette transaction presente plusieurs indicateurs de risque significatifs. "
+    "Le montant depasse les seuils de vigilance habituels et la destination augmente le niveau "
+    "de surveillance requis. L'horaire de l'operation sort des habitudes du client. "
+    "Recommandation: suspendre la transaction et contacter le client pour confirmation."
+)
+
+
+class FakeOllamaConfig(BaseModel):
+    """Behaviour of the fake server, can be changed while it runs"""
+
+    model: str = settings.ollama_model
+    load_latency: float = 0.0  # Seconds before the first token (model load)
+    prompt_token_latency: float = 0.0  # Seconds per prompt token (prompt evaluation)
+    token_latency: float = 0.01  # Seconds per generated token
+    max_tokens: int = 400  # Used when the request sets no num_predict
+    error_rate: float = 0.0  # Share of requests answered with HTTP 500
+    max_concurrency: Optional[int] = None  # Parallel generations (OLLAMA_NUM_PARALLEL)
+    max_queue: Optional[int] = None  # Waiting requests before 503 (OLLAMA_MAX_QUEUE)
+    prefix_cache: bool = True  # A system prompt seen before is not evaluated again
+    response_text: str = FAKE_EXPLANATION
+    seed: int = 42
+
+
+class FakeOllamaStats:
+    """Request counters exposed on app.state.stats"""
+
+    def __init__(self):
+        self.requests = 0
+        self.completed = 0
+        self.failed = 0  # Generations interrupted (client gone, cancelled)
+        self.errors = 0
+        self.rejected = 0
+        self.active = 0
+        self.peak_active = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def create_fake_ollama(config: Optional[FakeOllamaConfig] = None, **overrides) -> FastAPI:
+    """
+    Build a fake Ollama ASGI application
+
+    Args:
+        config: Initial behaviour (FakeOllamaConfig fields can also be passed as keywords)
+    """
+    app = FastAPI(title="Fake Ollama")
+    app.state.config = (config or FakeOllamaConfig()).model_copy(update=overrides)
+    app.state.stats = FakeOllamaStats()
+    rng = random.Random(app.state.config.seed)
+    cached_systems = set()
+    # The semaphore is bound to the event loop it is first used in
+    slots = {"loop": None, "semaphore": None}
+
+    def semaphore() -> Optional[asyncio.Semaphore]:
+        limit = app.state.config.max_concurrency
+        if not limit:
+            return None
+        loop = asyncio.get_running_loop()
+        if slots["loop"] is not loop:
+            slots["loop"], slots["semaphore"] = loop, asyncio.Semaphore(limit)
+        return slots["semaphore"]
+
+    def response_for(body: dict) -> str:
+        # format=json: one explanation per "ref=" line of the batched prompt
+        if body.get("format") == "json":
+            refs = re.findall(r"^ref=(\S+)$", str(body.get("prompt", "")), re.MULTILINE)
+            return json.dumps({ref: app.state.config.response_text for ref in refs}, ensure_ascii=False)
+        return app.state.config.response_text
+
+    def tokens_for(text: str, num_predict: Optional[int]) -> list:
+        words = text.split(" ")
+        limit = num_predict if num_predict and num_predict > 0 else app.state.config.max_tokens
+        tokens = [w if i == 0 else f" {w}" for i, w in enumerate(words)]
+        return tokens[:limit]
+
+    def final_chunk(model: str, evaluated: int, tokens: list, started: float, timings: dict, text: str = "") -> dict:
+        return {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "response": text,
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((time.perf_counter() - started) * 1e9),
+            "load_duration": int(timings["load"] * 1e9),
+            "prompt_eval_count": evaluated,
+            "prompt_eval_duration": int(timings["prompt"] * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": int(timings["eval"] * 1e9)
+        }
+
+    @app.get("/api/tags")
+    async def tags():
+        config = app.state.config
+        return {"models": [{
+            "name": config.model,
+            "model": config.model,
+            "size": 4_109_865_159,
+            "details": {"family": "llama", "parameter_size": "7B", "quantization_level": "Q4_0"}
+        }]}
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        config = app.state.config
+        stats = app.state.stats
+        body = await request.json()
+        stats.requests += 1
+
+        if body.get("model") != config.model:
+            stats.errors += 1
+            return JSONResponse(status_code=404, content={"error": f"model '{body.get('model')}' not found"})
+
+        if config.max_queue is not None and stats.waiting >= config.max_queue:
+            stats.rejected += 1
+            return JSONResponse(status_code=503, content={"error": "server busy, please try again"})
+
+        if rng.random() < config.error_rate:
+            stats.errors += 1
+            return JSONResponse(status_code=500, content={"error": "fake ollama failure"})
+
+        system = body.get("system") or ""
+        evaluated = len(str(body.get("prompt", "")).split())
+        if not (config.prefix_cache and system in cached_systems):
+            evaluated += len(system.split())
+            cached_systems.add(system)
+        tokens = tokens_for(response_for(body), (body.get("options") or {}).get("num_predict"))
+        started = time.perf_counter()
+        slot = semaphore()
+
+        @asynccontextmanager
+        async def generation_slot():
+            # Waits for a parallel slot, counts the generation as completed or failed
+            if slot is not None:
+                stats.waiting += 1
+                stats.peak_waiting = max(stats.peak_waiting, stats.waiting)
+                try:
+                    await slot.acquire()
+                finally:
+                    stats.waiting -= 1
+            stats.active += 1
+            stats.peak_active = max(stats.peak_active, stats.active)
+            try:
+                yield
+            except BaseException:
+                stats.failed += 1
+                raise
+            else:
+                stats.completed += 1
+            finally:
+                stats.active -= 1
+                if slot is not None:
+                    slot.release()
+
+        async def run_generation():
+            # Yields the tokens one by one, paced like a real generation
+            timings = {"load": config.load_latency, "prompt": config.prompt_token_latency * evaluated}
+            await asyncio.sleep(timings["load"] + timings["prompt"])
+            eval_started = time.perf_counter()
+            for token in tokens:
+                await asyncio.sleep(config.token_latency)
+                yield token
+            timings["eval"] = time.perf_counter() - eval_started
+            yield timings
+
+        if body.get("stream", True):
+            # The slot is taken once the body is iterated: a client gone before
+            # the first chunk never runs the generator, nothing to release
+            async def stream():
+                async with generation_slot():
+                    async for item in run_generation():
+                        if isinstance(item, dict):
+                            yield json.dumps(final_chunk(config.model, evaluated, tokens, started, item)) + "\n"
+                        else:
+                            yield json.dumps({
+                                "model": config.model,
+                                "created_at": datetime.now(timezone.utc).isoformat(),
+                                "response": item,
+                                "done": False
+                            }) + "\n"
+
+            return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+        timings = {}
+        async with generation_slot():
+            async for item in run_generation():
+                if isinstance(item, dict):
+                    timings = item
+        return final_chunk(config.model, evaluated, tokens, started, timings, text="".join(tokens))
+
+    return app
+
+
+@contextmanager
+def serve_in_thread(app: FastAPI, host: str = "127.0.0.1") -> Iterator[str]:
+    """
+    Serve an app on a free local port for the duration of the block
+
+    Yields:
+        Base URL of the server
+    """
+    import uvicorn
+
+    with socket.socket() as probe:
+        probe.bind((host, 0))
+        port = probe.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline or not thread.is_alive():
+            raise RuntimeError("Fake Ollama server did not start")
+        time.sleep(0.01)
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+def main(argv=None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--model", default=settings.ollama_model)
+    parser.add_argument("--load-latency", type=float, default=0.0)
+    parser.add_argument("--prompt-token-latency", type=float, default=0.0)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int)
+    parser.add_argument("--max-queue", type=int)
+    args = parser.parse_args(argv)
+
+    app = create_fake_ollama(
+        model=args.model,
+        load_latency=args.load_latency,
+        prompt_token_latency=args.prompt_token_latency,
+        token_latency=args.token_latency,
+        error_rate=args.error_rate,
+        max_concurrency=args.max_concurrency,
+        max_queue=args.max_queue
+    )
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Micro-benchmarks of the scoring components and the explanation fallback
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import httpx
+import numpy as np
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+from app.services import fraud_detection
+from app.services.fraud_detection import FraudDetectionService
+from app.services.explanation_templates import fallback_explanation_engine
+from app.services.llm_explainer import LLMExplainerService
+from benchmarks.data import build_transactions
+from benchmarks.fake_ollama import create_fake_ollama
+from benchmarks.runner import measure, measure_async
+
+
+# Distinct transactions kept in memory, benchmarks cycle over them
+POOL_SIZE = 50_000
+
+FALLBACK_BATCH = 1000
+
+
+@contextmanager
+def without_demo_delays():
+    """Skip the time.sleep calls that pace the analysis logs for demos"""
+    original = fraud_detection.time
+    fraud_detection.time = SimpleNamespace(sleep=lambda seconds: None, perf_counter=time.perf_counter)
+    try:
+        yield
+    finally:
+        fraud_detection.time = original
+
+
+def ensure_model(service: FraudDetectionService, transactions: list) -> bool:
+    """
+    Fit an in-memory IsolationForest when no trained model is on disk
+
+    Returns:
+        True if the model was trained for the benchmark
+    """
+    if service.model is not None and service.scaler is not None:
+        return False
+    X = np.vstack([service._prepare_features(t) for t in transactions[:5000]])
+    service.scaler = StandardScaler().fit(X)
+    service.model = IsolationForest(n_estimators=100, contamination=0.1, random_state=42)
+    service.model.fit(service.scaler.transform(X))
+    return True
+
+
+def run_micro(
+    scale: int,
+    iterations: int,
+    seed: int = 42,
+    warmup: int = 50,
+    llm_token_latency: float = 0.005,
+    llm_concurrency: int = 4
+) -> Dict[str, Any]:
+    """
+    Run the micro-benchmark suite
+
+    Args:
+        scale: Size of the generated dataset (capped at POOL_SIZE in memory)
+        iterations: Calls per benchmark
+        llm_token_latency: Per-token latency of the fake Ollama, in seconds
+    """
+    transactions = build_transactions(min(scale, POOL_SIZE), seed=seed)
+    size = len(transactions)
+    service = FraudDetectionService()
+    trained = ensure_model(service, transactions)
+    fake_ollama = create_fake_ollama(token_latency=llm_token_latency, seed=seed)
+    explainer = LLMExplainerService(transport=httpx.ASGITransport(app=fake_ollama))
+
+    def tx(i: int):
+        return transactions[i % size]
+
+    # Deterministic scores covering every risk level for the explanation paths
+    def score(i: int) -> int:
+        return (i * 37) % 101
+
+    results: List[Dict[str, Any]] = [
+        measure("scoring.prepare_features", lambda i: service._prepare_features(tx(i)), iterations, warmup),
+        measure("scoring.ml_analysis", lambda i: service._ml_analysis(tx(i)), iterations, warmup),
+        measure("scoring.analyze_amount", lambda i: service._analyze_amount(tx(i)), iterations, warmup),
+        measure("scoring.analyze_geography", lambda i: service._analyze_geography(tx(i)), iterations, warmup),
+        measure("scoring.analyze_timing", lambda i: service._analyze_timing(tx(i)), iterations, warmup),
+        measure("scoring.analyze_beneficiary", lambda i: service._analyze_beneficiary(tx(i)), iterations, warmup),
+        measure(
+            "scoring.apply_risk_boosters",
+            lambda i: service._apply_risk_boosters(float(score(i)), ["Nouveau beneficiaire"], tx(i)),
+            iterations, warmup
+        ),
+    ]
+
+    with without_demo_delays():
+        results.append(measure(
+            "scoring.analyze_transaction",
+            lambda i: service.analyze_transaction(tx(i)),
+            iterations, warmup
+        ))
+
+    results.append(measure(
+        "llm.fallback_explanation",
+        lambda i: explainer._generate_fallback_explanation(
+            tx(i), score(i), explainer._get_risk_level(score(i)), ["Montant eleve", "Transaction nocturne"]
+        ),
+        iterations, warmup
+    ))
+
+    # Same explanations by batches, as written by the bulk analysis and the exports
+    def fallback_batch(i: int):
+        start = (i * FALLBACK_BATCH) % size
+        batch = transactions[start:start + FALLBACK_BATCH]
+        return fallback_explanation_engine.explain_many(
+            batch,
+            [score(start + j) for j in range(len(batch))],
+            [["Montant eleve", "Transaction nocturne"]] * len(batch)
+        )
+
+    results.append(measure(
+        f"llm.fallback_explanation_batch_{FALLBACK_BATCH}",
+        fallback_batch,
+        max(1, iterations // 100), 1
+    ))
+
+    llm_iterations = max(llm_concurrency, iterations // 20)
+    results.append(asyncio.run(measure_async(
+        "llm.explain_transaction",
+        lambda i: explainer.explain_transaction(tx(i), score(i), ["Montant eleve"]),
+        llm_iterations,
+        concurrency=llm_concurrency
+    )))
+
+    config = {
+        "scale": scale,
+        "pool_size": size,
+        "iterations": iterations,
+        "warmup": warmup,
+        "seed": seed,
+        "model": "trained_in_memory" if trained else service.model_path,
+        "llm_token_latency": llm_token_latency,
+        "llm_concurrency": llm_concurrency,
+        "llm_server": fake_ollama.state.stats.as_dict()
+    }
+    return {"config": config, "results": results}
@@ -0,0 +1,174 @@
+"""
+Benchmark harness: timing, statistics and JSON results
+"""
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+def summarize(name: str, durations: List[float], **extra: Any) -> Dict[str, Any]:
+    """
+    Build the result entry of one benchmark
+
+    Args:
+        name: Benchmark name, used to match results between runs
+        durations: Duration of each operation in seconds
+    """
+    ordered = sorted(durations)
+    count = len(ordered)
+
+    def percentile(p: float) -> float:
+        return ordered[min(count - 1, int(round(p / 100 * (count - 1))))] * 1000
+
+    total = sum(ordered)
+    return {
+        "name": name,
+        "iterations": count,
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "p50_ms": round(percentile(50), 4),
+        "p95_ms": round(percentile(95), 4),
+        "p99_ms": round(percentile(99), 4),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+        "ops_per_sec": round(count / total, 2) if total else None,
+        **extra
+    }
+
+
+def measure(
+    name: str,
+    func: Callable[[int], Any],
+    iterations: int,
+    warmup: int = 0
+) -> Dict[str, Any]:
+    """
+    Time a synchronous operation
+
+    The operation receives the iteration index so that it can cycle over a
+    prepared dataset without paying for the lookup in the measurement.
+    """
+    for i in range(warmup):
+        func(i)
+
+    durations = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        func(i)
+        durations.append(time.perf_counter() - started)
+    return summarize(name, durations)
+
+
+async def measure_async(
+    name: str,
+    func: Callable[[int], Awaitable[Any]],
+    iterations: int,
+    concurrency: int = 1,
+    warmup: int = 0
+) -> Dict[str, Any]:
+    """
+    Time an asynchronous operation with a fixed number of concurrent workers
+
+    Reports per-operation latency and the overall throughput (wall_ops_per_sec).
+    """
+    for i in range(warmup):
+        await func(i)
+
+    durations: List[float] = []
+    errors = 0
+    counter = iter(range(iterations))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                await func(i)
+            except Exception:
+                errors += 1
+            durations.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    return summarize(
+        name,
+        durations,
+        concurrency=concurrency,
+        errors=errors,
+        wall_ops_per_sec=round(len(durations) / wall, 2) if wall else None
+    )
+
+
+def git_commit() -> Optional[str]:
+    """Current commit of the working tree, if available"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def build_report(suite: str, config: Dict[str, Any], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Wrap results with the environment needed to compare runs"""
+    return {
+        "suite": suite,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "config": config,
+        "results": results
+    }
+
+
+def write_report(report: Dict[str, Any], path: Optional[str]) -> None:
+    """Write a report as JSON (stdout when no path is given)"""
+    content = json.dumps(report, indent=2, default=str)
+    if not path:
+        print(content)
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def compare_reports(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.10,
+    metric: str = "p50_ms"
+) -> List[Dict[str, Any]]:
+    """
+    Compare two reports benchmark by benchmark
+
+    Returns one entry per benchmark present in both runs, flagged as a
+    regression when the metric grew by more than the threshold.
+    """
+    previous = {r["name"]: r for r in baseline["results"]}
+    comparison = []
+    for result in current["results"]:
+        before = previous.get(result["name"])
+        if not before or not before.get(metric):
+            continue
+        ratio = result[metric] / before[metric]
+        comparison.append({
+            "name": result["name"],
+            "baseline": before[metric],
+            "current": result[metric],
+            "change_pct": round((ratio - 1) * 100, 1),
+            "regression": ratio > 1 + threshold
+        })
+    return comparison
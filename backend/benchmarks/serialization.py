@@ -0,0 +1,115 @@
+"""
+Serialization cost of the high-volume responses, per page of results
+
+Compares, from the loaded rows to the response body, FastAPI's response_model
+path (validation, to-python conversion, json.dumps) with the orjson default
+response class, the direct pydantic-core encoding of ModelJSONResponse and
+the summary view of the list.
+"""
+from datetime import timedelta
+from typing import Any, Callable, Dict, List
+
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_response_field
+
+from app.schemas.transaction import (
+    TransactionAnalysisResponse,
+    TransactionListResponse,
+    TransactionSummaryListResponse,
+    TransactionSummaryResponse,
+)
+from app.utils.responses import FastJSONResponse, ModelJSONResponse
+from benchmarks.data import build_transactions
+from benchmarks.runner import measure
+
+
+def default_renderer(model: type, response_class: type = JSONResponse) -> Callable[[Any], bytes]:
+    """
+    Body produced by FastAPI for an endpoint declaring response_model=model
+
+    Same steps as fastapi.routing.serialize_response for an async endpoint
+    """
+    field = create_response_field(name=f"Response_{model.__name__}", type_=model, mode="serialization")
+
+    def render(value: Any) -> bytes:
+        validated, errors = field.validate(value, {}, loc=("response",))
+        assert not errors, errors
+        return response_class(field.serialize(validated, by_alias=True)).body
+
+    return render
+
+
+def build_pages(page_size: int, seed: int = 42) -> Dict[str, Any]:
+    """ORM objects, summary rows and analysis results of one page"""
+    transactions = build_transactions(page_size, seed=seed)
+    for i, transaction in enumerate(transactions):
+        # Column defaults the database would have applied
+        transaction.created_at = transaction.transaction_date + timedelta(seconds=1)
+        transaction.is_suspicious = False
+        transaction.is_confirmed_fraud = False
+        if i % 4 == 0:
+            transaction.fraud_score = 72
+            transaction.is_suspicious = True
+            transaction.status = "analyzed"
+            transaction.analysis_date = transaction.created_at
+            transaction.ai_explanation = "Montant eleve vers un nouveau beneficiaire a l'etranger. " * 4
+    summary_rows = [
+        {name: getattr(transaction, name) for name in TransactionSummaryResponse.model_fields}
+        for transaction in transactions
+    ]
+    analyses = [
+        dict(
+            transaction_id=transaction.id,
+            transaction_ref=transaction.transaction_ref,
+            fraud_score=72,
+            is_suspicious=True,
+            risk_level="ELEVE",
+            ai_explanation="Montant eleve vers un nouveau beneficiaire a l'etranger. " * 4,
+            analysis_date=transaction.created_at,
+            factors=["Montant eleve", "Nouveau beneficiaire", "Pays a risque"]
+        )
+        for transaction in transactions
+    ]
+    return {"transactions": transactions, "summary_rows": summary_rows, "analyses": analyses}
+
+
+def run_serialization(iterations: int, page_size: int = 100, seed: int = 42, warmup: int = 20) -> Dict[str, Any]:
+    """
+    Run the serialization benchmarks
+
+    Args:
+        iterations: Serialized pages (or analysis results) per benchmark
+        page_size: Transactions per list page
+    """
+    pages = build_pages(page_size, seed=seed)
+    transactions, summary_rows, analyses = pages["transactions"], pages["summary_rows"], pages["analyses"]
+
+    def list_page(i: int) -> TransactionListResponse:
+        return TransactionListResponse(items=transactions, total=10_000, page=i + 1, page_size=page_size, total_pages=100)
+
+    def summary_page(i: int) -> TransactionSummaryListResponse:
+        return TransactionSummaryListResponse(items=summary_rows, total=10_000, page=i + 1, page_size=page_size, total_pages=100)
+
+    def analysis(i: int) -> TransactionAnalysisResponse:
+        return TransactionAnalysisResponse(**analyses[i % len(analyses)])
+
+    list_default = default_renderer(TransactionListResponse)
+    list_orjson = default_renderer(TransactionListResponse, FastJSONResponse)
+    analysis_default = default_renderer(TransactionAnalysisResponse)
+
+    cases: List[tuple] = [
+        ("serialization.list_page_default", lambda i: list_default(list_page(i))),
+        ("serialization.list_page_orjson", lambda i: list_orjson(list_page(i))),
+        ("serialization.list_page_model_json", lambda i: ModelJSONResponse(list_page(i)).body),
+        ("serialization.list_page_summary", lambda i: ModelJSONResponse(summary_page(i)).body),
+        ("serialization.analysis_default", lambda i: analysis_default(analysis(i))),
+        ("serialization.analysis_model_json", lambda i: ModelJSONResponse(analysis(i)).body),
+    ]
+    results = []
+    for name, func in cases:
+        result = measure(name, func, iterations, warmup)
+        result["body_bytes"] = len(func(0))
+        results.append(result)
+
+    config = {"iterations": iterations, "warmup": warmup, "page_size": page_size, "seed": seed}
+    return {"config": config, "results": results}
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Transactions export
+Writes the transactions matching the list filters to a Parquet or Arrow IPC
+file with the engineered features of the ML model (analytics), or to a
+CSV / NDJSON file with explanations and review notes (compliance)
+
+Usage (from backend/):
+    python scripts/export.py --output /data/transactions.parquet
+    python scripts/export.py --output suspicious.arrow --format arrow --is-suspicious true
+    python scripts/export.py --output scores.parquet --columns id,amount,fraud_score --no-features
+    python scripts/export.py --output alertes-2024-03.csv --is-suspicious true --start-date 2024-03-01 --end-date 2024-03-31T23:59:59
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+from datetime import datetime
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.columnar_export import COLUMNAR_FORMATS, DEFAULT_EXPORT_COLUMNS, ColumnarExporter, resolve_columns
+from app.services.explanation_templates import fallback_explanation_engine
+from app.services.fraud_detection import fraud_detection_service
+from app.services.report_export import DEFAULT_REPORT_COLUMNS, REPORT_EXTRA_COLUMNS, REPORT_FORMATS, ReportExporter
+from app.services.transaction_filters import apply_transaction_filters
+
+
+def parse_bool(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes", "oui")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export transactions to Parquet / Arrow IPC / CSV / NDJSON")
+    parser.add_argument("--output", required=True, help="Destination file")
+    parser.add_argument("--format", choices=sorted([*COLUMNAR_FORMATS, *REPORT_FORMATS]), help="Default: from the file extension, else parquet")
+    parser.add_argument("--columns", help="Comma separated column names")
+    parser.add_argument("--no-features", action="store_true", help="Parquet/Arrow: do not add the feature_* columns")
+    parser.add_argument("--chunk-size", type=int, default=settings.export_chunk_size)
+    parser.add_argument("--status")
+    parser.add_argument("--is-suspicious", type=parse_bool)
+    parser.add_argument("--min-amount", type=float)
+    parser.add_argument("--max-amount", type=float)
+    parser.add_argument("--start-date", type=datetime.fromisoformat)
+    parser.add_argument("--end-date", type=datetime.fromisoformat)
+    parser.add_argument("--search")
+
+    args = parser.parse_args()
+
+    export_format = args.format or os.path.splitext(args.output)[1].lstrip(".")
+    if export_format not in COLUMNAR_FORMATS and export_format not in REPORT_FORMATS:
+        export_format = "parquet"
+    report = export_format in REPORT_FORMATS
+    try:
+        columns = resolve_columns(
+            args.columns.split(",") if args.columns else None,
+            default=DEFAULT_REPORT_COLUMNS if report else DEFAULT_EXPORT_COLUMNS,
+            extra=REPORT_EXTRA_COLUMNS if report else ()
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    include_features = not args.no_features
+    if report:
+        exporter = ReportExporter(fallback_explanation_engine, chunk_size=args.chunk_size)
+        query = exporter.build_query(columns)
+    else:
+        exporter = ColumnarExporter(fraud_detection_service, chunk_size=args.chunk_size)
+        query = exporter.build_query(columns, include_features=include_features)
+    stmt = apply_transaction_filters(
+        query,
+        status=args.status,
+        is_suspicious=args.is_suspicious,
+        min_amount=args.min_amount,
+        max_amount=args.max_amount,
+        start_date=args.start_date,
+        end_date=args.end_date,
+        search=args.search
+    )
+
+    started = time.perf_counter()
+    if report:
+        rows = exporter.write(SessionLocal, stmt, columns, args.output, export_format)
+    else:
+        rows = exporter.write(SessionLocal, stmt, columns, args.output, export_format, include_features=include_features)
+    elapsed = time.perf_counter() - started
+    size_mb = os.path.getsize(args.output) / 1e6
+    print(f"📦 {rows} transactions exportees vers {args.output} ({export_format}, {size_mb:.1f} Mo) en {elapsed:.1f}s")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Streaming ingestion worker
+Consumes transactions, scores them by micro-batches and emits the suspicious ones
+
+Usage (from backend/):
+    python scripts/ingest.py --file /data/incoming.ndjson --output-file /data/suspicious.ndjson
+    python scripts/ingest.py --stream transactions --stream-url redis://localhost:6379/0 --consumer worker-1
+    python scripts/ingest.py --file incoming.ndjson --exit-when-idle   # backfill then stop
+    python scripts/ingest.py --file incoming.ndjson --dead-letter-file rejected.ndjson
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import json
+import signal
+import socket
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.fraud_detection import fraud_detection_service
+from app.services.stream_ingestion import (
+    FileTailSource,
+    IngestionWorker,
+    NdjsonFileSink,
+    RedisStreamSource,
+    StreamSink,
+    connect_stream,
+)
+
+
+def build_worker(args) -> IngestionWorker:
+    client = None
+    if args.stream or args.output_stream or args.dead_letter_stream:
+        client = connect_stream(args.stream_url)
+
+    if args.file:
+        source = FileTailSource(args.file, checkpoint_path=args.checkpoint)
+    else:
+        source = RedisStreamSource(client, args.stream, group=args.group, consumer=args.consumer)
+
+    sink = None
+    if args.output_file:
+        sink = NdjsonFileSink(args.output_file)
+    elif args.output_stream:
+        sink = StreamSink(client, args.output_stream)
+
+    dead_letter = None
+    if args.dead_letter_file:
+        dead_letter = NdjsonFileSink(args.dead_letter_file)
+    elif args.dead_letter_stream:
+        dead_letter = StreamSink(client, args.dead_letter_stream, maxlen=None)
+
+    return IngestionWorker(
+        source,
+        sink,
+        SessionLocal,
+        fraud_detection_service,
+        batch_size=args.batch_size,
+        max_wait=args.max_wait,
+        max_pending_batches=args.max_pending,
+        dead_letter=dead_letter,
+        max_attempts=args.max_attempts
+    )
+
+
+async def run(args) -> dict:
+    worker = build_worker(args)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    print(f"🚰 Ingestion depuis {worker.source.name} (lots de {args.batch_size}, {args.max_wait}s max)")
+    return await worker.run(exit_when_idle=args.exit_when_idle)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streaming transaction ingestion worker")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="Append-only NDJSON file to tail")
+    source.add_argument("--stream", help="Stream to consume with a consumer group")
+    parser.add_argument("--checkpoint", help="Offset file of --file (default: <file>.offset)")
+    parser.add_argument("--stream-url", default=settings.ingestion_stream_url, help="redis://... or memory://")
+    parser.add_argument("--group", default="fraud-ingestion")
+    parser.add_argument("--consumer", default=socket.gethostname())
+    parser.add_argument("--output-file", help="NDJSON file receiving suspicious results")
+    parser.add_argument("--output-stream", help="Stream receiving suspicious results (default with --stream: INGESTION_OUTPUT_STREAM)")
+    parser.add_argument("--dead-letter-file", help="NDJSON file receiving rejected messages")
+    parser.add_argument("--dead-letter-stream", help="Stream receiving rejected messages (default with --stream: INGESTION_DEAD_LETTER_STREAM)")
+    parser.add_argument("--max-attempts", type=int, default=settings.ingestion_max_attempts)
+    parser.add_argument("--batch-size", type=int, default=settings.ingestion_batch_size)
+    parser.add_argument("--max-wait", type=float, default=settings.ingestion_max_wait)
+    parser.add_argument("--max-pending", type=int, default=settings.ingestion_max_pending_batches)
+    parser.add_argument("--exit-when-idle", action="store_true", help="Stop once the source has no more messages")
+    parser.add_argument("--metrics-port", type=int, help="Expose Prometheus metrics on this port")
+    
+    args = parser.parse_args()
+    if args.stream and args.output_stream is None and args.output_file is None:
+        args.output_stream = settings.ingestion_output_stream
+    if args.stream and args.dead_letter_stream is None and args.dead_letter_file is None:
+        args.dead_letter_stream = settings.ingestion_dead_letter_stream
+    
+    if args.metrics_port:
+        from prometheus_client import start_http_server
+        start_http_server(args.metrics_port)
+    
+    stats = asyncio.run(run(args))
+    print(json.dumps(stats, indent=2))
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Rescoring worker
+Scores the pending transactions by batches, several instances can run side by side
+
+Usage (from backend/):
+    python scripts/rescore.py                  # poll until interrupted
+    python scripts/rescore.py --once           # drain the backlog then stop
+    python scripts/rescore.py --batch-size 1000 --interval 2
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import signal
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.explanation_queue import explanation_queue
+from app.services.fraud_detection import fraud_detection_service
+from app.services.rescoring import RescoringJob
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Background rescoring of pending transactions")
+    parser.add_argument("--batch-size", type=int, default=settings.rescoring_batch_size)
+    parser.add_argument("--interval", type=float, default=settings.rescoring_interval, help="Seconds between polls once drained")
+    parser.add_argument("--once", action="store_true", help="Stop once the backlog is empty")
+    parser.add_argument("--no-explanations", action="store_true", help="Do not queue LLM explanations")
+    parser.add_argument("--metrics-port", type=int, help="Expose Prometheus metrics on this port")
+
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        from prometheus_client import start_http_server
+        start_http_server(args.metrics_port)
+
+    # Explanation jobs are written to the database, the API workers generate them
+    job = RescoringJob(
+        SessionLocal,
+        fraud_detection_service,
+        batch_size=args.batch_size,
+        interval=args.interval,
+        on_scored=None if args.no_explanations else explanation_queue.enqueue_scored
+    )
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: job.stop())
+
+    print(f"🔁 Rescoring des transactions en attente (lots de {args.batch_size})")
+    if args.once:
+        job.drain()
+    else:
+        job.run_forever()
+    print(json.dumps(job.get_status(), indent=2))
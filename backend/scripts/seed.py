@@ -2,18 +2,30 @@
 """
 Seed script to generate realistic fake transactions for testing
 Generates 500 transactions with varied patterns including suspicious ones
+
+Fast mode for capacity tests (vectorized generation, COPY, several processes):
+    python scripts/seed.py --fast -n 10000000 --workers 8 --seed 42
 """
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import random
+import io
+import multiprocessing
+import time
 from datetime import datetime, timedelta
 from decimal import Decimal
-from uuid import uuid4
+from typing import Dict, List, Optional
+from uuid import UUID, uuid4
 import argparse
 
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from app.config import settings
 from app.database import SessionLocal, engine, Base
 from app.models.transaction import Transaction, TransactionType, TransactionChannel, TransactionStatus
 from app.models.user import User
@@ -47,16 +59,25 @@ COUNTRIES = ["FRA", "DEU", "ESP", "ITA", "GBR", "BEL", "NLD", "CHE", "USA", "CHN
 SAFE_COUNTRIES = ["FRA", "DEU", "ESP", "ITA", "GBR", "BEL", "NLD", "CHE"]
 HIGH_RISK_COUNTRIES = ["RUS", "NGA", "CHN"]
 
+NORMAL_DESCRIPTIONS = [
+    "Achat en ligne",
+    "Virement mensuel",
+    "Paiement facture",
+    "Achat magasin",
+    "Remboursement",
+    "Transfert interne"
+]
+
 
-def generate_iban(country: str = "FR") -> str:
+def generate_iban(country: str = "FR", rng=random) -> str:
     """Generate a fake but realistic IBAN"""
     if country == "FR":
-        bank_code = str(random.randint(10000, 99999))
-        branch_code = str(random.randint(10000, 99999))
-        account_number = str(random.randint(10000000000, 99999999999))
-        key = str(random.randint(10, 99))
+        bank_code = str(rng.randint(10000, 99999))
+        branch_code = str(rng.randint(10000, 99999))
+        account_number = str(rng.randint(10000000000, 99999999999))
+        key = str(rng.randint(10, 99))
         return f"FR76{bank_code}{branch_code}{account_number}{key}"
-    return f"{country}00{random.randint(10**20, 10**21-1)}"
+    return f"{country}00{rng.randint(10**20, 10**21-1)}"
 
 
 def generate_transaction_ref() -> str:
@@ -64,21 +85,27 @@ def generate_transaction_ref() -> str:
     return f"TXN-{datetime.now().strftime('%Y%m%d')}-{uuid4().hex[:8].upper()}"
 
 
-def random_name() -> str:
+def random_name(rng=random) -> str:
     """Generate a random French name"""
-    return f"{random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)}"
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
 
 
-def generate_normal_transaction(base_date: datetime) -> dict:
-    """Generate a normal, non-suspicious transaction"""
-    amount = round(random.uniform(10, 2000), 2)
+def generate_normal_transaction(base_date: datetime, rng=random) -> dict:
+    """
+    Generate a normal, non-suspicious transaction
+
+    Args:
+        base_date: Most recent possible transaction date
+        rng: random module or a seeded random.Random
+    """
+    amount = round(rng.uniform(10, 2000), 2)
     
     # Normal hours (8h-22h)
-    hour = random.randint(8, 21)
-    minute = random.randint(0, 59)
+    hour = rng.randint(8, 21)
+    minute = rng.randint(0, 59)
     
     # Mostly weekdays
-    days_offset = random.randint(0, 30)
+    days_offset = rng.randint(0, 30)
     trans_date = base_date - timedelta(days=days_offset)
     trans_date = trans_date.replace(hour=hour, minute=minute)
     
@@ -86,42 +113,35 @@ def generate_normal_transaction(base_date: datetime) -> dict:
         "transaction_ref": generate_transaction_ref(),
         "amount": Decimal(str(amount)),
         "currency": "EUR",
-        "sender_account": generate_iban("FR"),
-        "receiver_account": generate_iban("FR"),
-        "sender_name": random_name(),
-        "receiver_name": random_name(),
-        "transaction_type": random.choice([
+        "sender_account": generate_iban("FR", rng),
+        "receiver_account": generate_iban("FR", rng),
+        "sender_name": random_name(rng),
+        "receiver_name": random_name(rng),
+        "transaction_type": rng.choice([
             TransactionType.VIREMENT.value,
             TransactionType.CARTE.value,
             TransactionType.PRELEVEMENT.value
         ]),
-        "channel": random.choice([
+        "channel": rng.choice([
             TransactionChannel.WEB.value,
             TransactionChannel.MOBILE.value,
             TransactionChannel.AGENCE.value
         ]),
         "country_origin": "FRA",
-        "country_destination": random.choice(SAFE_COUNTRIES),
-        "ip_address": f"192.168.{random.randint(1,254)}.{random.randint(1,254)}",
+        "country_destination": rng.choice(SAFE_COUNTRIES),
+        "ip_address": f"192.168.{rng.randint(1,254)}.{rng.randint(1,254)}",
         "device_id": f"DEV-{uuid4().hex[:12]}",
-        "merchant_category": random.choice(MERCHANT_CATEGORIES),
-        "description": random.choice([
-            "Achat en ligne",
-            "Virement mensuel",
-            "Paiement facture",
-            "Achat magasin",
-            "Remboursement",
-            "Transfert interne"
-        ]),
+        "merchant_category": rng.choice(MERCHANT_CATEGORIES),
+        "description": rng.choice(NORMAL_DESCRIPTIONS),
         "transaction_date": trans_date,
         "status": TransactionStatus.PENDING.value
     }
 
 
-def generate_suspicious_transaction(base_date: datetime) -> dict:
-    """Generate a suspicious transaction with fraud indicators"""
+def generate_suspicious_transaction(base_date: datetime, rng=random) -> dict:
+    """Generate a suspicious transaction with fraud indicators (rng as above)"""
     # Random suspicious pattern
-    pattern = random.choice([
+    pattern = rng.choice([
         "high_amount",
         "night_transaction",
         "international_high_risk",
@@ -130,45 +150,73 @@ def generate_suspicious_transaction(base_date: datetime) -> dict:
         "multiple_indicators"
     ])
     
-    trans = generate_normal_transaction(base_date)
+    trans = generate_normal_transaction(base_date, rng)
     
     if pattern == "high_amount":
-        trans["amount"] = Decimal(str(round(random.uniform(8000, 50000), 2)))
+        trans["amount"] = Decimal(str(round(rng.uniform(8000, 50000), 2)))
         trans["description"] = "Virement urgent"
         
     elif pattern == "night_transaction":
-        hour = random.choice([1, 2, 3, 4, 5, 23, 0])
+        hour = rng.choice([1, 2, 3, 4, 5, 23, 0])
         trans["transaction_date"] = trans["transaction_date"].replace(hour=hour)
-        trans["amount"] = Decimal(str(round(random.uniform(500, 3000), 2)))
+        trans["amount"] = Decimal(str(round(rng.uniform(500, 3000), 2)))
         
     elif pattern == "international_high_risk":
-        trans["country_destination"] = random.choice(HIGH_RISK_COUNTRIES)
-        trans["receiver_account"] = generate_iban(trans["country_destination"][:2])
-        trans["amount"] = Decimal(str(round(random.uniform(2000, 15000), 2)))
+        trans["country_destination"] = rng.choice(HIGH_RISK_COUNTRIES)
+        trans["receiver_account"] = generate_iban(trans["country_destination"][:2], rng)
+        trans["amount"] = Decimal(str(round(rng.uniform(2000, 15000), 2)))
         trans["description"] = "Transfert international"
         
     elif pattern == "round_amount":
-        trans["amount"] = Decimal(str(random.choice([1000, 2000, 3000, 5000, 10000])))
+        trans["amount"] = Decimal(str(rng.choice([1000, 2000, 3000, 5000, 10000])))
         trans["description"] = "Virement"
         
     elif pattern == "weekend_large":
         # Force weekend
         days_to_saturday = (5 - trans["transaction_date"].weekday()) % 7
         trans["transaction_date"] = trans["transaction_date"] + timedelta(days=days_to_saturday)
-        trans["amount"] = Decimal(str(round(random.uniform(5000, 20000), 2)))
+        trans["amount"] = Decimal(str(round(rng.uniform(5000, 20000), 2)))
         
     elif pattern == "multiple_indicators":
         # Combine multiple suspicious factors
-        trans["amount"] = Decimal(str(round(random.uniform(10000, 30000), 2)))
-        trans["country_destination"] = random.choice(HIGH_RISK_COUNTRIES)
-        hour = random.choice([2, 3, 4])
+        trans["amount"] = Decimal(str(round(rng.uniform(10000, 30000), 2)))
+        trans["country_destination"] = rng.choice(HIGH_RISK_COUNTRIES)
+        hour = rng.choice([2, 3, 4])
         trans["transaction_date"] = trans["transaction_date"].replace(hour=hour)
-        trans["receiver_account"] = generate_iban(trans["country_destination"][:2])
+        trans["receiver_account"] = generate_iban(trans["country_destination"][:2], rng)
         trans["description"] = "Transfert urgent"
     
     return trans
 
 
+def ensure_default_users(db: Session) -> None:
+    """Create the default admin and analyst accounts if missing"""
+    # Check if users exist, create if not
+    admin = db.query(User).filter(User.email == "admin@bpce.fr").first()
+    if not admin:
+        admin = User(
+            email="admin@bpce.fr",
+            hashed_password=get_password_hash("Admin123!"),
+            full_name="Administrateur BPCE",
+            role="admin"
+        )
+        db.add(admin)
+        print("✅ Admin user created")
+    
+    analyst = db.query(User).filter(User.email == "analyst@bpce.fr").first()
+    if not analyst:
+        analyst = User(
+            email="analyst@bpce.fr",
+            hashed_password=get_password_hash("Admin123!"),
+            full_name="Analyste Fraude",
+            role="analyst"
+        )
+        db.add(analyst)
+        print("✅ Analyst user created")
+    
+    db.commit()
+
+
 def seed_database(num_transactions: int = 500, suspicious_ratio: float = 0.15):
     """
     Seed database with fake transactions
@@ -185,30 +233,7 @@ def seed_database(num_transactions: int = 500, suspicious_ratio: float = 0.15):
     db = SessionLocal()
     
     try:
-        # Check if users exist, create if not
-        admin = db.query(User).filter(User.email == "admin@bpce.fr").first()
-        if not admin:
-            admin = User(
-                email="admin@bpce.fr",
-                hashed_password=get_password_hash("Admin123!"),
-                full_name="Administrateur BPCE",
-                role="admin"
-            )
-            db.add(admin)
-            print("✅ Admin user created")
-        
-        analyst = db.query(User).filter(User.email == "analyst@bpce.fr").first()
-        if not analyst:
-            analyst = User(
-                email="analyst@bpce.fr",
-                hashed_password=get_password_hash("Admin123!"),
-                full_name="Analyste Fraude",
-                role="analyst"
-            )
-            db.add(analyst)
-            print("✅ Analyst user created")
-        
-        db.commit()
+        ensure_default_users(db)
         
         # Generate transactions
         base_date = datetime.now()
@@ -260,6 +285,306 @@ def seed_database(num_transactions: int = 500, suspicious_ratio: float = 0.15):
         db.close()
 
 
+# =============================================================================
+# Fast mode: vectorized generation + COPY FROM STDIN, across processes
+# =============================================================================
+
+# Rows per chunk. Each chunk draws from its own generator seeded with
+# (seed, chunk_index), so the output does not depend on the number of workers.
+FAST_CHUNK_SIZE = 50_000
+
+FAST_COLUMNS = [
+    "id", "transaction_ref", "amount", "currency",
+    "sender_account", "receiver_account", "sender_name", "receiver_name",
+    "transaction_type", "channel", "country_origin", "country_destination",
+    "ip_address", "device_id", "merchant_category", "description",
+    "transaction_date", "status",
+    "is_suspicious", "is_confirmed_fraud", "is_false_positive",
+    "is_blocked", "call_requested", "call_completed",
+]
+
+# Same patterns as generate_suspicious_transaction, by index
+SUSPICIOUS_PATTERNS = [
+    "high_amount",
+    "night_transaction",
+    "international_high_risk",
+    "round_amount",
+    "weekend_large",
+    "multiple_indicators"
+]
+
+_HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
+
+def _random_digits(rng: np.random.Generator, count: int, width: int, leading_nonzero: bool = True) -> np.ndarray:
+    """Draw `count` strings of `width` decimal digits"""
+    digits = rng.integers(0, 10, size=(count, width), dtype=np.uint8)
+    if leading_nonzero:
+        digits[:, 0] = rng.integers(1, 10, size=count, dtype=np.uint8)
+    return (digits + ord("0")).view(f"S{width}").ravel().astype(str)
+
+
+def _random_hex(rng: np.random.Generator, count: int, num_bytes: int, uuid4_bits: bool = False) -> np.ndarray:
+    """Draw `count` hexadecimal strings of `num_bytes` random bytes"""
+    raw = rng.integers(0, 256, size=(count, num_bytes), dtype=np.uint8)
+    if uuid4_bits:
+        raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+        raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    nibbles = np.empty((count, num_bytes * 2), dtype=np.uint8)
+    nibbles[:, 0::2] = _HEX_DIGITS[raw >> 4]
+    nibbles[:, 1::2] = _HEX_DIGITS[raw & 0x0F]
+    return nibbles.view(f"S{num_bytes * 2}").ravel().astype(str)
+
+
+def _random_names(rng: np.random.Generator, count: int) -> np.ndarray:
+    first = np.array(FIRST_NAMES)[rng.integers(0, len(FIRST_NAMES), size=count)]
+    last = np.array(LAST_NAMES)[rng.integers(0, len(LAST_NAMES), size=count)]
+    return np.char.add(np.char.add(first, " "), last)
+
+
+def generate_transaction_chunk(
+    chunk_index: int,
+    count: int,
+    base_date: datetime,
+    suspicious_ratio: float = 0.15,
+    seed: int = 42,
+    chunk_size: int = FAST_CHUNK_SIZE
+) -> Dict[str, np.ndarray]:
+    """
+    Generate one chunk of transactions as column arrays
+
+    Vectorized equivalent of generate_normal_transaction and
+    generate_suspicious_transaction (same distributions and patterns).
+
+    Args:
+        chunk_index: Position of the chunk, used in the refs and the random stream
+        count: Number of rows (<= chunk_size)
+        base_date: Reference date, transactions fall in the 30 previous days
+        seed: Random seed, same seed and base date give the same rows
+
+    Returns:
+        Mapping of FAST_COLUMNS to arrays of length count
+    """
+    rng = np.random.default_rng([seed, chunk_index])
+    start = chunk_index * chunk_size
+
+    # Normal transactions
+    amount = np.round(rng.uniform(10, 2000, size=count), 2)
+    hour = rng.integers(8, 22, size=count)
+    minute = rng.integers(0, 60, size=count)
+    day = np.datetime64(base_date.date(), "D") - rng.integers(0, 31, size=count)
+    destination = np.array(SAFE_COUNTRIES)[rng.integers(0, len(SAFE_COUNTRIES), size=count)]
+    receiver_account = np.char.add("FR76", _random_digits(rng, count, 23))
+    description = np.array(NORMAL_DESCRIPTIONS, dtype="U32")[rng.integers(0, len(NORMAL_DESCRIPTIONS), size=count)]
+
+    # Suspicious patterns applied on top, like generate_suspicious_transaction
+    pattern = np.where(
+        rng.random(size=count) < suspicious_ratio,
+        rng.integers(0, len(SUSPICIOUS_PATTERNS), size=count),
+        -1
+    )
+
+    def draw_amounts(mask: np.ndarray, low: float, high: float) -> None:
+        amount[mask] = np.round(rng.uniform(low, high, size=int(mask.sum())), 2)
+
+    def send_abroad(mask: np.ndarray) -> None:
+        size = int(mask.sum())
+        choice = rng.integers(0, len(HIGH_RISK_COUNTRIES), size=size)
+        destination[mask] = np.array(HIGH_RISK_COUNTRIES)[choice]
+        prefixes = np.array([f"{country[:2]}00" for country in HIGH_RISK_COUNTRIES])[choice]
+        receiver_account[mask] = np.char.add(prefixes, _random_digits(rng, size, 21))
+
+    mask = pattern == 0  # high_amount
+    draw_amounts(mask, 8000, 50000)
+    description[mask] = "Virement urgent"
+
+    mask = pattern == 1  # night_transaction
+    hour[mask] = np.array([1, 2, 3, 4, 5, 23, 0])[rng.integers(0, 7, size=int(mask.sum()))]
+    draw_amounts(mask, 500, 3000)
+
+    mask = pattern == 2  # international_high_risk
+    send_abroad(mask)
+    draw_amounts(mask, 2000, 15000)
+    description[mask] = "Transfert international"
+
+    mask = pattern == 3  # round_amount
+    amount[mask] = np.array([1000, 2000, 3000, 5000, 10000])[rng.integers(0, 5, size=int(mask.sum()))]
+    description[mask] = "Virement"
+
+    mask = pattern == 4  # weekend_large
+    weekday = (day.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    day[mask] = day[mask] + (5 - weekday[mask]) % 7
+    draw_amounts(mask, 5000, 20000)
+
+    mask = pattern == 5  # multiple_indicators
+    draw_amounts(mask, 10000, 30000)
+    send_abroad(mask)
+    hour[mask] = rng.integers(2, 5, size=int(mask.sum()))
+    description[mask] = "Transfert urgent"
+
+    transaction_date = day.astype("datetime64[m]") + hour * 60 + minute
+    false = np.zeros(count, dtype=bool)
+
+    return {
+        "id": _random_hex(rng, count, 16, uuid4_bits=True),
+        "transaction_ref": np.char.add(f"TXN-S{seed}-", np.char.zfill(np.arange(start, start + count).astype(str), 10)),
+        "amount": amount,
+        "currency": np.full(count, "EUR"),
+        "sender_account": np.char.add("FR76", _random_digits(rng, count, 23)),
+        "receiver_account": receiver_account,
+        "sender_name": _random_names(rng, count),
+        "receiver_name": _random_names(rng, count),
+        "transaction_type": np.array([
+            TransactionType.VIREMENT.value,
+            TransactionType.CARTE.value,
+            TransactionType.PRELEVEMENT.value
+        ])[rng.integers(0, 3, size=count)],
+        "channel": np.array([
+            TransactionChannel.WEB.value,
+            TransactionChannel.MOBILE.value,
+            TransactionChannel.AGENCE.value
+        ])[rng.integers(0, 3, size=count)],
+        "country_origin": np.full(count, "FRA"),
+        "country_destination": destination,
+        "ip_address": np.char.add(
+            np.char.add("192.168.", rng.integers(1, 255, size=count).astype(str)),
+            np.char.add(".", rng.integers(1, 255, size=count).astype(str))
+        ),
+        "device_id": np.char.add("DEV-", _random_hex(rng, count, 6)),
+        "merchant_category": np.array(MERCHANT_CATEGORIES)[rng.integers(0, len(MERCHANT_CATEGORIES), size=count)],
+        "description": description,
+        "transaction_date": transaction_date,
+        "status": np.full(count, TransactionStatus.PENDING.value),
+        # COPY bypasses the ORM, Python-side column defaults are written explicitly
+        "is_suspicious": false,
+        "is_confirmed_fraud": false,
+        "is_false_positive": false,
+        "is_blocked": false,
+        "call_requested": false,
+        "call_completed": false,
+    }
+
+
+def chunk_to_copy_text(columns: Dict[str, np.ndarray]) -> str:
+    """Serialize a chunk in the COPY text format (tab separated, one row per line)"""
+    values = []
+    for name in FAST_COLUMNS:
+        column = columns[name]
+        if column.dtype == bool:
+            values.append(np.where(column, "t", "f").tolist())
+        elif name == "amount":
+            values.append(np.char.mod("%.2f", column).tolist())
+        else:
+            # Generated text never contains tabs, newlines or backslashes
+            values.append(column.astype(str).tolist())
+    return "\n".join("\t".join(row) for row in zip(*values)) + "\n"
+
+
+def chunk_to_rows(columns: Dict[str, np.ndarray]) -> List[dict]:
+    """Convert a chunk to parameter dicts for executemany"""
+    converted = {
+        name: column.tolist() for name, column in columns.items()
+        if name not in ("id", "amount", "transaction_date")
+    }
+    converted["id"] = [UUID(hex=value) for value in columns["id"].tolist()]
+    converted["amount"] = [Decimal(value) for value in np.char.mod("%.2f", columns["amount"]).tolist()]
+    converted["transaction_date"] = columns["transaction_date"].astype("datetime64[us]").tolist()
+    return [dict(zip(converted, row)) for row in zip(*converted.values())]
+
+
+def write_chunk(target_engine: Engine, columns: Dict[str, np.ndarray]) -> int:
+    """
+    Insert a chunk: COPY FROM STDIN on PostgreSQL, executemany elsewhere
+
+    Returns:
+        Number of inserted rows
+    """
+    if target_engine.dialect.name == "postgresql" and target_engine.dialect.driver == "psycopg2":
+        connection = target_engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY transactions ({', '.join(FAST_COLUMNS)}) FROM STDIN",
+                    io.StringIO(chunk_to_copy_text(columns))
+                )
+            connection.commit()
+        finally:
+            connection.close()
+    else:
+        with target_engine.begin() as connection:
+            connection.execute(insert(Transaction.__table__), chunk_to_rows(columns))
+    return len(columns["id"])
+
+
+# Engine of a worker process, created on its first chunk
+_worker_engine: Optional[Engine] = None
+
+
+def _seed_chunk(task: tuple) -> int:
+    """Worker entry point: generate and write one chunk with a per-process engine"""
+    global _worker_engine
+    chunk_index, count, base_date, suspicious_ratio, seed, chunk_size = task
+    if _worker_engine is None:
+        _worker_engine = create_engine(settings.database_url, poolclass=NullPool)
+    columns = generate_transaction_chunk(chunk_index, count, base_date, suspicious_ratio, seed, chunk_size)
+    return write_chunk(_worker_engine, columns)
+
+
+def fast_seed_database(
+    num_transactions: int,
+    suspicious_ratio: float = 0.15,
+    seed: int = 42,
+    workers: int = 1,
+    chunk_size: int = FAST_CHUNK_SIZE,
+    base_date: Optional[datetime] = None
+):
+    """
+    Seed database with generated transactions at high throughput
+
+    Args:
+        num_transactions: Total number of transactions to generate
+        suspicious_ratio: Ratio of suspicious transactions (default 15%)
+        seed: Random seed, same seed and base date give the same dataset
+        workers: Number of processes generating and writing chunks
+        chunk_size: Rows per chunk (part of the reproducibility key)
+        base_date: Reference date (default: today)
+    """
+    base_date = base_date or datetime.now()
+    if engine.dialect.name == "sqlite" and workers > 1:
+        # SQLite has a single writer, extra processes would only wait on the lock
+        print("⚠️ SQLite: falling back to a single worker")
+        workers = 1
+
+    print(f"🚀 Fast seeding {num_transactions} transactions (seed={seed}, workers={workers})...")
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        ensure_default_users(db)
+    finally:
+        db.close()
+
+    tasks = [
+        (index, min(chunk_size, num_transactions - offset), base_date, suspicious_ratio, seed, chunk_size)
+        for index, offset in enumerate(range(0, num_transactions, chunk_size))
+    ]
+
+    started = time.perf_counter()
+    inserted = 0
+    if workers > 1:
+        with multiprocessing.get_context("spawn").Pool(workers) as pool:
+            for count in pool.imap_unordered(_seed_chunk, tasks):
+                inserted += count
+                print(f"   Inserted {inserted}/{num_transactions}...")
+    else:
+        for task in tasks:
+            columns = generate_transaction_chunk(*task)
+            inserted += write_chunk(engine, columns)
+            print(f"   Inserted {inserted}/{num_transactions}...")
+
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ Fast seeding complete: {inserted} rows in {elapsed:.1f}s ({inserted / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
 def clear_transactions():
     """Clear all transactions from database"""
     db = SessionLocal()
@@ -276,10 +601,23 @@ if __name__ == "__main__":
     parser.add_argument("-n", "--num", type=int, default=500, help="Number of transactions")
     parser.add_argument("-s", "--suspicious", type=float, default=0.15, help="Ratio of suspicious transactions")
     parser.add_argument("--clear", action="store_true", help="Clear existing transactions first")
+    parser.add_argument("--fast", action="store_true", help="Vectorized generation + COPY (capacity tests)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the fast mode")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes of the fast mode")
+    parser.add_argument("--chunk-size", type=int, default=FAST_CHUNK_SIZE, help="Rows per chunk in fast mode")
     
     args = parser.parse_args()
     
     if args.clear:
         clear_transactions()
     
-    seed_database(num_transactions=args.num, suspicious_ratio=args.suspicious)
+    if args.fast:
+        fast_seed_database(
+            num_transactions=args.num,
+            suspicious_ratio=args.suspicious,
+            seed=args.seed,
+            workers=args.workers,
+            chunk_size=args.chunk_size
+        )
+    else:
+        seed_database(num_transactions=args.num, suspicious_ratio=args.suspicious)
@@ -1,20 +1,29 @@
 """
 Pytest fixtures and configuration
 """
+import os
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import StaticPool, NullPool
+
+# Audit entries are written synchronously on the test session
+os.environ.setdefault("AUDIT_ASYNC_ENABLED", "false")
+# Low bcrypt cost keeps password fixtures fast
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db
 from app.models.user import User
 from app.utils.security import get_password_hash
+from app.utils.principal_cache import principal_cache
 
 
-# Test database URL (in-memory SQLite)
-SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///:memory:"
+# Test database URL (in-memory SQLite, shared by the sync and async engines)
+SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///file:fraud_test?mode=memory&cache=shared&uri=true"
+SQLALCHEMY_TEST_ASYNC_DATABASE_URL = "sqlite+aiosqlite:///file:fraud_test?mode=memory&cache=shared&uri=true"
 
 engine = create_engine(
     SQLALCHEMY_TEST_DATABASE_URL,
@@ -22,7 +31,11 @@ engine = create_engine(
     poolclass=StaticPool
 )
 
+# NullPool: each TestClient runs its own event loop
+async_engine = create_async_engine(SQLALCHEMY_TEST_ASYNC_DATABASE_URL, poolclass=NullPool)
+
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 
 @pytest.fixture(scope="function")
@@ -47,7 +60,13 @@ def client(db_session):
         finally:
             pass
     
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    principal_cache.clear()
     
     with TestClient(app) as test_client:
         yield test_client
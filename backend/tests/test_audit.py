@@ -0,0 +1,186 @@
+"""
+Tests for the batched audit trail writer
+"""
+import threading
+import time
+
+import pytest
+
+from app.middleware.audit import AuditLogger, AuditWriter, audit_writer
+from app.models.audit_log import AuditLog
+
+
+class RecordingSession:
+    """Minimal session double recording executed batches"""
+    
+    def __init__(self, batches: list, fail: bool = False):
+        self.batches = batches
+        self.fail = fail
+        self.added = []
+        self.commits = 0
+    
+    def execute(self, statement, rows):
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        self.batches.append(list(rows))
+    
+    def add(self, obj):
+        self.added.append(obj)
+    
+    def commit(self):
+        self.commits += 1
+    
+    def rollback(self):
+        pass
+    
+    def close(self):
+        pass
+
+
+class TestAuditWriter:
+    """Test the background audit writer"""
+    
+    def test_entries_flushed_in_batches_on_stop(self):
+        """Test that buffered entries are written in batches when stopping"""
+        batches = []
+        writer = AuditWriter(
+            session_factory=lambda: RecordingSession(batches),
+            batch_size=3,
+            flush_interval=60.0
+        )
+        writer.start()
+        for i in range(7):
+            assert writer.submit({"action": f"action_{i}"})
+        writer.stop()
+        
+        assert sum(len(b) for b in batches) == 7
+        assert all(len(b) <= 3 for b in batches)
+        assert writer.written_count == 7
+        assert not writer.is_running
+    
+    def test_explicit_zero_settings(self):
+        """Test that 0 is honoured instead of falling back to the configured defaults"""
+        batches = []
+        writer = AuditWriter(
+            session_factory=lambda: RecordingSession(batches),
+            batch_size=10,
+            flush_interval=0,
+            max_queue_size=0
+        )
+        assert writer.flush_interval == 0
+        assert writer._queue.maxsize == 0
+        
+        writer.start()
+        writer.submit({"action": "login_success"})
+        deadline = time.monotonic() + 2
+        while not batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+        writer.stop()
+        
+        assert batches == [[{"action": "login_success"}]]
+        with pytest.raises(ValueError):
+            AuditWriter(batch_size=0)
+    
+    def test_stop_does_not_drain_a_busy_writer(self):
+        """Test that stop() leaves the queue to a writer thread still running"""
+        batches = []
+        release = threading.Event()
+        
+        class SlowSession(RecordingSession):
+            def execute(self, statement, rows):
+                release.wait(5)
+                super().execute(statement, rows)
+        
+        writer = AuditWriter(session_factory=lambda: SlowSession(batches), batch_size=1, flush_interval=0)
+        writer.start()
+        thread = writer._thread
+        for i in range(3):
+            writer.submit({"action": f"action_{i}"})
+        deadline = time.monotonic() + 2
+        while writer._queue.qsize() > 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        
+        writer.stop(timeout=0.05)
+        assert thread.is_alive()
+        assert writer._queue.qsize() == 2
+        
+        release.set()
+        thread.join(5)
+        assert batches == [[{"action": f"action_{i}"}] for i in range(3)]
+        assert writer.written_count == 3
+    
+    def test_submit_rejected_when_not_running(self):
+        """Test that callers fall back when the writer is stopped"""
+        writer = AuditWriter(session_factory=lambda: RecordingSession([]))
+        
+        assert writer.submit({"action": "login_success"}) is False
+    
+    def test_submit_rejected_when_buffer_full(self):
+        """Test the bounded buffer"""
+        writer = AuditWriter(
+            session_factory=lambda: RecordingSession([]),
+            batch_size=10,
+            flush_interval=60.0,
+            max_queue_size=2
+        )
+        writer._thread = type("AliveThread", (), {"is_alive": lambda self: True})()
+        
+        assert writer.submit({"action": "a"})
+        assert writer.submit({"action": "b"})
+        assert writer.submit({"action": "c"}) is False
+        assert writer.overflow_count == 1
+    
+    def test_failed_batch_is_counted(self):
+        """Test that a failing batch does not stop the writer"""
+        writer = AuditWriter(
+            session_factory=lambda: RecordingSession([], fail=True),
+            batch_size=5,
+            flush_interval=60.0
+        )
+        writer.start()
+        writer.submit({"action": "a"})
+        writer.stop()
+        
+        assert writer.failed_count == 1
+        assert writer.written_count == 0
+
+
+class TestAuditLogger:
+    """Test audit logger modes"""
+    
+    def test_sync_mode_commits_on_request_session(self):
+        """Test that sync=True bypasses the background writer"""
+        db = RecordingSession([])
+        log = AuditLogger.log_action(
+            db=db,
+            user_id=None,
+            action="block_transaction",
+            resource_type="transaction",
+            sync=True
+        )
+        
+        assert isinstance(log, AuditLog)
+        assert db.added == [log]
+        assert db.commits == 1
+    
+    def test_async_mode_does_not_touch_request_session(self):
+        """Test that entries go to the writer when it is running"""
+        batches = []
+        original_factory = audit_writer.session_factory
+        audit_writer.session_factory = lambda: RecordingSession(batches)
+        audit_writer.start()
+        try:
+            db = RecordingSession([])
+            AuditLogger.log_action(
+                db=db,
+                user_id=None,
+                action="login_success",
+                resource_type="authentication"
+            )
+            assert db.added == []
+            assert db.commits == 0
+        finally:
+            audit_writer.stop()
+            audit_writer.session_factory = original_factory
+        
+        assert batches[0][0]["action"] == "login_success"
@@ -1,8 +1,18 @@
 """
 Tests for authentication endpoints
 """
+import asyncio
 import pytest
 from fastapi import status
+from passlib.hash import bcrypt
+from uuid import uuid4
+
+from app.config import settings
+
+from app.models.audit_log import AuditLog
+from app.models.user import User
+from app.utils.principal_cache import PrincipalCache
+from app.utils.security import create_access_token, password_hasher, PasswordHasher, PasswordHasherBusy
 
 
 class TestAuthEndpoints:
@@ -50,6 +60,14 @@ class TestAuthEndpoints:
         
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
     
+    def test_login_attempts_audited(self, client, db_session, test_user):
+        """Test that login audit entries are committed on the async session"""
+        client.post("/auth/login", json={"email": "test@bpce.fr", "password": "WrongPassword!"})
+        client.post("/auth/login", json={"email": "test@bpce.fr", "password": "TestPass123!"})
+        
+        actions = [log.action for log in db_session.query(AuditLog).order_by(AuditLog.created_at)]
+        assert actions == ["login_failed", "login_success"]
+    
     def test_login_invalid_email(self, client):
         """Test login with invalid email format"""
         response = client.post(
@@ -100,3 +118,114 @@ class TestAuthEndpoints:
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
         assert "access_token" in data
+    
+    def test_deactivated_user_rejected_despite_cache(self, client, auth_headers, db_session, test_user):
+        """Test that deactivating a user evicts the cached principal"""
+        assert client.get("/auth/me", headers=auth_headers).status_code == status.HTTP_200_OK
+        
+        test_user.is_active = False
+        db_session.commit()
+        
+        response = client.get("/auth/me", headers=auth_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+    
+    def test_role_change_visible_despite_cache(self, client, auth_headers, db_session, test_user):
+        """Test that a role change is visible on the next request"""
+        client.get("/auth/me", headers=auth_headers)
+        
+        test_user.role = "admin"
+        db_session.commit()
+        
+        response = client.get("/auth/me", headers=auth_headers)
+        assert response.json()["role"] == "admin"
+
+    
+    def test_login_upgrades_outdated_hash(self, client, db_session, test_user):
+        """Test transparent rehash when the configured bcrypt cost changed"""
+        test_user.hashed_password = bcrypt.using(rounds=5).hash("TestPass123!")
+        db_session.commit()
+        
+        response = client.post(
+            "/auth/login",
+            json={"email": "test@bpce.fr", "password": "TestPass123!"}
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        db_session.refresh(test_user)
+        assert test_user.hashed_password.startswith(f"$2b${settings.bcrypt_rounds:02d}$")
+    
+    def test_login_rejected_when_hasher_saturated(self, client, test_user, monkeypatch):
+        """Test that a login storm is shed with 503 instead of queuing"""
+        async def busy(*args):
+            raise PasswordHasherBusy()
+        
+        monkeypatch.setattr(password_hasher, "verify_and_update", busy)
+        response = client.post(
+            "/auth/login",
+            json={"email": "test@bpce.fr", "password": "TestPass123!"}
+        )
+        
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.headers["Retry-After"] == "1"
+
+
+class TestPasswordHasher:
+    """Test the off-loop password hasher"""
+    
+    def test_hash_and_verify(self):
+        """Test hashing and verification on the worker pool"""
+        hasher = PasswordHasher(max_workers=2, max_pending=4)
+        
+        async def run():
+            hashed = await hasher.hash("Secret123!")
+            return await hasher.verify_and_update("Secret123!", hashed)
+        
+        is_valid, new_hash = asyncio.run(run())
+        
+        assert is_valid is True
+        assert new_hash is None
+        assert hasher.get_status()["operations"] == 2
+    
+    def test_rejects_beyond_max_pending(self):
+        """Test the pending work bound"""
+        hasher = PasswordHasher(max_workers=1, max_pending=1)
+        hasher._pending = 1
+        
+        with pytest.raises(PasswordHasherBusy):
+            asyncio.run(hasher.hash("Secret123!"))
+        assert hasher.rejected == 1
+
+
+class TestPrincipalCache:
+    """Test the authenticated user cache"""
+    
+    def test_user_cached_by_id_and_email(self):
+        """Test lookups by id and by email"""
+        cache = PrincipalCache(ttl_seconds=30, max_entries=10)
+        user = User(id=uuid4(), email="cached@bpce.fr", role="analyst", is_active=True)
+        cache.set_user(user)
+        
+        assert cache.get_user(user_id=str(user.id)) is user
+        assert cache.get_user(email="cached@bpce.fr") is user
+        
+        cache.invalidate_user(user_id=user.id)
+        assert cache.get_user(user_id=str(user.id)) is None
+        assert cache.get_user(email="cached@bpce.fr") is None
+    
+    def test_expired_user_not_served(self):
+        """Test that entries expire after the TTL"""
+        cache = PrincipalCache(ttl_seconds=-1)
+        user = User(id=uuid4(), email="expired@bpce.fr")
+        cache.set_user(user)
+        
+        assert cache.get_user(user_id=str(user.id)) is None
+    
+    def test_token_payload_memoized(self):
+        """Test that a decoded token is reused and invalid tokens are rejected"""
+        cache = PrincipalCache(ttl_seconds=30)
+        token = create_access_token({"sub": "memo@bpce.fr", "user_id": "1", "role": "analyst"})
+        
+        first = cache.decode_token(token)
+        assert first["sub"] == "memo@bpce.fr"
+        assert cache.decode_token(token) is first
+        assert cache.decode_token("invalid_token_here") is None
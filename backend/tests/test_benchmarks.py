@@ -0,0 +1,65 @@
+"""
+Tests for the benchmark harness
+"""
+import random
+
+from benchmarks.data import iter_transaction_rows, load_transactions, parse_scale
+from benchmarks.runner import compare_reports, summarize
+
+
+class TestBenchmarkHarness:
+    """Test data generation, statistics and comparison"""
+    
+    def test_generated_data_is_reproducible(self):
+        """Test that the same seed yields the same dataset"""
+        state = random.getstate()
+        first = list(iter_transaction_rows(50, seed=7))
+        second = list(iter_transaction_rows(50, seed=7))
+        
+        assert first == second
+        assert len({row["id"] for row in first}) == 50
+        assert all(row["id"].version == 4 for row in first)
+        assert random.getstate() == state
+        assert parse_scale("1m") == 1_000_000
+        assert parse_scale("2500") == 2500
+    
+    def test_load_transactions_can_be_rerun(self, db_session):
+        """Test that seeding the same rows twice skips the existing ones"""
+        from app.models.transaction import Transaction
+        
+        assert load_transactions(lambda: db_session, 30, seed=7, batch_size=20) == 30
+        assert load_transactions(lambda: db_session, 40, seed=7, batch_size=20) == 10
+        
+        stored = db_session.query(Transaction).all()
+        assert len(stored) == 40
+        assert {t.id for t in stored} == {row["id"] for row in iter_transaction_rows(40, seed=7)}
+    
+    def test_summarize_and_compare(self):
+        """Test percentiles and regression detection"""
+        result = summarize("scoring.demo", [0.001] * 98 + [0.010, 0.020])
+        assert result["p50_ms"] == 1.0
+        assert result["max_ms"] == 20.0
+        
+        baseline = {"results": [result, summarize("scoring.other", [0.002])]}
+        current = {"results": [summarize("scoring.demo", [0.0015] * 100), summarize("scoring.other", [0.002])]}
+        comparison = {c["name"]: c for c in compare_reports(baseline, current, threshold=0.10)}
+        
+        assert comparison["scoring.demo"]["regression"] is True
+        assert comparison["scoring.other"]["regression"] is False
+    
+    def test_serialization_paths_agree(self):
+        """Test that the fast responses encode exactly what FastAPI's default path does"""
+        from app.schemas.transaction import TransactionListResponse
+        from app.utils.responses import FastJSONResponse, ModelJSONResponse
+        from benchmarks.serialization import build_pages, default_renderer, run_serialization
+        
+        transactions = build_pages(10)["transactions"]
+        page = TransactionListResponse(items=transactions, total=10, page=1, page_size=10, total_pages=1)
+        body = default_renderer(TransactionListResponse)(page)
+        
+        assert ModelJSONResponse(page).body == body
+        assert default_renderer(TransactionListResponse, FastJSONResponse)(page) == body
+        assert f'"amount":"{transactions[0].amount}"'.encode() in body
+        
+        run = run_serialization(iterations=3, page_size=10, warmup=0)
+        assert {r["name"] for r in run["results"]} >= {"serialization.list_page_default", "serialization.list_page_model_json"}
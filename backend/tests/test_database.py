@@ -0,0 +1,75 @@
+"""
+Tests for database engine configuration and pool instrumentation
+"""
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import create_engine, text
+
+from app.config import Settings, settings
+from app.database import (
+    PoolMetrics,
+    InstrumentedQueuePool,
+    get_async_database_url,
+    get_engine_options,
+    instrument_engine,
+)
+
+
+class TestDatabaseConfiguration:
+    """Test engine options derived from settings"""
+    
+    def test_async_database_url(self):
+        """Test that sync URLs are mapped to async drivers"""
+        assert get_async_database_url("postgresql://u:p@db:5432/fraud") == "postgresql+asyncpg://u:p@db:5432/fraud"
+        assert get_async_database_url("sqlite:///./fraud.db") == "sqlite+aiosqlite:///./fraud.db"
+        assert get_async_database_url("postgresql+asyncpg://db/fraud") == "postgresql+asyncpg://db/fraud"
+    
+    def test_pool_options_from_settings(self, monkeypatch):
+        """Test that pool sizing comes from settings"""
+        monkeypatch.setattr(settings, "db_pool_size", 4)
+        monkeypatch.setattr(settings, "db_pool_pre_ping", "recycle")
+        
+        options = get_engine_options()
+        
+        assert options["pool_size"] == 4
+        assert options["pool_pre_ping"] is False
+        assert options["poolclass"] is InstrumentedQueuePool
+    
+    def test_pre_ping_mode_is_validated(self, monkeypatch):
+        """Test that an unknown pre-ping mode fails at startup instead of disabling it"""
+        monkeypatch.setenv("DB_POOL_PRE_PING", "true")
+        with pytest.raises(ValidationError):
+            Settings()
+    
+    def test_pgbouncer_mode(self, monkeypatch):
+        """Test PgBouncer compatible options"""
+        monkeypatch.setattr(settings, "db_pgbouncer_mode", True)
+        
+        options = get_engine_options(is_async=True)
+        
+        assert options["poolclass"].__name__ == "NullPool"
+        assert options["connect_args"]["statement_cache_size"] == 0
+        assert "pool_size" not in options
+
+
+class TestPoolMetrics:
+    """Test pool event listeners"""
+    
+    def test_checkout_counters(self, tmp_path):
+        """Test that checkouts, checkins and in-use connections are reported"""
+        metrics = PoolMetrics("test")
+        pool_class = type("TestPool", (InstrumentedQueuePool,), {"metrics": metrics})
+        engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=pool_class, pool_size=2)
+        instrument_engine(engine, metrics)
+        
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            assert metrics.snapshot()["in_use"] == 1
+        
+        snapshot = metrics.snapshot()
+        assert snapshot["checkouts"] == 1
+        assert snapshot["checkins"] == 1
+        assert snapshot["connects"] == 1
+        assert snapshot["in_use"] == 0
+        assert snapshot["wait_time_max_ms"] >= 0
+        engine.dispose()
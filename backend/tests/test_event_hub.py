@@ -0,0 +1,201 @@
+"""
+Tests for the live analysis event hub
+"""
+import asyncio
+import json
+import threading
+import uuid
+from datetime import datetime
+
+from fastapi import status
+
+from app.config import settings
+from app.services.analysis_tracker import AnalysisTracker
+from app.services.event_hub import EventHub, PostgresEventBridge, format_sse
+from app.utils.dependencies import get_stream_user
+from tests.conftest import TestingAsyncSessionLocal
+
+
+class TestEventHub:
+    """Test in-process publish/subscribe"""
+
+    def test_publish_without_subscribers_is_noop(self):
+        """Test that nothing is built when nobody listens"""
+        hub = EventHub()
+        hub.publish(EventHub.ANALYSIS_STARTED, transaction_id="abc")
+        assert hub.published == 0
+
+    def test_delivers_events_in_order(self):
+        """Test delivery from the subscriber's own loop"""
+        hub = EventHub()
+
+        async def run():
+            subscription = hub.subscribe()
+            hub.publish(EventHub.ANALYSIS_STARTED, transaction_id="abc")
+            hub.publish(EventHub.SCORED, transaction_id="abc", fraud_score=80)
+            first = await subscription.get(timeout=1)
+            second = await subscription.get(timeout=1)
+            hub.unsubscribe(subscription)
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert first["type"] == EventHub.ANALYSIS_STARTED
+        assert second["type"] == EventHub.SCORED
+        assert second["fraud_score"] == 80
+        assert hub.get_status()["subscribers"] == 0
+
+    def test_publish_from_worker_thread(self):
+        """Test that events published from the threadpool reach the loop"""
+        hub = EventHub()
+
+        async def run():
+            subscription = hub.subscribe()
+            worker = threading.Thread(
+                target=hub.publish,
+                args=(EventHub.STEP_COMPLETED,),
+                kwargs={"step": "ml"}
+            )
+            worker.start()
+            event = await subscription.get(timeout=1)
+            worker.join()
+            return event
+
+        event = asyncio.run(run())
+        assert event["step"] == "ml"
+
+    def test_slow_subscriber_drops_oldest(self):
+        """Test that a full queue keeps the most recent events"""
+        hub = EventHub(max_queue_size=2)
+
+        async def run():
+            subscription = hub.subscribe()
+            for i in range(5):
+                hub.publish(EventHub.STEP_COMPLETED, index=i)
+            events = [await subscription.get(timeout=1) for _ in range(2)]
+            return events, subscription.dropped
+
+        events, dropped = asyncio.run(run())
+        assert [e["index"] for e in events] == [3, 4]
+        assert dropped == 3
+
+    def test_bridge_skips_own_notifications(self):
+        """Test that the LISTEN/NOTIFY bridge only relays other workers"""
+        hub = EventHub()
+        delivered = []
+        hub.deliver = delivered.append
+        bridge = PostgresEventBridge(hub, "postgresql+psycopg2://u:p@db:5432/fraud", "events")
+
+        own = json.dumps({"type": EventHub.SCORED, "origin": hub.origin})
+        other = json.dumps({"type": EventHub.SCORED, "origin": "other-worker"})
+        bridge._on_notify(None, 1, "events", own)
+        bridge._on_notify(None, 1, "events", other)
+
+        assert bridge.dsn == "postgresql://u:p@db:5432/fraud"
+        assert delivered == [{"type": EventHub.SCORED}]
+
+    def test_bridge_feeds_analysis_tracker(self):
+        """Test that analyses started on other workers are listed in progress"""
+        hub = EventHub()
+        hub.deliver = lambda event: None
+        tracker = AnalysisTracker()
+        hub.add_remote_handler(tracker.apply_event)
+        bridge = PostgresEventBridge(hub, "postgresql://u:p@db:5432/fraud", "events")
+        transaction_id = uuid.uuid4()
+
+        def notify(event_type, **data):
+            event = {"type": event_type, "transaction_id": str(transaction_id), "origin": "other-worker", **data}
+            bridge._on_notify(None, 1, "events", json.dumps(event))
+
+        notify(EventHub.ANALYSIS_STARTED, started_at=datetime(2024, 1, 1, 12).isoformat())
+        assert tracker.in_progress() == {}
+
+        started_at = datetime.utcnow()
+        notify(EventHub.ANALYSIS_STARTED, started_at=started_at.isoformat())
+        assert tracker.in_progress() == {transaction_id: started_at}
+        notify(EventHub.SCORED, fraud_score=80)
+        assert transaction_id in tracker.in_progress()
+        notify(EventHub.FAILED, error="TimeoutError")
+        assert tracker.in_progress() == {}
+
+    def test_format_sse(self):
+        """Test Server-Sent Events framing"""
+        message = format_sse({"type": EventHub.COMPLETED, "at": datetime(2024, 1, 1)}, 7)
+        lines = message.split("\n")
+        assert lines[0] == "id: 7"
+        assert lines[1] == "event: analysis.completed"
+        assert json.loads(lines[2][len("data: "):])["at"] == "2024-01-01 00:00:00"
+        assert message.endswith("\n\n")
+
+
+class TestAnalysisStream:
+    """Test the analysis feed endpoints"""
+
+    def test_stream_requires_token(self, client):
+        """Test that the stream rejects missing or invalid tokens"""
+        response = client.get("/transactions/analysis/stream")
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+        response = client.get("/transactions/analysis/stream", params={"token": "invalid"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_stream_token_is_single_purpose(self, client, auth_headers, test_user):
+        """Test that stream and access tokens are not interchangeable"""
+        response = client.post("/auth/stream-token", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["expires_in"] == settings.stream_token_expire_seconds
+        stream_token = response.json()["token"]
+
+        async def resolve():
+            async with TestingAsyncSessionLocal() as db:
+                return await get_stream_user(token=stream_token, db=db)
+
+        assert asyncio.run(resolve()).email == test_user.email
+
+        response = client.get("/auth/me", headers={"Authorization": f"Bearer {stream_token}"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        access_token = auth_headers["Authorization"].split()[1]
+        response = client.get("/transactions/analysis/stream", params={"token": access_token})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_analyze_publishes_lifecycle(self, client, auth_headers, monkeypatch):
+        """Test that an analysis emits started, scored, explained and completed"""
+        from app.routers import transactions
+
+        published = []
+        monkeypatch.setattr(
+            transactions.event_hub, "publish",
+            lambda event_type, **data: published.append((event_type, data))
+        )
+
+        create_response = client.post(
+            "/transactions",
+            json={
+                "amount": 1500.00,
+                "currency": "EUR",
+                "sender_account": "FR7630001007941234567890185",
+                "receiver_account": "FR7630004000031234567890143",
+                "sender_name": "Jean Dupont",
+                "receiver_name": "Marie Martin",
+                "transaction_type": "virement",
+                "channel": "web",
+                "country_origin": "FRA",
+                "country_destination": "FRA",
+                "transaction_date": datetime.now().isoformat()
+            },
+            headers=auth_headers
+        )
+        transaction_id = create_response.json()["id"]
+
+        response = client.post(f"/transactions/{transaction_id}/analyze", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+
+        lifecycle = [e for e, _ in published if e != EventHub.STEP_COMPLETED]
+        assert lifecycle == [
+            EventHub.ANALYSIS_STARTED,
+            EventHub.SCORED,
+            EventHub.EXPLAINED,
+            EventHub.COMPLETED
+        ]
+        assert all(data["transaction_id"] == transaction_id for _, data in published)
+        assert published[-1][1]["fraud_score"] == response.json()["fraud_score"]
@@ -0,0 +1,305 @@
+"""
+Tests for the LLM explanation priority queue
+"""
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.explanation_job import ExplanationJob, ExplanationJobStatus
+from app.models.transaction import Transaction
+from app.services.explanation_queue import ExplanationQueue, QueueEntry
+from app.services.llm_explainer import LLMExplainerService
+from benchmarks.fake_ollama import FAKE_EXPLANATION, create_fake_ollama
+from tests.conftest import TestingSessionLocal
+
+
+class RecordingExplainer(LLMExplainerService):
+    """Explainer answering instantly, in the order it is called"""
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__()
+        self.delay = delay
+        self.calls = []
+
+    async def explain_transaction(self, transaction, fraud_score, risk_factors):
+        self.calls.append(transaction.transaction_ref)
+        await asyncio.sleep(self.delay)
+        return f"LLM {transaction.transaction_ref}"
+
+
+class FailingExplainer(RecordingExplainer):
+    """Explainer raising for its first calls"""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+
+    async def explain_transaction(self, transaction, fraud_score, risk_factors):
+        if len(self.calls) < self.failures:
+            self.calls.append(transaction.transaction_ref)
+            raise RuntimeError("Ollama a repondu 500")
+        return await super().explain_transaction(transaction, fraud_score, risk_factors)
+
+
+def add_transaction(db, ref: str, amount: float) -> Transaction:
+    transaction = Transaction(
+        transaction_ref=ref,
+        amount=amount,
+        sender_account="FR7630001007941234567890185",
+        receiver_account="FR7630004000031234567890143",
+        receiver_name="Marie Martin",
+        transaction_type="virement",
+        transaction_date=datetime(2024, 3, 12, 14, 30)
+    )
+    db.add(transaction)
+    db.commit()
+    return transaction
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Sessions on a file-backed SQLite database: the workers and the reload use their own connections"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'queue.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(session_factory):
+    """Session of the test itself, on the file-backed database"""
+    session = session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+async def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+class TestExplanationQueue:
+    """Test priority, aging and the durable background jobs"""
+
+    def test_priority_with_aging(self):
+        """Test that alerts go first and that waiting entries catch up"""
+        queue = ExplanationQueue(TestingSessionLocal, RecordingExplainer())
+        low = QueueEntry(40, [], enqueued_at=0)
+        medium = QueueEntry(60, [], enqueued_at=0)
+        critical = QueueEntry(90, [], enqueued_at=60)
+        for entry in (low, medium, critical):
+            queue._push(entry)
+        assert [queue._pop() for _ in range(3)] == [critical, medium, low]
+
+        # After 20 minutes the low-risk upgrade overtakes a fresh critical alert
+        fresh = QueueEntry(90, [], enqueued_at=1200)
+        queue._push(fresh)
+        queue._push(low)
+        assert queue._pop() is low
+
+    def test_background_jobs_by_risk(self, session_factory, db_session):
+        """Test that scored transactions get a fallback now and the LLM by risk"""
+        explainer = RecordingExplainer()
+        queue = ExplanationQueue(session_factory, explainer, poll_interval=60)
+        transactions = {
+            ref: add_transaction(db_session, ref, amount)
+            for ref, amount in (("TXN-LOW", 50), ("TXN-CRIT", 60000), ("TXN-MED", 9500))
+        }
+        scored = [
+            (transactions["TXN-LOW"], (20, False, [])),
+            (transactions["TXN-CRIT"], (92, True, ["Montant tres eleve"])),
+            (transactions["TXN-MED"], (60, False, ["Structuration possible"])),
+        ]
+        assert queue.enqueue_scored(scored) == 3
+
+        db_session.expire_all()
+        assert db_session.get(Transaction, transactions["TXN-CRIT"].id).ai_explanation.startswith("ALERTE CRITIQUE")
+        # Jobs written by another process are picked up by the reload
+        assert queue.reload() == 3
+
+        async def scenario():
+            await queue.start()
+            await wait_for(lambda: queue.stats["explained"] + queue.stats["upgraded"] == 3)
+            await queue.stop()
+
+        asyncio.run(scenario())
+
+        assert explainer.calls == ["TXN-CRIT", "TXN-MED", "TXN-LOW"]
+        assert queue.stats["upgraded"] == 1
+        db_session.expire_all()
+        for ref, transaction in transactions.items():
+            assert db_session.get(Transaction, transaction.id).ai_explanation == f"LLM {ref}"
+        jobs = db_session.query(ExplanationJob).all()
+        assert {job.status for job in jobs} == {ExplanationJobStatus.DONE.value}
+        assert all(job.attempts == 1 for job in jobs)
+        # Already claimed: another worker reloading the table finds nothing
+        assert queue.reload() == 0
+
+    def test_background_upgrade_keeps_newer_explanation(self, session_factory, db_session):
+        """Test that a job only replaces its own rule-based text"""
+        explainer = RecordingExplainer()
+        queue = ExplanationQueue(session_factory, explainer, poll_interval=60)
+        kept = add_transaction(db_session, "TXN-KEPT", 60000)
+        upgraded = add_transaction(db_session, "TXN-UPGRADED", 60000)
+        queue.enqueue_scored([
+            (kept, (92, True, ["Montant tres eleve"])),
+            (upgraded, (92, True, ["Montant tres eleve"])),
+        ])
+        # Analysed again by an analyst while the job was waiting
+        db_session.get(Transaction, kept.id).ai_explanation = "Explication de la nouvelle analyse"
+        db_session.commit()
+        queue.reload()
+
+        async def scenario():
+            await queue.start()
+            await wait_for(lambda: queue.stats["explained"] == 2)
+            await queue.stop()
+
+        asyncio.run(scenario())
+
+        db_session.expire_all()
+        assert db_session.get(Transaction, kept.id).ai_explanation == "Explication de la nouvelle analyse"
+        assert db_session.get(Transaction, upgraded.id).ai_explanation == "LLM TXN-UPGRADED"
+        assert {job.status for job in db_session.query(ExplanationJob)} == {ExplanationJobStatus.DONE.value}
+
+    def test_failed_jobs_retried_then_failed(self, session_factory, db_session):
+        """Test the retries of a failing job, with a backoff, up to max_attempts"""
+        explainer = FailingExplainer(failures=2)
+        queue = ExplanationQueue(session_factory, explainer, poll_interval=0.02, max_attempts=3, retry_backoff=0)
+        recovered = add_transaction(db_session, "TXN-RECOVERED", 60000)
+        queue.enqueue_scored([(recovered, (92, True, ["Montant tres eleve"]))])
+        queue.reload()
+
+        async def scenario():
+            await queue.start()
+            # Two failures then the LLM answer, within max_attempts
+            await wait_for(lambda: queue.stats["explained"] == 1)
+            explainer.calls.clear()
+            explainer.failures = 3
+            queue.enqueue_scored([(add_transaction(db_session, "TXN-BROKEN", 60000), (92, True, []))])
+            await wait_for(lambda: queue.stats["failed"] == 1)
+            await queue.stop()
+
+        asyncio.run(scenario())
+
+        assert queue.stats["retried"] == 4
+        db_session.expire_all()
+        jobs = {job.transaction.transaction_ref: job for job in db_session.query(ExplanationJob)}
+        assert jobs["TXN-RECOVERED"].status == ExplanationJobStatus.DONE.value
+        assert jobs["TXN-RECOVERED"].attempts == 3
+        assert db_session.get(Transaction, recovered.id).ai_explanation == "LLM TXN-RECOVERED"
+        assert jobs["TXN-BROKEN"].status == ExplanationJobStatus.FAILED.value
+        assert jobs["TXN-BROKEN"].attempts == 3
+        assert jobs["TXN-BROKEN"].last_error == "Ollama a repondu 500"
+
+    def test_retry_waits_for_backoff(self, session_factory, db_session):
+        """Test that a failed job is not reloaded before its backoff"""
+        queue = ExplanationQueue(session_factory, FailingExplainer(failures=1), poll_interval=60, retry_backoff=60)
+        queue.enqueue_scored([(add_transaction(db_session, "TXN-CRIT", 60000), (92, True, []))])
+        queue.reload()
+
+        async def scenario():
+            await queue.start()
+            await wait_for(lambda: queue.stats["retried"] == 1)
+            await queue.stop()
+
+        asyncio.run(scenario())
+
+        job = db_session.query(ExplanationJob).one()
+        assert job.status == ExplanationJobStatus.QUEUED.value
+        assert queue.reload() == 0
+
+    def test_analysis_waits_or_defers(self, session_factory, db_session):
+        """Test the inline path: LLM for alerts, instant fallback otherwise"""
+        explainer = RecordingExplainer(delay=0.2)
+        queue = ExplanationQueue(session_factory, explainer, wait_timeout=0.05, poll_interval=60)
+        alert = add_transaction(db_session, "TXN-ALERT", 25000)
+        routine = add_transaction(db_session, "TXN-ROUTINE", 80)
+
+        async def scenario():
+            await queue.start()
+            queue.wait_timeout = 5.0
+            explained = await queue.explain(alert, 88, ["Montant eleve"], db_session)
+            low = await queue.explain(routine, 15, [], db_session)
+            # Ollama busy past the timeout: fallback now, upgrade later
+            queue.wait_timeout = 0.05
+            busy = asyncio.create_task(queue.explain(alert, 88, [], db_session))
+            deferred = await queue.explain(alert, 91, [], db_session)
+            await busy
+            await queue.stop()
+            return explained, low, deferred
+
+        explained, low, deferred = asyncio.run(scenario())
+        db_session.commit()
+
+        assert explained == "LLM TXN-ALERT"
+        assert low.startswith("TRANSACTION NORMALE")
+        assert deferred.startswith("ALERTE CRITIQUE")
+        assert explainer.calls == ["TXN-ALERT", "TXN-ALERT"]
+        assert queue.stats["deferred"] == 2
+        jobs = db_session.query(ExplanationJob).all()
+        assert len(jobs) == 3
+        assert all(job.status == ExplanationJobStatus.QUEUED.value for job in jobs)
+
+    def test_background_jobs_batched(self, session_factory, db_session):
+        """Test that consecutive jobs of a risk level share one LLM call"""
+        fake_ollama = create_fake_ollama(token_latency=0.0)
+        explainer = LLMExplainerService(transport=httpx.ASGITransport(app=fake_ollama))
+        queue = ExplanationQueue(session_factory, explainer, batch_size=4, poll_interval=60)
+        scored = [
+            (add_transaction(db_session, f"TXN-CRIT-{i}", 50000 + i), (90 + i, True, ["Montant tres eleve"]))
+            for i in range(3)
+        ] + [(add_transaction(db_session, "TXN-LOW", 40), (10, False, []))]
+        queue.enqueue_scored(scored)
+        queue.reload()
+
+        async def scenario():
+            await queue.start()
+            await wait_for(lambda: queue.stats["explained"] + queue.stats["upgraded"] == 4)
+            await queue.stop()
+
+        asyncio.run(scenario())
+
+        assert fake_ollama.state.stats.requests == 2
+        db_session.expire_all()
+        assert {t.ai_explanation for t in db_session.query(Transaction).all()} == {FAKE_EXPLANATION}
+
+    def test_background_jobs_resume_after_outage(self, session_factory, db_session):
+        """Test that the workers sleep while the circuit is open and send the recovery probe themselves"""
+        fake_ollama = create_fake_ollama(token_latency=0.0)
+        explainer = LLMExplainerService(transport=httpx.ASGITransport(app=fake_ollama))
+        explainer.breaker.recovery_timeout = 0.3
+        for _ in range(explainer.breaker.failure_threshold):
+            explainer.breaker.record_failure()
+        queue = ExplanationQueue(session_factory, explainer, poll_interval=0.02)
+        transaction = add_transaction(db_session, "TXN-CRIT", 60000)
+        queue.enqueue_scored([(transaction, (92, True, ["Montant tres eleve"]))])
+        queue.reload()
+
+        async def scenario():
+            await queue.start()
+            # Circuit open: the job is put back once, Ollama is not called
+            await asyncio.sleep(0.15)
+            assert fake_ollama.state.stats.requests == 0
+            assert queue.stats["postponed"] == 1
+            # An analysis meanwhile gets the fallback and an upgrade job at once
+            explained = await asyncio.wait_for(queue.explain(transaction, 92, [], db_session), 0.1)
+            assert explained.startswith("ALERTE CRITIQUE")
+            await wait_for(lambda: queue.stats["explained"] + queue.stats["upgraded"] == 1)
+            await queue.stop()
+
+        asyncio.run(scenario())
+
+        assert fake_ollama.state.stats.requests == 1
+        assert explainer.breaker.state == "closed"
+        db_session.expire_all()
+        assert db_session.get(Transaction, transaction.id).ai_explanation == FAKE_EXPLANATION
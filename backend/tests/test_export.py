@@ -0,0 +1,177 @@
+"""
+Tests for the streaming transaction exports
+"""
+import csv
+import io
+import json
+
+import numpy as np
+import pytest
+from fastapi import status
+
+from app.models.transaction import Transaction
+from app.routers import transactions as transactions_router
+from app.services.fraud_detection import FEATURE_NAMES, fraud_detection_service
+from app.services.llm_explainer import LLMExplainerService
+from app.services.report_export import DEFAULT_REPORT_COLUMNS, report_exporter
+from benchmarks.data import iter_transaction_rows
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def stored_transactions(db_session):
+    """Generated transactions, every third one scored suspicious"""
+    transactions = []
+    for index, row in enumerate(iter_transaction_rows(25)):
+        transaction = Transaction(**row)
+        if index % 3 == 0:
+            transaction.fraud_score = 80
+            transaction.is_suspicious = True
+            transaction.status = "analyzed"
+        if index == 3:
+            transaction.ai_explanation = "Explication du LLM"
+            transaction.review_notes = "Client joint, operation confirmee"
+        if index == 6:
+            transaction.receiver_name = '=HYPERLINK("http://evil.example","Cliquez")'
+            transaction.review_notes = "-2+3"
+        transactions.append(transaction)
+    db_session.add_all(transactions)
+    db_session.commit()
+    # The ids must load back as UUIDs (an all-digit hex is an INTEGER on SQLite)
+    db_session.expire_all()
+    assert {t.id for t in db_session.query(Transaction)} == {t.id for t in transactions}
+    return transactions
+
+
+class TestColumnarExport:
+    """Test the Parquet / Arrow export"""
+
+    def test_parquet_with_features(self, client, auth_headers, stored_transactions):
+        """Test filtered rows, selected columns and the model features"""
+        pq = pytest.importorskip("pyarrow.parquet")
+        transactions_router.columnar_exporter.chunk_size = 4
+        try:
+            response = client.get(
+                "/transactions/export",
+                params={"format": "parquet", "columns": "transaction_ref,amount,fraud_score", "is_suspicious": "true"},
+                headers=auth_headers
+            )
+        finally:
+            transactions_router.columnar_exporter.chunk_size = 10000
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "attachment" in response.headers["content-disposition"]
+        table = pq.read_table(io.BytesIO(response.content))
+        suspicious = sorted(
+            (t for t in stored_transactions if t.is_suspicious),
+            key=lambda t: (t.transaction_date, t.id)
+        )
+        assert table.column_names == ["transaction_ref", "amount", "fraud_score"] + [f"feature_{n}" for n in FEATURE_NAMES]
+        assert table.column("transaction_ref").to_pylist() == [t.transaction_ref for t in suspicious]
+        features = np.column_stack([table.column(f"feature_{n}").to_numpy() for n in FEATURE_NAMES])
+        expected = np.vstack([fraud_detection_service._prepare_features(t) for t in suspicious])
+        assert np.allclose(features, expected)
+
+    def test_arrow_ipc(self, client, auth_headers, stored_transactions):
+        """Test the Arrow IPC file without features"""
+        pa = pytest.importorskip("pyarrow")
+        import pyarrow.ipc
+
+        response = client.get("/transactions/export", params={"format": "arrow", "features": "false"}, headers=auth_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        table = pa.ipc.open_file(pa.BufferReader(response.content)).read_all()
+        assert table.num_rows == len(stored_transactions)
+        ordered = sorted(stored_transactions, key=lambda t: (t.transaction_date, t.id))
+        assert table.column("id").to_pylist() == [str(t.id) for t in ordered]
+        assert not any(name.startswith("feature_") for name in table.column_names)
+
+    def test_invalid_requests(self, client, auth_headers, monkeypatch):
+        """Test unknown columns and the missing optional dependency"""
+        response = client.get("/transactions/export", params={"columns": "amount,password"}, headers=auth_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "password" in response.json()["detail"]
+
+        def missing_pyarrow():
+            raise RuntimeError("Le paquet 'pyarrow' est requis pour l'export Parquet/Arrow (pip install pyarrow)")
+
+        monkeypatch.setattr(transactions_router, "load_pyarrow", missing_pyarrow)
+        response = client.get("/transactions/export", headers=auth_headers)
+        assert response.status_code == status.HTTP_501_NOT_IMPLEMENTED
+
+
+class TestReportExport:
+    """Test the CSV / NDJSON compliance export"""
+
+    def test_csv_with_explanations(self, client, auth_headers, stored_transactions):
+        """Test filters, stored explanations and notes, rule-based explanation in its own column"""
+        response = client.get(
+            "/transactions/export",
+            params={"format": "csv", "is_suspicious": "true"},
+            headers=auth_headers
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert list(rows[0]) == DEFAULT_REPORT_COLUMNS
+        suspicious = {t.transaction_ref: t for t in stored_transactions if t.is_suspicious}
+        assert sorted(row["transaction_ref"] for row in rows) == sorted(suspicious)
+
+        explainer = LLMExplainerService()
+        for row in rows:
+            transaction = suspicious[row["transaction_ref"]]
+            if transaction.ai_explanation:
+                assert row["ai_explanation"] == "Explication du LLM"
+                assert row["generated_explanation"] == ""
+                assert row["review_notes"] == "Client joint, operation confirmee"
+                continue
+            # Never presented as the stored analysis result
+            assert row["ai_explanation"] == ""
+            assert row["generated_explanation"] == explainer._generate_fallback_explanation(transaction, 80, "ELEVE", [])
+            if transaction.review_notes:
+                # Formula-like values are neutralized for spreadsheets
+                assert row["receiver_name"] == "'" + transaction.receiver_name
+                assert row["review_notes"] == "'-2+3"
+            else:
+                assert row["review_notes"] == ""
+        
+        # The escaping and the generated column were really exercised
+        by_ref = {row["transaction_ref"]: row for row in rows}
+        injected = by_ref[stored_transactions[6].transaction_ref]
+        assert injected["receiver_name"].startswith("'=HYPERLINK")
+        assert injected["generated_explanation"]
+        assert by_ref[stored_transactions[3].transaction_ref]["ai_explanation"] == "Explication du LLM"
+
+    def test_ndjson_streamed_by_chunks(self, client, auth_headers, stored_transactions):
+        """Test the NDJSON rows and one body piece per cursor chunk"""
+        response = client.get(
+            "/transactions/export",
+            params={"format": "ndjson", "columns": "transaction_ref,amount,fraud_score,generated_explanation", "status": "pending"},
+            headers=auth_headers
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        pending = [t for t in stored_transactions if t.status == "pending"]
+        assert len(lines) == len(pending)
+        assert lines[0]["amount"] == str(next(t.amount for t in pending if t.transaction_ref == lines[0]["transaction_ref"]))
+        assert all(line["fraud_score"] is None and line["generated_explanation"] is None for line in lines)
+        
+        # NDJSON keeps the values as stored
+        response = client.get(
+            "/transactions/export",
+            params={"format": "ndjson", "columns": "transaction_ref,receiver_name", "is_suspicious": "true"},
+            headers=auth_headers
+        )
+        names = {line["transaction_ref"]: line["receiver_name"] for line in map(json.loads, response.text.splitlines())}
+        assert names[stored_transactions[6].transaction_ref] == stored_transactions[6].receiver_name
+
+        report_exporter.chunk_size = 4
+        try:
+            columns = ["transaction_ref", "ai_explanation"]
+            pieces = list(report_exporter.stream(TestingSessionLocal, report_exporter.build_query(columns), columns, "csv"))
+        finally:
+            report_exporter.chunk_size = 10000
+        # Header, then one piece per chunk of 4 rows
+        assert len(pieces) == 1 + (len(stored_transactions) + 3) // 4
@@ -0,0 +1,131 @@
+"""
+Tests for the fraud detection scorer
+"""
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID, uuid4
+
+import pytest
+
+from app.models.transaction import Transaction
+from app.services.fraud_detection import FraudDetectionService, SCORING_STEPS
+
+
+@pytest.fixture
+def transaction():
+    """In-memory suspicious transaction"""
+    return Transaction(
+        id=uuid4(),
+        transaction_ref="TXN-TEST-0001",
+        amount=Decimal("25000.00"),
+        currency="EUR",
+        sender_account="FR7630001007941234567890185",
+        receiver_account="FR7630004000031234567890143",
+        sender_name="Jean Dupont",
+        receiver_name="Crypto Holdings LLC",
+        transaction_type="virement",
+        channel="web",
+        country_origin="FRA",
+        country_destination="RUS",
+        transaction_date=datetime(2024, 1, 6, 3, 15)
+    )
+
+
+class TestScoringObserver:
+    """Test structured per-step scoring events"""
+
+    def test_observer_receives_each_step(self, transaction):
+        """Test that the five steps are reported in order with partial scores"""
+        service = FraudDetectionService()
+        events = []
+
+        fraud_score, _, _ = service.analyze_transaction(transaction, observer=events.append)
+
+        assert [e["step"] for e in events] == SCORING_STEPS
+        assert [e["index"] for e in events] == [1, 2, 3, 4, 5]
+        assert all(e["transaction_id"] == str(transaction.id) for e in events)
+        assert all(e["duration_ms"] >= 0 for e in events)
+
+        expected_partial = 0.0
+        for event in events:
+            expected_partial += event["score"] * event["weight"]
+            assert event["partial_score"] == pytest.approx(expected_partial, abs=0.2)
+
+        assert any("RUS" in f for f in events[2]["factors"])
+        # Boosters are applied on top of the weighted sum
+        assert fraud_score >= events[-1]["partial_score"]
+
+    def test_service_observers_and_failures(self, transaction):
+        """Test service-wide observers, and that a failing observer is ignored"""
+        service = FraudDetectionService()
+        recorded = []
+
+        def failing(event):
+            raise RuntimeError("observer down")
+
+        service.add_observer(recorded.append)
+        service.add_observer(failing)
+        first = service.analyze_transaction(transaction)
+
+        service.remove_observer(recorded.append)
+        service.remove_observer(failing)
+        second = service.analyze_transaction(transaction)
+
+        assert len(recorded) == len(SCORING_STEPS)
+        assert first == second
+
+    def test_metrics_observer(self, transaction):
+        """Test that step durations and results reach the Prometheus collectors"""
+        from prometheus_client import REGISTRY
+        from app.metrics import observe_scoring_step
+
+        def sample(name, **labels):
+            return REGISTRY.get_sample_value(name, labels) or 0.0
+
+        service = FraudDetectionService()
+        steps_before = sample("fraud_scoring_step_duration_seconds_count", step="geography")
+        results_before = sample("fraud_analysis_results_total", risk_level="critical", suspicious="true")
+
+        service.add_observer(observe_scoring_step)
+        service.analyze_transaction(transaction)
+
+        assert sample("fraud_scoring_step_duration_seconds_count", step="geography") == steps_before + 1
+        assert sample("fraud_analysis_results_total", risk_level="critical", suspicious="true") == results_before + 1
+
+
+class TestBatchScoring:
+    """Test the batched scorer used by bulk ingestion"""
+
+    def test_batch_matches_single_analysis(self, monkeypatch, db_session):
+        """Test that score_batch gives the scores and factors of analyze_transaction"""
+        from benchmarks.data import build_transactions
+        from benchmarks.micro import ensure_model
+        from app.services import fraud_detection
+
+        monkeypatch.setattr(fraud_detection.time, "sleep", lambda seconds: None)
+        transactions = build_transactions(120, suspicious_ratio=0.5, seed=3)
+        service = FraudDetectionService()
+        service.model = service.scaler = None
+        ensure_model(service, build_transactions(500, seed=11))
+
+        # Same pair twice in the batch, one pair with an older transaction
+        transactions[1].sender_account = transactions[0].sender_account
+        transactions[1].receiver_account = transactions[0].receiver_account
+        history = build_transactions(1, seed=5)[0]
+        history.id = uuid4()
+        history.transaction_ref = "TXN-HISTORY"
+        history.sender_account = transactions[2].sender_account
+        history.receiver_account = transactions[2].receiver_account
+        db_session.add_all([history, *transactions])
+        db_session.commit()
+        # Both paths score the rows as loaded back from the database
+        db_session.expire_all()
+        assert all(isinstance(t.id, UUID) for t in transactions)
+
+        batch = service.score_batch(transactions, db_session)
+        single = [service.analyze_transaction(t, db_session) for t in transactions]
+
+        assert batch == single
+        assert all("NOUVEAU" not in f for f in batch[0][2] + batch[1][2] + batch[2][2])
+        assert any("NOUVEAU" in f for f in batch[3][2])
+        assert service.score_batch([]) == []
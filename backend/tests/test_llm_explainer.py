@@ -0,0 +1,309 @@
+"""
+Tests for the LLM explainer against the fake Ollama server
+"""
+import asyncio
+import json
+import random
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.models.transaction import Transaction
+from app.services.explanation_templates import fallback_explanation_engine
+from app.services.llm_explainer import LLMExplainerService
+from app.services.prompt_builder import SYSTEM_PROMPT, build_explanation_prompt
+from app.utils.circuit_breaker import CircuitBreaker
+from benchmarks.data import iter_transaction_rows
+from benchmarks.fake_ollama import FAKE_EXPLANATION, create_fake_ollama, serve_in_thread
+
+
+@pytest.fixture
+def transaction():
+    """In-memory generated transaction"""
+    return Transaction(**next(iter_transaction_rows(1)))
+
+
+def explainer_for(fake_ollama, timeout: float = 60.0) -> LLMExplainerService:
+    explainer = LLMExplainerService(transport=httpx.ASGITransport(app=fake_ollama))
+    explainer.timeout = timeout
+    return explainer
+
+
+class TestFakeOllama:
+    """Test the fake Ollama endpoints"""
+    
+    def test_streaming_and_tags(self):
+        """Test NDJSON streaming chunks and the final statistics"""
+        fake_ollama = create_fake_ollama(token_latency=0.0)
+        client = TestClient(fake_ollama)
+        
+        tags = client.get("/api/tags").json()
+        model = tags["models"][0]["name"]
+        
+        response = client.post("/api/generate", json={
+            "model": model,
+            "prompt": "Explique cette transaction",
+            "options": {"num_predict": 5}
+        })
+        chunks = [json.loads(line) for line in response.text.splitlines()]
+        
+        assert [c["done"] for c in chunks] == [False] * 5 + [True]
+        assert "".join(c["response"] for c in chunks) == " ".join(FAKE_EXPLANATION.split(" ")[:5])
+        assert chunks[-1]["eval_count"] == 5
+        assert chunks[-1]["prompt_eval_count"] == 3
+    
+    def test_client_gone_before_body(self, transaction):
+        """Test that a stream abandoned before its first chunk keeps no slot"""
+        fake_ollama = create_fake_ollama(token_latency=0.0, max_concurrency=1)
+        body = json.dumps({"model": fake_ollama.state.config.model, "prompt": "x"}).encode()
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+            "scheme": "http", "path": "/api/generate", "raw_path": b"/api/generate", "query_string": b"",
+            "root_path": "", "headers": [(b"content-type", b"application/json")],
+            "client": ("test", 1), "server": ("test", 80)
+        }
+        
+        async def disconnected(message):
+            raise OSError("client disconnected")
+        
+        async def run():
+            for _ in range(3):
+                messages = iter([{"type": "http.request", "body": body, "more_body": False}])
+                
+                async def receive():
+                    return next(messages, {"type": "http.disconnect"})
+                
+                with pytest.raises((OSError, ExceptionGroup)):
+                    await fake_ollama(scope, receive, disconnected)
+            return await explainer_for(fake_ollama).explain_transaction(transaction, 80, [])
+        
+        assert asyncio.run(asyncio.wait_for(run(), timeout=5)) == FAKE_EXPLANATION
+        stats = fake_ollama.state.stats
+        assert (stats.requests, stats.completed, stats.failed, stats.active) == (4, 1, 0, 0)
+    
+    def test_unknown_model(self):
+        """Test that unknown models are rejected like Ollama does"""
+        client = TestClient(create_fake_ollama())
+        response = client.post("/api/generate", json={"model": "llama2", "prompt": "x", "stream": False})
+        assert response.status_code == 404
+
+
+class TestPromptBuilder:
+    """Test the static prefix and the output budgets"""
+    
+    def test_static_prefix_and_compact_payload(self):
+        """Test that only the payload depends on the transaction"""
+        first, second = (Transaction(**row) for row in iter_transaction_rows(2))
+        prompts = [
+            build_explanation_prompt(first, 92, "CRITIQUE", ["Montant tres eleve", "Pays a risque"]),
+            build_explanation_prompt(second, 20, "MINIMAL", [])
+        ]
+        
+        assert prompts[0].system is prompts[1].system is SYSTEM_PROMPT
+        assert first.transaction_ref in prompts[0].prompt
+        assert "facteurs=Montant tres eleve; Pays a risque" in prompts[0].prompt
+        assert "facteurs" not in prompts[1].prompt
+        assert len(prompts[0].prompt) < 400
+        assert prompts[0].num_predict > prompts[1].num_predict
+    
+    def test_usage_with_prefix_cache(self, transaction):
+        """Test that token counts are recorded and the prefix is evaluated once"""
+        fake_ollama = create_fake_ollama(token_latency=0.0)
+        explainer = explainer_for(fake_ollama)
+        
+        async def run():
+            for _ in range(2):
+                await explainer.explain_transaction(transaction, 90, ["Montant eleve"])
+        
+        asyncio.run(run())
+        usage = explainer.get_usage()
+        payload_tokens = len(build_explanation_prompt(transaction, 90, "CRITIQUE", ["Montant eleve"]).prompt.split())
+        
+        assert usage["requests"] == 2
+        assert usage["prompt_tokens"] == len(SYSTEM_PROMPT.split()) + 2 * payload_tokens
+        assert usage["output_tokens"] == 2 * len(FAKE_EXPLANATION.split(" "))
+
+
+class TestLLMExplainer:
+    """Test explanations under slow, failing and saturated LLM conditions"""
+    
+    def test_explanation_from_llm(self, transaction):
+        """Test the nominal path"""
+        explainer = explainer_for(create_fake_ollama(token_latency=0.0))
+        explanation = asyncio.run(explainer.explain_transaction(transaction, 80, ["Montant eleve"]))
+        assert explanation == FAKE_EXPLANATION
+    
+    def test_fallback_on_errors(self, transaction):
+        """Test that server errors fall back to the rule-based explanation"""
+        explainer = explainer_for(create_fake_ollama(error_rate=1.0))
+        explanation = asyncio.run(explainer.explain_transaction(transaction, 80, ["Montant eleve"]))
+        assert explanation.startswith("ALERTE ELEVEE (Score 80/100)")
+    
+    def test_fallback_on_timeout(self, transaction):
+        """Test that a slow generation hits the client timeout (real socket)"""
+        with serve_in_thread(create_fake_ollama(load_latency=1.0)) as base_url:
+            explainer = LLMExplainerService()
+            explainer.ollama_host = base_url
+            explainer.timeout = 0.2
+            explanation = asyncio.run(explainer.explain_transaction(transaction, 90, []))
+        assert explanation.startswith("ALERTE CRITIQUE (Score 90/100)")
+    
+    def test_concurrency_limit_and_queue(self, transaction):
+        """Test that generations beyond the parallel slots queue, then get rejected"""
+        fake_ollama = create_fake_ollama(token_latency=0.001, max_concurrency=2, max_queue=3)
+        explainer = explainer_for(fake_ollama)
+        
+        async def run():
+            return await asyncio.gather(*(
+                explainer.explain_transaction(transaction, 60, []) for _ in range(8)
+            ))
+        
+        explanations = asyncio.run(run())
+        stats = fake_ollama.state.stats
+        
+        assert stats.peak_active == 2
+        assert stats.peak_waiting == 3
+        assert stats.rejected == 3
+        assert explanations.count(FAKE_EXPLANATION) == 5
+
+
+class TestCircuitBreaker:
+    """Test fail-fast, recovery probing and the adaptive timeout"""
+    
+    def test_state_machine_and_timeout(self):
+        """Test closed -> open -> half-open transitions on a fake clock"""
+        now = [0.0]
+        breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout=10, slow_call_seconds=5, min_samples=5, clock=lambda: now[0])
+        
+        breaker.record_failure()
+        breaker.record_success(0.5)
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.record_success(6.0)  # Slow call
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request(60)
+        assert breaker.retry_in(60) == 10
+        
+        now[0] = 11
+        assert breaker.retry_in(60) == 0
+        assert breaker.allow_request(60)  # Probe
+        assert not breaker.allow_request(60)  # Only one at a time
+        assert breaker.retry_in(60) == 60
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        
+        now[0] = 22
+        assert breaker.allow_request(60)
+        breaker.record_success(0.4)
+        assert breaker.state == CircuitBreaker.CLOSED
+        
+        # Adaptive timeout: p99 of recent calls with a 2x margin, within bounds
+        assert breaker.current_timeout(60) == 60
+        for duration in (0.5, 1.0, 1.5, 2.0, 4.0):
+            breaker.record_success(duration)
+        assert 7.0 < breaker.current_timeout(60) <= 8.0
+        assert breaker.current_timeout(6) == 6
+        assert breaker.get_status(60)["state"] == "closed"
+    
+    def test_outage_served_instantly(self, transaction):
+        """Test that an open circuit stops calling Ollama until it recovers"""
+        fake_ollama = create_fake_ollama(token_latency=0.0, error_rate=1.0)
+        explainer = explainer_for(fake_ollama)
+        now = [0.0]
+        explainer.breaker.clock = lambda: now[0]
+        
+        async def explain_many(count):
+            return [await explainer.explain_transaction(transaction, 90, []) for _ in range(count)]
+        
+        explanations = asyncio.run(explain_many(20))
+        assert all(e.startswith("ALERTE CRITIQUE") for e in explanations)
+        assert fake_ollama.state.stats.requests == explainer.breaker.failure_threshold
+        assert not explainer.llm_available
+        
+        # Ollama is back: a probe is due (reading it changes nothing), its success closes the circuit
+        fake_ollama.state.config.error_rate = 0.0
+        now[0] = explainer.breaker.recovery_timeout + 1
+        assert explainer.llm_available
+        assert explainer.breaker.state == CircuitBreaker.OPEN
+        assert asyncio.run(explain_many(2)) == [FAKE_EXPLANATION] * 2
+        assert explainer.breaker.state == CircuitBreaker.CLOSED
+
+
+class TestBatchExplanations:
+    """Test one prompt for several alerts of a risk level"""
+    
+    def test_batch_by_risk_level(self):
+        """Test that items are grouped by risk level, one call per group, in order"""
+        fake_ollama = create_fake_ollama(token_latency=0.0)
+        explainer = explainer_for(fake_ollama)
+        transactions = [Transaction(**row) for row in iter_transaction_rows(5)]
+        scores = [90, 10, 92, 15, 88]
+        
+        explanations = asyncio.run(explainer.explain_batch([(t, s, ["Montant eleve"]) for t, s in zip(transactions, scores)]))
+        
+        assert explanations == [FAKE_EXPLANATION] * 5
+        assert fake_ollama.state.stats.requests == 2
+        assert explainer.get_usage()["requests"] == 2
+    
+    def test_batch_slower_than_single_timeout(self):
+        """Test that a batch gets the single-call timeout times its size (real socket)"""
+        transactions = [Transaction(**row) for row in iter_transaction_rows(4)]
+        with serve_in_thread(create_fake_ollama(load_latency=0.5, token_latency=0.0)) as base_url:
+            explainer = LLMExplainerService()
+            explainer.ollama_host = base_url
+            explainer.timeout = 0.3
+            explanations = asyncio.run(explainer.explain_batch([(t, 90, []) for t in transactions]))
+        
+        assert explanations == [FAKE_EXPLANATION] * 4
+        assert explainer.breaker.consecutive_failures == 0
+    
+    def test_invalid_items_fall_back(self):
+        """Test per-item fallback on short, missing or unparsable answers"""
+        explainer = explainer_for(create_fake_ollama(token_latency=0.0, response_text="Risque."))
+        transactions = [Transaction(**row) for row in iter_transaction_rows(2)]
+        
+        explanations = asyncio.run(explainer.explain_batch([(t, 90, []) for t in transactions]))
+        assert all(e.startswith("ALERTE CRITIQUE (Score 90/100)") for e in explanations)
+        
+        long_text = "Explication detaillee de la transaction pour la conformite."
+        answer = {"response": json.dumps({"TXN-A": long_text, "TXN-B": "Court", "TXN-X": long_text})}
+        assert explainer._parse_batch_response(answer, ["TXN-A", "TXN-B", "TXN-C"]) == {"TXN-A": long_text}
+        assert explainer._parse_batch_response({"response": '{"TXN-A": "coupe'}, ["TXN-A"]) == {}
+        assert explainer._parse_batch_response({"response": '["TXN-A"]'}, ["TXN-A"]) == {}
+
+
+class TestFallbackTemplates:
+    """Test the batch rule-based explanations against the per-transaction version"""
+    
+    def test_identical_to_fallback_on_random_sample(self):
+        """Test byte-identical output on random transactions, scores and factors"""
+        rng = random.Random(7)
+        factor_pool = [
+            "Montant eleve", "Transaction nocturne", "Nouveau beneficiaire", "Pays a haut risque",
+            "Structuration possible", "Appareil inconnu", "Canal inhabituel", "Velocite anormale"
+        ]
+        transactions = []
+        for row in iter_transaction_rows(2000, suspicious_ratio=0.4, seed=11):
+            # Push the edge cases of every bucket
+            if rng.random() < 0.3:
+                row["amount"] = rng.choice([8999.99, 9000, 9999, 9999.5, 10000, 19999.99, 20000, 50000, 5000.01])
+            if rng.random() < 0.2:
+                row["transaction_date"] = row["transaction_date"].replace(hour=rng.choice([0, 5, 6, 22, 23]))
+            if rng.random() < 0.2:
+                row["country_destination"] = rng.choice([None, "FRA", "IRN", "ARE", "DEU"])
+                row["country_origin"] = rng.choice([None, "FRA", "DEU"])
+            if rng.random() < 0.2:
+                row["receiver_name"] = rng.choice([None, "Crypto Exchange FZE", "Alpha Holdings LTD", "Marie Martin"])
+            transactions.append(Transaction(**row))
+        scores = [rng.randint(0, 100) for _ in transactions]
+        factors = [rng.sample(factor_pool, rng.randint(0, 4)) for _ in transactions]
+        
+        explainer = LLMExplainerService()
+        expected = [
+            explainer._generate_fallback_explanation(t, s, explainer._get_risk_level(s), f)
+            for t, s, f in zip(transactions, scores, factors)
+        ]
+        assert fallback_explanation_engine.explain_many(transactions, scores, factors) == expected
+        assert fallback_explanation_engine.explain_many([], [], []) == []
@@ -0,0 +1,111 @@
+"""
+Tests for the background rescoring job
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models.transaction import Transaction, TransactionStatus
+from app.services.fraud_detection import FraudDetectionService
+from app.services.rescoring import RescoringJob, claim_pending_statement
+from tests.conftest import TestingSessionLocal
+
+
+class CountingService(FraudDetectionService):
+    """Rule-based scorer recording every scored transaction"""
+
+    def __init__(self):
+        super().__init__()
+        self.model = self.scaler = None
+        self.scored_ids = []
+
+    def score_batch(self, transactions, db_session=None):
+        self.scored_ids.extend(t.id for t in transactions)
+        return super().score_batch(transactions, db_session)
+
+
+def add_transactions(db, count: int, **overrides):
+    transactions = [
+        Transaction(
+            transaction_ref=f"TXN-RESCORE-{overrides.get('status', 'pending')}-{i:04d}",
+            amount=25000 if i % 5 == 0 else 120 + i,
+            sender_account="FR7630001007941234567890185",
+            receiver_account=f"FR76300040000312345678{i:05d}",
+            receiver_name="Crypto Holdings LLC" if i % 5 == 0 else "Marie Martin",
+            transaction_type="virement",
+            country_origin="FRA",
+            country_destination="RUS" if i % 5 == 0 else "FRA",
+            transaction_date=datetime.utcnow() - timedelta(minutes=i),
+            **overrides
+        )
+        for i in range(count)
+    ]
+    db.add_all(transactions)
+    db.commit()
+    return transactions
+
+
+@pytest.fixture
+def service():
+    return CountingService()
+
+
+class TestRescoringJob:
+    """Test claims, bulk persistence and concurrent workers"""
+
+    def test_claim_skips_locked_rows(self):
+        """Test that the claim query lets workers skip each other's rows on PostgreSQL"""
+        sql = str(claim_pending_statement(100).compile(dialect=postgresql.dialect()))
+        assert "FOR UPDATE SKIP LOCKED" in sql
+        assert "fraud_score IS NULL" in sql
+
+    def test_workers_split_the_backlog(self, db_session, service):
+        """Test that two workers score every pending transaction exactly once"""
+        pending = add_transactions(db_session, 23)
+        reviewed = add_transactions(db_session, 2, status=TransactionStatus.REVIEWED.value)
+        handed_off = []
+
+        workers = [
+            RescoringJob(TestingSessionLocal, service, batch_size=5, on_scored=handed_off.extend)
+            for _ in range(2)
+        ]
+        scored = 0
+        while True:
+            counts = [worker.run_once() for worker in workers]
+            scored += sum(counts)
+            if not any(counts):
+                break
+
+        assert scored == 23
+        assert sorted(map(str, service.scored_ids)) == sorted(str(t.id) for t in pending)
+        assert workers[0].get_status()["scored"] + workers[1].get_status()["scored"] == 23
+        assert len(handed_off) == 23
+
+        db_session.expire_all()
+        rows = {t.id: t for t in db_session.query(Transaction).all()}
+        for transaction, (fraud_score, is_suspicious, _) in handed_off:
+            assert rows[transaction.id].fraud_score == fraud_score
+            assert rows[transaction.id].is_suspicious == is_suspicious
+            assert rows[transaction.id].status == TransactionStatus.ANALYZED.value
+            assert rows[transaction.id].analysis_date is not None
+        assert any(is_suspicious for _, (_, is_suspicious, _) in handed_off)
+        assert all(rows[t.id].fraud_score is None for t in reviewed)
+
+    def test_concurrent_score_is_kept(self, db_session, service):
+        """Test that a score written during the batch is not overwritten"""
+        transactions = add_transactions(db_session, 3)
+        target = transactions[1].id
+        original = service.score_batch
+
+        def score_with_concurrent_analysis(batch, db):
+            # Another writer scores one of the rows while the batch runs
+            db.query(Transaction).filter(Transaction.id == target).update({"fraud_score": 99})
+            return original(batch, db)
+
+        service.score_batch = score_with_concurrent_analysis
+        assert RescoringJob(TestingSessionLocal, service, batch_size=10).run_once() == 3
+
+        db_session.expire_all()
+        assert db_session.get(Transaction, target).fraud_score == 99
+        assert db_session.query(Transaction).filter(Transaction.fraud_score.is_(None)).count() == 0
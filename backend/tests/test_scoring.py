@@ -0,0 +1,166 @@
+"""
+Tests for real-time scoring
+"""
+from datetime import datetime
+
+import numpy as np
+import pytest
+from fastapi import status
+
+from app.services import fraud_detection
+from app.services.fraud_detection import FraudDetectionService
+from app.services.realtime_scorer import RealtimeScorer
+from benchmarks.data import build_transactions
+from benchmarks.micro import ensure_model
+
+
+@pytest.fixture(scope="module")
+def service():
+    """Scorer with a model trained in memory"""
+    service = FraudDetectionService()
+    service.model = service.scaler = None
+    ensure_model(service, build_transactions(2000, seed=11))
+    return service
+
+
+class TestRealtimeScorer:
+    """Test the in-memory scorer"""
+    
+    def test_same_result_as_analysis(self, service, monkeypatch):
+        """Test that the compiled model and rules reproduce analyze_transaction"""
+        monkeypatch.setattr(fraud_detection.time, "sleep", lambda seconds: None)
+        transactions = build_transactions(200, suspicious_ratio=0.5, seed=4)
+        scorer = RealtimeScorer(service, ml_budget_ms=1000)
+        forest = scorer._compiled_forest()
+        
+        X = np.vstack([service._prepare_features(t) for t in transactions])
+        expected = service.model.score_samples(service.scaler.transform(X))
+        compiled = [forest.score_samples(scorer._prepare_features(t)) for t in transactions]
+        assert np.allclose(expected, compiled, rtol=0, atol=1e-12)
+        
+        for t in transactions:
+            scorer.record_transaction(t)
+        for t in transactions[:40]:
+            result = scorer.score(t)
+            fraud_score, is_suspicious, factors = service.analyze_transaction(t)
+            assert (result["fraud_score"], result["is_suspicious"], result["factors"]) == (fraud_score, is_suspicious, factors)
+            assert result["ml_used"] is True
+    
+    def test_unknown_pair_is_new_beneficiary(self, service):
+        """Test the pair cache standing in for the history query"""
+        transaction = build_transactions(1, seed=9)[0]
+        scorer = RealtimeScorer(service)
+        
+        assert any("NOUVEAU" in f for f in scorer.score(transaction)["factors"])
+        scorer.record_transaction(transaction)
+        assert not any("NOUVEAU" in f for f in scorer.score(transaction)["factors"])
+    
+    def test_incomplete_cache_is_unknown(self, service):
+        """Test that after an eviction a missing pair is not a new beneficiary"""
+        first, second, third = build_transactions(3, seed=9)
+        scorer = RealtimeScorer(service, pair_cache_size=1)
+        
+        scorer.record_transaction(first)
+        assert scorer.pairs_authoritative() is True
+        scorer.record_transaction(second)
+        assert scorer.pairs_authoritative() is False
+        assert not any("NOUVEAU" in f for f in scorer.score(first)["factors"])
+        assert not any("NOUVEAU" in f for f in scorer.score(third)["factors"])
+    
+    def test_pairs_refreshed_from_other_writers(self, service, db_session):
+        """Test the periodic refresh and the stale cache"""
+        from tests.conftest import TestingSessionLocal
+        
+        now = [0.0]
+        stored, payload = build_transactions(2, seed=9)
+        scorer = RealtimeScorer(service, pair_refresh_interval=5.0, clock=lambda: now[0])
+        assert scorer.pairs_authoritative() is False
+        assert scorer.warm_up(TestingSessionLocal) == 0
+        
+        # Written by another worker after the warm-up
+        payload.sender_account, payload.receiver_account = stored.sender_account, stored.receiver_account
+        db_session.add(stored)
+        db_session.commit()
+        assert any("NOUVEAU" in f for f in scorer.score(payload)["factors"])
+        
+        now[0] += 5
+        assert scorer.refresh_pairs(TestingSessionLocal) == 1
+        assert not any("NOUVEAU" in f for f in scorer.score(payload)["factors"])
+        
+        # Incremental refresh: rows created since the last sync
+        later, unknown = build_transactions(2, seed=12)
+        later.transaction_ref = "TXN-LATER"
+        db_session.add(later)
+        db_session.commit()
+        now[0] += 5
+        assert scorer.refresh_pairs(TestingSessionLocal) == 2
+        assert not any("NOUVEAU" in f for f in scorer.score(later)["factors"])
+        
+        # Refreshes failing: misses are unknown
+        assert any("NOUVEAU" in f for f in scorer.score(unknown)["factors"])
+        now[0] += 5 * scorer.MAX_MISSED_REFRESHES + 1
+        assert not any("NOUVEAU" in f for f in scorer.score(unknown)["factors"])
+        assert scorer.get_status()["pairs_authoritative"] is False
+    
+    def test_degrades_to_rules_and_recovers(self, service):
+        """Test the ML latency guard and the periodic probe"""
+        now = [0.0]
+        
+        def clock():
+            # Every reading moves 2 ms forward: each ML call "takes" 2 ms
+            now[0] += 0.002
+            return now[0]
+        
+        transaction = build_transactions(1, seed=9)[0]
+        scorer = RealtimeScorer(service, ml_budget_ms=1.0, probe_interval=5.0, clock=clock)
+        
+        assert scorer.score(transaction)["ml_used"] is True
+        assert scorer.degraded is True
+        degraded = scorer.score(transaction)
+        assert degraded["ml_used"] is False
+        assert degraded["degraded"] is True
+        
+        # The probe is within budget once the budget is raised
+        scorer.ml_budget_ms = 10.0
+        now[0] += 10
+        recovered = scorer.score(transaction)
+        assert recovered["ml_used"] is True
+        assert recovered["degraded"] is False
+
+
+class TestScoreEndpoint:
+    """Test POST /score"""
+    
+    def get_payload(self):
+        return {
+            "amount": 25000.00,
+            "currency": "EUR",
+            "sender_account": "FR7630001007941234567890185",
+            "receiver_account": "RU0012345678901234567890",
+            "sender_name": "Jean Dupont",
+            "receiver_name": "Crypto Holdings LLC",
+            "transaction_type": "virement",
+            "channel": "web",
+            "country_origin": "FRA",
+            "country_destination": "RUS",
+            "transaction_date": datetime(2024, 1, 6, 3, 15).isoformat()
+        }
+    
+    def test_score_without_persisting(self, client, auth_headers):
+        """Test that a payload is scored and nothing is stored"""
+        response = client.post("/score", json=self.get_payload(), headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["is_suspicious"] is True
+        assert data["risk_level"] in ("high", "critical")
+        assert any("RUS" in f for f in data["factors"])
+        assert data["latency_ms"] >= 0
+        
+        listing = client.get("/transactions", headers=auth_headers).json()
+        assert listing["total"] == 0
+    
+    def test_score_unauthorized(self, client):
+        """Test scoring without auth"""
+        response = client.post("/score", json=self.get_payload())
+        assert response.status_code == status.HTTP_403_FORBIDDEN
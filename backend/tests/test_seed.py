@@ -0,0 +1,52 @@
+"""
+Tests for the fast seeding mode
+"""
+from datetime import datetime
+
+import numpy as np
+
+from app.models.transaction import Transaction
+from scripts.seed import (
+    FAST_COLUMNS, HIGH_RISK_COUNTRIES, chunk_to_copy_text, generate_transaction_chunk, write_chunk
+)
+from tests.conftest import engine
+
+
+BASE_DATE = datetime(2024, 1, 31, 12, 0)
+
+
+class TestFastSeed:
+    """Test vectorized generation and chunk writes"""
+    
+    def test_chunk_is_reproducible(self):
+        """Test that the same seed and chunk index yield the same rows"""
+        first = generate_transaction_chunk(3, 500, BASE_DATE, suspicious_ratio=0.3, seed=7, chunk_size=500)
+        second = generate_transaction_chunk(3, 500, BASE_DATE, suspicious_ratio=0.3, seed=7, chunk_size=500)
+        other = generate_transaction_chunk(3, 500, BASE_DATE, suspicious_ratio=0.3, seed=8, chunk_size=500)
+        
+        assert all(np.array_equal(first[name], second[name]) for name in FAST_COLUMNS)
+        assert not np.array_equal(first["id"], other["id"])
+        assert first["transaction_ref"][0] == "TXN-S7-0000001500"
+        assert len(set(first["id"].tolist())) == 500
+    
+    def test_suspicious_patterns(self):
+        """Test that generated values follow the seed generators"""
+        chunk = generate_transaction_chunk(0, 2000, BASE_DATE, suspicious_ratio=0.5, seed=1)
+        abroad = np.isin(chunk["country_destination"], HIGH_RISK_COUNTRIES)
+        
+        assert abroad.any()
+        assert all(not account.startswith("FR") for account in chunk["receiver_account"][abroad])
+        assert (chunk["amount"] >= 10).all() and (chunk["amount"] <= 50000).all()
+        assert (chunk["transaction_date"] <= np.datetime64("2024-02-07")).all()
+        
+        lines = chunk_to_copy_text(chunk).splitlines()
+        assert len(lines) == 2000
+        assert all(line.count("\t") == len(FAST_COLUMNS) - 1 for line in lines)
+    
+    def test_write_chunk(self, db_session):
+        """Test the executemany path used outside PostgreSQL"""
+        chunk = generate_transaction_chunk(0, 250, BASE_DATE, seed=42)
+        
+        assert write_chunk(engine, chunk) == 250
+        assert db_session.query(Transaction).count() == 250
+        assert db_session.query(Transaction).filter(Transaction.status == "pending").count() == 250
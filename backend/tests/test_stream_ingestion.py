@@ -0,0 +1,165 @@
+"""
+Tests for the streaming ingestion worker
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.transaction import Transaction
+from app.services.fraud_detection import FraudDetectionService
+from app.services.stream_ingestion import (
+    FileTailSource,
+    IngestionWorker,
+    MemoryStreamClient,
+    NdjsonFileSink,
+    RedisStreamSource,
+    StreamSink,
+)
+from tests.conftest import TestingSessionLocal
+
+
+def payload(amount: float, destination: str = "FRA", receiver: str = "Marie Martin") -> dict:
+    return {
+        "amount": amount,
+        "sender_account": "FR7630001007941234567890185",
+        "receiver_account": f"FR76300040000312345678{int(amount) % 100000:05d}",
+        "receiver_name": receiver,
+        "transaction_type": "virement",
+        "country_origin": "FRA",
+        "country_destination": destination,
+        "transaction_date": (datetime.utcnow() - timedelta(seconds=2)).isoformat()
+    }
+
+
+SUSPICIOUS = payload(25000, destination="RUS", receiver="Crypto Holdings LLC")
+
+
+@pytest.fixture
+def service():
+    service = FraudDetectionService()
+    service.model = service.scaler = None
+    return service
+
+
+class TestFileTailIngestion:
+    """Test NDJSON tail, checkpoint and redelivery"""
+    
+    def test_tail_scores_and_checkpoints(self, db_session, service, tmp_path):
+        """Test that complete lines are stored, scored and checkpointed"""
+        incoming = tmp_path / "incoming.ndjson"
+        lines = [json.dumps(payload(100 + i)) for i in range(3)] + ["{not json", json.dumps(SUSPICIOUS)]
+        # The last line is still being written: not consumed
+        incoming.write_text("\n".join(lines) + "\n" + '{"amount": 12')
+        output = tmp_path / "suspicious.ndjson"
+        
+        def run():
+            source = FileTailSource(str(incoming))
+            worker = IngestionWorker(source, NdjsonFileSink(str(output)), TestingSessionLocal, service, batch_size=2, max_wait=0.05)
+            return asyncio.run(worker.run(exit_when_idle=True))
+        
+        stats = run()
+        assert stats["received"] == 5
+        assert stats["inserted"] == 4
+        assert stats["invalid"] == 1
+        assert stats["suspicious"] == 1
+        assert stats["event_latency_p50_ms"] >= 2000
+        assert db_session.query(Transaction).filter(Transaction.fraud_score.isnot(None)).count() == 4
+        
+        checkpoint = int((tmp_path / "incoming.ndjson.offset").read_text())
+        assert checkpoint == len("\n".join(lines)) + 1
+        results = [json.loads(line) for line in output.read_text().splitlines()]
+        assert results[0]["fraud_score"] >= 70
+        assert results[0]["latency_ms"] > 0
+        
+        # Crash before the checkpoint: everything is delivered again, nothing duplicated
+        (tmp_path / "incoming.ndjson.offset").write_text("0")
+        assert run()["received"] == 5
+        db_session.expire_all()
+        assert db_session.query(Transaction).count() == 4
+
+
+class TestStreamIngestion:
+    """Test the consumer group source, retries and the output stream"""
+    
+    def test_stream_with_retry_and_replay(self, db_session, service):
+        """Test at-least-once delivery through a failed batch and a restart"""
+        client = MemoryStreamClient()
+        failures = {"left": 1}
+        
+        def flaky_session():
+            if failures["left"]:
+                failures["left"] -= 1
+                raise ConnectionError("database unavailable")
+            return TestingSessionLocal()
+        
+        async def scenario():
+            for i in range(4):
+                await client.xadd("transactions", {"data": json.dumps(payload(200 + i))})
+            await client.xadd("transactions", {"data": json.dumps(SUSPICIOUS)})
+            
+            # A consumer reads two entries and dies before acknowledging them
+            crashed = RedisStreamSource(client, "transactions", consumer="worker-1")
+            await crashed.start()
+            assert len(await crashed.read(2, 0.1)) == 2
+            
+            source = RedisStreamSource(client, "transactions", consumer="worker-1")
+            worker = IngestionWorker(
+                source, StreamSink(client, "suspicious"), flaky_session, service,
+                batch_size=10, max_wait=0.05, retry_delay=0.01
+            )
+            stats = await worker.run(exit_when_idle=True)
+            return stats, await client.xrange("suspicious"), await client.xreadgroup(
+                "fraud-ingestion", "worker-1", {"transactions": "0"}
+            )
+        
+        stats, emitted, pending = asyncio.run(scenario())
+        
+        assert stats["retries"] == 1
+        assert stats["inserted"] == 5
+        assert len(emitted) == 1
+        assert json.loads(emitted[0][1]["data"])["risk_level"] in ("high", "critical")
+        assert pending == [["transactions", []]]
+        assert db_session.query(Transaction).count() == 5
+    
+    def test_poison_messages_are_dead_lettered(self, db_session, service):
+        """Test that messages failing alone are dead-lettered and do not block the others"""
+        client = MemoryStreamClient()
+        score_batch = service.score_batch
+        
+        def refusing_score_batch(transactions, db):
+            # Stands for a row the database refuses (value too long, numeric overflow)
+            if any(t.receiver_name == "Poison" for t in transactions):
+                raise ValueError("value too long for type character varying(255)")
+            return score_batch(transactions, db)
+        
+        service.score_batch = refusing_score_batch
+        
+        async def scenario():
+            for data in (payload(300), {**payload(301), "amount": 1e30}, payload(302, receiver="Poison"), payload(303)):
+                await client.xadd("transactions", {"data": json.dumps(data)})
+            
+            source = RedisStreamSource(client, "transactions")
+            worker = IngestionWorker(
+                source, None, TestingSessionLocal, service,
+                batch_size=10, max_wait=0.05, retry_delay=0.01,
+                dead_letter=StreamSink(client, "dead-letter"), max_attempts=2
+            )
+            stats = await worker.run(exit_when_idle=True)
+            return stats, await client.xrange("dead-letter"), await client.xreadgroup(
+                "fraud-ingestion", "worker-1", {"transactions": "0"}
+            )
+        
+        stats, dead, pending = asyncio.run(asyncio.wait_for(scenario(), timeout=10))
+        
+        assert stats["inserted"] == 2
+        assert stats["invalid"] == 1
+        assert stats["failed"] == 1
+        assert pending == [["transactions", []]]
+        letters = [json.loads(fields["data"]) for _, fields in dead]
+        assert len(letters) == 2
+        assert json.loads(letters[0]["data"])["amount"] == 1e30
+        assert "too long" in letters[1]["error"]
+        db_session.expire_all()
+        assert {t.amount for t in db_session.query(Transaction)} == {300, 303}
@@ -87,6 +87,38 @@ class TestTransactionEndpoints:
         data = response.json()
         assert data["total"] >= 1
     
+    def test_list_transactions_summary_view(self, client, auth_headers):
+        """Test the summary projection: same rows and order, slim items"""
+        for amount in (1200.00, 800.00, 15000.00):
+            client.post(
+                "/transactions",
+                json={**self.get_sample_transaction(), "amount": amount},
+                headers=auth_headers
+            )
+        
+        params = {"sort_by": "amount", "sort_order": "asc", "page_size": 2}
+        full = client.get("/transactions", params=params, headers=auth_headers).json()
+        response = client.get("/transactions", params={**params, "view": "summary"}, headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        summary = response.json()
+        assert {k: v for k, v in summary.items() if k != "items"} == {k: v for k, v in full.items() if k != "items"}
+        assert [item["id"] for item in summary["items"]] == [item["id"] for item in full["items"]]
+        item = summary["items"][0]
+        assert item["amount"] == "800.00"
+        assert item["receiver_name"] == "Marie Martin"
+        assert "ai_explanation" not in item and "description" not in item
+        
+        response = client.get("/transactions?view=compact", headers=auth_headers)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        
+        # Both shapes are documented for clients generated from the spec
+        openapi = client.get("/openapi.json").json()
+        schema = openapi["paths"]["/transactions"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        refs = {option["$ref"].rsplit("/", 1)[-1] for option in schema["anyOf"]}
+        assert refs == {"TransactionListResponse", "TransactionSummaryListResponse"}
+        assert "TransactionSummaryListResponse" in openapi["components"]["schemas"]
+    
     def test_get_transaction_by_id(self, client, auth_headers):
         """Test getting a specific transaction"""
         # Create a transaction
@@ -190,6 +222,33 @@ class TestTransactionEndpoints:
         assert response.status_code == status.HTTP_200_OK
         assert response.json()["status"] == "cleared"
     
+    def test_analysis_in_progress(self, client, auth_headers):
+        """Test that the analyzing status is published without being committed"""
+        create_response = client.post(
+            "/transactions",
+            json=self.get_sample_transaction(),
+            headers=auth_headers
+        )
+        transaction_id = create_response.json()["id"]
+        
+        client.post(
+            f"/transactions/{transaction_id}/start-analysis",
+            headers=auth_headers
+        )
+        
+        response = client.get("/transactions/analysis/in-progress", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [t["id"] for t in data] == [transaction_id]
+        assert data[0]["status"] == "analyzing"
+        
+        detail = client.get(f"/transactions/{transaction_id}", headers=auth_headers)
+        assert detail.json()["status"] == "pending"
+        
+        client.post(f"/transactions/{transaction_id}/analyze", headers=auth_headers)
+        response = client.get("/transactions/analysis/in-progress", headers=auth_headers)
+        assert response.json() == []
+    
     def test_get_stats(self, client, auth_headers):
         """Test getting dashboard statistics"""
         response = client.get("/transactions/stats", headers=auth_headers)
@@ -233,6 +292,78 @@ class TestTransactionEndpoints:
         assert response.status_code == status.HTTP_204_NO_CONTENT
 
 
+class TestBulkIngestion:
+    """Test bulk transaction ingestion"""
+    
+    def get_batch(self, count: int) -> list:
+        sample = TestTransactionEndpoints().get_sample_transaction()
+        return [{**sample, "amount": 100.0 + i, "description": f"Lot {i}"} for i in range(count)]
+    
+    def test_bulk_json_with_scoring(self, client, auth_headers):
+        """Test a JSON array ingested and scored inline"""
+        response = client.post(
+            "/transactions/bulk?score=true&score_budget_ms=10000",
+            json=self.get_batch(5),
+            headers=auth_headers
+        )
+        
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+        assert data["created"] == 5
+        assert data["scored"] == 5
+        assert data["pending_scoring"] == 0
+        assert [item["index"] for item in data["items"]] == list(range(5))
+        assert all(item["fraud_score"] is not None for item in data["items"])
+        
+        detail = client.get(f"/transactions/{data['items'][0]['id']}", headers=auth_headers).json()
+        assert detail["status"] == "analyzed"
+        assert detail["fraud_score"] == data["items"][0]["fraud_score"]
+        assert detail["amount"] == "100.00"
+    
+    def test_bulk_ndjson_without_scoring(self, client, auth_headers):
+        """Test NDJSON ingestion, rows stay pending"""
+        import json
+        body = "\n".join(json.dumps(item) for item in self.get_batch(3)) + "\n"
+        
+        response = client.post(
+            "/transactions/bulk",
+            content=body,
+            headers={**auth_headers, "Content-Type": "application/x-ndjson"}
+        )
+        
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+        assert data["created"] == 3
+        assert data["scored"] == 0
+        assert len({item["transaction_ref"] for item in data["items"]}) == 3
+        assert all(item["fraud_score"] is None for item in data["items"])
+        
+        listing = client.get("/transactions", params={"status": "pending"}, headers=auth_headers).json()
+        assert listing["total"] == 3
+    
+    def test_bulk_validation_errors(self, client, auth_headers):
+        """Test that invalid items are reported with their index and nothing is inserted"""
+        batch = self.get_batch(3)
+        batch[2]["amount"] = -5
+        
+        response = client.post("/transactions/bulk", json=batch, headers=auth_headers)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.json()["errors"][0]["field"] == "body -> 2 -> amount"
+        
+        # Beyond NUMERIC(15, 2): rejected at validation, not when the row is built
+        batch = self.get_batch(3)
+        batch[1]["amount"] = 1e30
+        response = client.post("/transactions/bulk", json=batch, headers=auth_headers)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.json()["errors"][0]["field"] == "body -> 1 -> amount"
+        
+        response = client.post("/transactions/bulk", json=[], headers=auth_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        
+        listing = client.get("/transactions", headers=auth_headers).json()
+        assert listing["total"] == 0
+
+
 class TestHealthEndpoints:
     """Test health check endpoints"""
     
@@ -253,3 +384,15 @@ class TestHealthEndpoints:
         data = response.json()
         assert "name" in data
         assert "version" in data
+    
+    def test_metrics_endpoint(self, client, auth_headers):
+        """Test Prometheus metrics exposition"""
+        client.get("/transactions/stats", headers=auth_headers)
+        
+        response = client.get("/metrics")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert 'fraud_http_request_duration_seconds_count{method="GET",route="/transactions/stats",status="200"}' in body
+        assert "fraud_db_pool_in_use" in body
+        assert "fraud_audit_queue_depth" in body
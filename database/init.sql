@@ -66,6 +66,8 @@ CREATE INDEX idx_transactions_status ON transactions(status);
 CREATE INDEX idx_transactions_suspicious ON transactions(is_suspicious) WHERE is_suspicious = TRUE;
 CREATE INDEX idx_transactions_fraud_score ON transactions(fraud_score DESC);
 CREATE INDEX idx_transactions_ref ON transactions(transaction_ref);
+-- Backlog claimed by the rescoring job (SELECT ... FOR UPDATE SKIP LOCKED)
+CREATE INDEX idx_transactions_unscored ON transactions(created_at) WHERE fraud_score IS NULL;
 
 -- ============================================
 -- TABLE: audit_logs
@@ -107,6 +109,27 @@ CREATE INDEX idx_fraud_alerts_transaction ON fraud_alerts(transaction_id);
 CREATE INDEX idx_fraud_alerts_severity ON fraud_alerts(severity);
 CREATE INDEX idx_fraud_alerts_unack ON fraud_alerts(is_acknowledged) WHERE is_acknowledged = FALSE;
 
+-- ============================================
+-- TABLE: explanation_jobs
+-- ============================================
+CREATE TABLE IF NOT EXISTS explanation_jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    transaction_id UUID NOT NULL REFERENCES transactions(id) ON DELETE CASCADE,
+    fraud_score INTEGER NOT NULL CHECK (fraud_score >= 0 AND fraud_score <= 100),
+    risk_factors JSONB,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'processing', 'done', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP WITH TIME ZONE,
+    completed_at TIMESTAMP WITH TIME ZONE,
+    next_attempt_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Index pour la file d'explications
+CREATE INDEX idx_explanation_jobs_transaction ON explanation_jobs(transaction_id);
+CREATE INDEX idx_explanation_jobs_open ON explanation_jobs(fraud_score DESC, created_at) WHERE status IN ('queued', 'processing');
+
 -- ============================================
 -- TABLE: model_versions
 -- ============================================
@@ -1,6 +1,6 @@
 import { Injectable, signal, computed } from '@angular/core';
 import { HttpClient, HttpParams } from '@angular/common/http';
-import { Observable, tap, catchError, throwError } from 'rxjs';
+import { Observable, Subscription, tap, catchError, throwError } from 'rxjs';
 import { environment } from '@environments/environment';
 
 export interface Transaction {
@@ -70,6 +70,37 @@ export interface AnalysisResponse {
   factors: string[];
 }
 
+export type AnalysisEventType =
+  | 'stream.open'
+  | 'analysis.started'
+  | 'analysis.step_completed'
+  | 'analysis.scored'
+  | 'analysis.explained'
+  | 'analysis.completed'
+  | 'analysis.failed';
+
+export const ANALYSIS_EVENT_TYPES: AnalysisEventType[] = [
+  'analysis.started',
+  'analysis.step_completed',
+  'analysis.scored',
+  'analysis.explained',
+  'analysis.completed',
+  'analysis.failed'
+];
+
+export interface AnalysisEvent {
+  type: AnalysisEventType;
+  timestamp?: string;
+  transaction_id?: string;
+  transaction_ref?: string;
+  [key: string]: any;
+}
+
+export interface StreamTokenResponse {
+  token: string;
+  expires_in: number;
+}
+
 export interface TransactionFilters {
   page?: number;
   page_size?: number;
@@ -312,6 +343,58 @@ export class TransactionService {
     return this.http.get<Transaction[]>(`${this.apiUrl}/transactions/analysis/in-progress`);
   }
 
+  /**
+   * Flux temps réel des événements d'analyse (Server-Sent Events)
+   * Émet 'stream.open' à chaque (re)connexion pour permettre une resynchronisation
+   */
+  streamAnalysisEvents(): Observable<AnalysisEvent> {
+    return new Observable<AnalysisEvent>(subscriber => {
+      let source: EventSource | undefined;
+      let tokenRequest: Subscription | undefined;
+
+      const connect = () => {
+        // EventSource ne peut pas envoyer d'en-tête Authorization: jeton de flux dédié et de courte durée
+        tokenRequest = this.http.post<StreamTokenResponse>(`${this.apiUrl}/auth/stream-token`, {}).subscribe({
+          next: ({ token }) => {
+            let opened = false;
+            const current = new EventSource(
+              `${this.apiUrl}/transactions/analysis/stream?token=${encodeURIComponent(token)}`
+            );
+            source = current;
+
+            const onEvent = (message: MessageEvent) => subscriber.next(JSON.parse(message.data));
+            ANALYSIS_EVENT_TYPES.forEach(type => current.addEventListener(type, onEvent as EventListener));
+
+            current.onopen = () => {
+              opened = true;
+              subscriber.next({ type: 'stream.open' });
+            };
+            current.onerror = () => {
+              // EventSource se reconnecte seul, sauf si le serveur a refusé la connexion
+              if (current.readyState !== EventSource.CLOSED) {
+                return;
+              }
+              if (opened) {
+                // Jeton expiré lors d'une reconnexion: en redemander un
+                connect();
+              } else {
+                subscriber.error(new Error('Flux temps réel fermé'));
+              }
+            };
+          },
+          error: () => subscriber.error(new Error('Flux temps réel indisponible'))
+        });
+      };
+
+      connect();
+
+      return () => {
+        tokenRequest?.unsubscribe();
+        source?.close();
+      };
+    });
+  }
+
   /**
    * Démarre l'analyse d'une transaction (statut = analyzing)
    */
@@ -2,8 +2,10 @@ import { Component, OnInit, OnDestroy, inject, signal, computed } from '@angular
 import { CommonModule } from '@angular/common';
 import { RouterLink } from '@angular/router';
 import { NavbarComponent } from '@app/shared/components/navbar/navbar.component';
-import { TransactionService, Transaction } from '@app/core/services/transaction.service';
-import { interval, Subscription } from 'rxjs';
+import { TransactionService, Transaction, AnalysisEvent } from '@app/core/services/transaction.service';
+import { Subscription } from 'rxjs';
+
+type AnalysisStage = 'ml' | 'llm' | 'result';
 
 @Component({
   selector: 'app-analysis',
@@ -26,7 +28,7 @@ import { interval, Subscription } from 'rxjs';
           <div class="header-actions">
             <div class="auto-refresh" [class.active]="autoRefresh()">
               <span class="refresh-indicator"></span>
-              Actualisation auto: {{ autoRefresh() ? 'ON' : 'OFF' }}
+              Temps réel: {{ autoRefresh() ? 'ON' : 'OFF' }}
             </div>
             <button class="btn btn-secondary" (click)="toggleAutoRefresh()">
               @if (autoRefresh()) {
@@ -163,18 +165,36 @@ import { interval, Subscription } from 'rxjs';
                         <span class="step-icon">✓</span>
                         <span class="step-label">Réception</span>
                       </div>
-                      <div class="step active">
+                      <div class="step" [class.active]="stageOf(tx) === 'ml'" [class.completed]="stageOf(tx) !== 'ml'">
                         <span class="step-icon">
-                          <span class="mini-spinner"></span>
+                          @if (stageOf(tx) === 'ml') {
+                            <span class="mini-spinner"></span>
+                          } @else {
+                            ✓
+                          }
                         </span>
                         <span class="step-label">ML Analysis</span>
                       </div>
-                      <div class="step">
-                        <span class="step-icon">○</span>
+                      <div class="step" [class.active]="stageOf(tx) === 'llm'" [class.completed]="stageOf(tx) === 'result'">
+                        <span class="step-icon">
+                          @if (stageOf(tx) === 'llm') {
+                            <span class="mini-spinner"></span>
+                          } @else if (stageOf(tx) === 'result') {
+                            ✓
+                          } @else {
+                            ○
+                          }
+                        </span>
                         <span class="step-label">LLM</span>
                       </div>
-                      <div class="step">
-                        <span class="step-icon">○</span>
+                      <div class="step" [class.active]="stageOf(tx) === 'result'">
+                        <span class="step-icon">
+                          @if (stageOf(tx) === 'result') {
+                            <span class="mini-spinner"></span>
+                          } @else {
+                            ○
+                          }
+                        </span>
                         <span class="step-label">Résultat</span>
                       </div>
                     </div>
@@ -804,7 +824,8 @@ export class AnalysisComponent implements OnInit, OnDestroy {
   autoRefresh = signal(true);
   consoleLogs = signal<{time: string, message: string, type: string}[]>([]);
   
-  private refreshSubscription?: Subscription;
+  private stages = signal<Record<string, AnalysisStage>>({});
+  private streamSubscription?: Subscription;
 
   ngOnInit() {
     this.loadAnalyzingTransactions();
@@ -822,22 +843,8 @@ export class AnalysisComponent implements OnInit, OnDestroy {
     
     this.transactionService.getAnalyzingTransactions().subscribe({
       next: (transactions) => {
-        const previousCount = this.analyzingTransactions().length;
         this.analyzingTransactions.set(transactions);
         this.isLoading.set(false);
-        
-        // Check for newly completed
-        if (previousCount > transactions.length) {
-          const completed = previousCount - transactions.length;
-          this.completedCount.update(c => c + completed);
-          this.addLog('success', `✅ ${completed} analyse(s) terminée(s)`);
-        }
-        
-        // Check for new analyses started
-        if (transactions.length > previousCount) {
-          const newCount = transactions.length - previousCount;
-          this.addLog('info', `🚀 ${newCount} nouvelle(s) analyse(s) démarrée(s)`);
-        }
       },
       error: (err) => {
         this.isLoading.set(false);
@@ -845,6 +852,10 @@ export class AnalysisComponent implements OnInit, OnDestroy {
       }
     });
 
+    this.loadRecentCompleted();
+  }
+
+  loadRecentCompleted() {
     // Load recent completed for display
     this.transactionService.loadTransactions({ 
       status: 'analyzed', 
@@ -859,26 +870,98 @@ export class AnalysisComponent implements OnInit, OnDestroy {
   }
 
   startAutoRefresh() {
-    this.refreshSubscription = interval(2000).subscribe(() => {
-      if (this.autoRefresh()) {
-        this.loadAnalyzingTransactions();
+    // Push des événements d'analyse (remplace le polling toutes les 2 secondes)
+    this.streamSubscription = this.transactionService.streamAnalysisEvents().subscribe({
+      next: (event) => this.handleEvent(event),
+      error: (err) => {
+        this.autoRefresh.set(false);
+        this.addLog('error', `❌ ${err.message}`);
       }
     });
   }
 
   stopAutoRefresh() {
-    this.refreshSubscription?.unsubscribe();
+    this.streamSubscription?.unsubscribe();
+    this.streamSubscription = undefined;
   }
 
   toggleAutoRefresh() {
     this.autoRefresh.update(v => !v);
     if (this.autoRefresh()) {
-      this.addLog('info', '▶️ Auto-refresh activé');
+      this.startAutoRefresh();
+      this.addLog('info', '▶️ Flux temps réel activé');
     } else {
-      this.addLog('warning', '⏸️ Auto-refresh en pause');
+      this.stopAutoRefresh();
+      this.addLog('warning', '⏸️ Flux temps réel en pause');
     }
   }
 
+  handleEvent(event: AnalysisEvent) {
+    const id = event.transaction_id ?? '';
+
+    switch (event.type) {
+      case 'stream.open':
+        // (Re)connexion: resynchroniser les analyses déjà en cours
+        this.loadAnalyzingTransactions();
+        this.addLog('info', '📡 Flux temps réel connecté');
+        break;
+
+      case 'analysis.started': {
+        const transaction = { ...event, id } as unknown as Transaction;
+        this.analyzingTransactions.update(list => [transaction, ...list.filter(t => t.id !== id)]);
+        this.setStage(id, 'ml');
+        this.addLog('info', `🚀 Analyse démarrée: ${event.transaction_ref}`);
+        break;
+      }
+
+      case 'analysis.step_completed':
+        this.addLog(
+          'info',
+          `🔎 ${event.transaction_ref} [${event['index']}/${event['total']}] ${event['label']}: ` +
+          `${event['score']}/100 (${event['duration_ms']} ms)`
+        );
+        break;
+
+      case 'analysis.scored':
+        this.setStage(id, 'llm');
+        this.addLog(
+          event['is_suspicious'] ? 'warning' : 'info',
+          `🤖 ${event.transaction_ref}: score ${event['fraud_score']}/100 (${event['risk_level']})`
+        );
+        break;
+
+      case 'analysis.explained':
+        this.setStage(id, 'result');
+        this.addLog('info', `📝 ${event.transaction_ref}: explication générée`);
+        break;
+
+      case 'analysis.completed':
+        this.removeAnalysis(id);
+        this.completedCount.update(c => c + 1);
+        this.addLog('success', `✅ Analyse terminée: ${event.transaction_ref}`);
+        this.loadRecentCompleted();
+        break;
+
+      case 'analysis.failed':
+        this.removeAnalysis(id);
+        this.addLog('error', `❌ Échec de l'analyse: ${event.transaction_ref}`);
+        break;
+    }
+  }
+
+  stageOf(tx: Transaction): AnalysisStage {
+    return this.stages()[tx.id] ?? 'ml';
+  }
+
+  private setStage(id: string, stage: AnalysisStage) {
+    this.stages.update(stages => ({ ...stages, [id]: stage }));
+  }
+
+  private removeAnalysis(id: string) {
+    this.analyzingTransactions.update(list => list.filter(t => t.id !== id));
+    this.stages.update(({ [id]: _, ...rest }) => rest);
+  }
+
   addLog(type: string, message: string) {
     const time = new Date().toLocaleTimeString('fr-FR');
     this.consoleLogs.update(logs => {